@@ -0,0 +1,399 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import unicodedata
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+__all__ = ["GetMetaboliteOccurrences", "GetSharedMetabolites", "GetStudiesContainingMetabolite", "NormalizeMetaboliteNames", "SetupAlignedDataFrame", "SetupMetaboliteAlignmentIndex"]
+
+
+def SetupMetaboliteAlignmentIndex(StudiesResultsData, RefMetIndex = None, NameMap = None, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Setup an index for aligning metabolites across data frames for all
+    studies and analyses. The index maps normalized metabolite names to
+    study IDs, analysis IDs and column numbers of metabolites in data frames.
+
+    The metabolite names are normalized using NormalizeMetaboliteNames. The
+    occurrences of metabolites are grouped by normalized names and the
+    normalized names are indexed using a hash table. Consequently, looking up
+    studies and analyses containing a metabolite takes constant time along
+    with time proportional to the number of occurrences.
+
+    The data frames are referenced by the index and aren't copied.
+
+    Arguments:
+        StudiesResultsData (dict): A dictionary containing retrieved data for
+            analysis and results in specified study ID(s).
+        RefMetIndex (dict): RefMet index from MWRefMetUtil.SetupRefMetIndex
+            for mapping names to RefMet names or None.
+        NameMap (dict): A dictionary mapping names to standardized names or
+            None.
+        ClassColID (str): Class column ID.
+        ClassNumColID (str): Class number column ID.
+
+    Returns:
+        dict : A dictionary containing metabolite alignment index.
+
+    Examples:
+
+        AlignmentIndex = MWAlignmentUtil.SetupMetaboliteAlignmentIndex(StudiesResultsData)
+        StudyIDs = MWAlignmentUtil.GetStudiesContainingMetabolite(AlignmentIndex, "Alanine")
+        AlignedDataFrame = MWAlignmentUtil.SetupAlignedDataFrame(AlignmentIndex, MinStudies = 2)
+
+    """
+
+    Analyses = []
+    EntryNames = []
+    EntryAnalysisNums = []
+    EntryColNums = []
+    for StudyID in StudiesResultsData:
+        for AnalysisID in StudiesResultsData[StudyID]:
+            if "data_frame" not in StudiesResultsData[StudyID][AnalysisID]:
+                continue
+
+            DataFrame = StudiesResultsData[StudyID][AnalysisID]["data_frame"]
+            ColNums = np.where(~DataFrame.columns.isin([ClassColID, ClassNumColID]))[0]
+
+            EntryNames.append(DataFrame.columns[ColNums].astype(str).to_numpy())
+            EntryAnalysisNums.append(np.full(len(ColNums), len(Analyses), dtype = np.int64))
+            EntryColNums.append(ColNums)
+            Analyses.append([StudyID, AnalysisID, DataFrame.shape[0], len(ColNums)])
+
+    if len(Analyses) == 0:
+        print("***Warning: SetupMetaboliteAlignmentIndex: No data frames available...")
+
+    EntryNames = np.concatenate(EntryNames) if len(EntryNames) else np.array([], dtype = object)
+    EntryAnalysisNums = np.concatenate(EntryAnalysisNums) if len(EntryAnalysisNums) else np.array([], dtype = np.int64)
+    EntryColNums = np.concatenate(EntryColNums) if len(EntryColNums) else np.array([], dtype = np.int64)
+
+    AnalysesDataFrame = pd.DataFrame(Analyses, columns = ["StudyID", "AnalysisID", "Samples", "Metabolites"])
+
+    # Group entries by codes for normalized names...
+    NameMapIndex = _SetupNameMapIndex(NameMap)
+    NormalizedNames, StandardizedNames = _NormalizeMetaboliteNames(EntryNames, RefMetIndex, NameMapIndex)
+    NameCodes, UniqueNormalizedNames = pd.factorize(NormalizedNames)
+    Counts = np.bincount(NameCodes, minlength = len(UniqueNormalizedNames))
+    Starts = np.cumsum(Counts) - Counts
+    EntryNums = np.argsort(NameCodes, kind = "mergesort")
+
+    # Use the first standardized name for each normalized name...
+    FirstEntryNums = EntryNums[Starts[Counts > 0]] if len(EntryNums) else np.array([], dtype = np.int64)
+
+    # Count studies and analyses containing each name...
+    StudyCodes = pd.factorize(AnalysesDataFrame["StudyID"])[0]
+    EntryStudyCodes = StudyCodes[EntryAnalysisNums] if len(EntryAnalysisNums) else np.array([], dtype = np.int64)
+    AnalysisCounts = _CountUniquePairs(NameCodes, EntryAnalysisNums, len(UniqueNormalizedNames))
+    StudyCounts = _CountUniquePairs(NameCodes, EntryStudyCodes, len(UniqueNormalizedNames))
+
+    AlignmentIndex = {}
+    AlignmentIndex["StudiesResultsData"] = StudiesResultsData
+    AlignmentIndex["ColIDs"] = {"Class": ClassColID, "ClassNum": ClassNumColID}
+    AlignmentIndex["RefMetIndex"] = RefMetIndex
+    AlignmentIndex["NameMapIndex"] = NameMapIndex
+    AlignmentIndex["Analyses"] = AnalysesDataFrame
+    AlignmentIndex["Entries"] = {"Names": EntryNames, "NameCodes": NameCodes, "AnalysisNums": EntryAnalysisNums, "ColNums": EntryColNums}
+    AlignmentIndex["NameIndex"] = {"Names": pd.Index(UniqueNormalizedNames), "StandardizedNames": StandardizedNames[FirstEntryNums],
+                                   "EntryNums": EntryNums, "Starts": Starts, "Counts": Counts,
+                                   "AnalysisCounts": AnalysisCounts, "StudyCounts": StudyCounts}
+
+    print("Indexed %d metabolite names across %d occurrences in %d analyses for %d studies..." % (len(UniqueNormalizedNames), len(EntryNames), len(AnalysesDataFrame), AnalysesDataFrame["StudyID"].nunique()))
+
+    return AlignmentIndex
+
+def NormalizeMetaboliteNames(Names, RefMetIndex = None, NameMap = None):
+    """Normalize metabolite names for aligning metabolites across studies.
+    The names are mapped to standardized names using NameMap followed by
+    RefMet names using RefMetIndex, when specified. The mapped names are
+    normalized using Unicode NFKC normalization, case folding and removal
+    of extra whitespace. The names are matched ignoring case and whitespace
+    during mapping.
+
+    Arguments:
+        Names (list): A list of metabolite names.
+        RefMetIndex (dict): RefMet index from MWRefMetUtil.SetupRefMetIndex
+            or None.
+        NameMap (dict): A dictionary mapping names to standardized names or
+            None.
+
+    Returns:
+        list : A list of normalized names.
+
+    """
+
+    NormalizedNames, StandardizedNames = _NormalizeMetaboliteNames(list(Names), RefMetIndex, _SetupNameMapIndex(NameMap))
+
+    return list(NormalizedNames)
+
+def GetMetaboliteOccurrences(AlignmentIndex, Name):
+    """Get occurrences of a metabolite in data frames for studies and
+    analyses.
+
+    Arguments:
+        AlignmentIndex (dict): Metabolite alignment index.
+        Name (str): Metabolite name.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            occurrence: StudyID, AnalysisID, ColumnNum and ColumnName.
+
+    """
+
+    EntryNums = _GetNameEntryNums(AlignmentIndex, Name)
+
+    AnalysisNums = AlignmentIndex["Entries"]["AnalysisNums"][EntryNums]
+    Analyses = AlignmentIndex["Analyses"]
+
+    return pd.DataFrame({"StudyID": Analyses["StudyID"].to_numpy()[AnalysisNums],
+                         "AnalysisID": Analyses["AnalysisID"].to_numpy()[AnalysisNums],
+                         "ColumnNum": AlignmentIndex["Entries"]["ColNums"][EntryNums],
+                         "ColumnName": AlignmentIndex["Entries"]["Names"][EntryNums]})
+
+def GetStudiesContainingMetabolite(AlignmentIndex, Name):
+    """Get study IDs for studies containing a metabolite.
+
+    Arguments:
+        AlignmentIndex (dict): Metabolite alignment index.
+        Name (str): Metabolite name.
+
+    Returns:
+        list : A list of study IDs in the order of studies in the index.
+
+    """
+
+    EntryNums = _GetNameEntryNums(AlignmentIndex, Name)
+    AnalysisNums = np.unique(AlignmentIndex["Entries"]["AnalysisNums"][EntryNums])
+
+    return list(pd.unique(AlignmentIndex["Analyses"]["StudyID"].to_numpy()[AnalysisNums]))
+
+def GetSharedMetabolites(AlignmentIndex, MinStudies = 2, MinAnalyses = 1):
+    """Get metabolites present in a minimum number of studies and analyses.
+
+    Arguments:
+        AlignmentIndex (dict): Metabolite alignment index.
+        MinStudies (int): Minimum number of studies.
+        MinAnalyses (int): Minimum number of analyses.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            metabolite: Name, NormalizedName, Studies and Analyses. The
+            metabolites are sorted in descending order of number of studies
+            and analyses.
+
+    """
+
+    NameIndex = AlignmentIndex["NameIndex"]
+
+    NameCodes = np.where((NameIndex["StudyCounts"] >= MinStudies) & (NameIndex["AnalysisCounts"] >= MinAnalyses))[0]
+    SharedDataFrame = pd.DataFrame({"Name": NameIndex["StandardizedNames"][NameCodes],
+                                    "NormalizedName": NameIndex["Names"].to_numpy()[NameCodes],
+                                    "Studies": NameIndex["StudyCounts"][NameCodes],
+                                    "Analyses": NameIndex["AnalysisCounts"][NameCodes]})
+
+    return SharedDataFrame.sort_values(["Studies", "Analyses"], ascending = False, kind = "mergesort").reset_index(drop = True)
+
+def SetupAlignedDataFrame(AlignmentIndex, Metabolites = None, StudyIDs = None, MinStudies = 1, MinAnalyses = 1, Sparse = False):
+    """Setup a pooled data frame containing aligned metabolite values for
+    samples across studies and analyses. The samples for each analysis are
+    stacked in rows and the values for metabolites missing in an analysis
+    are NaN.
+
+    Only the columns for selected metabolites are copied from each data
+    frame into a preallocated array. A sparse data frame with NaN as the fill
+    value may be set up instead of a dense data frame for metabolites
+    present in a few analyses. The first occurrence of a metabolite is used
+    for an analysis containing multiple columns with the same normalized
+    name.
+
+    Arguments:
+        AlignmentIndex (dict): Metabolite alignment index.
+        Metabolites (list): Metabolite names. Default: All metabolites
+            present in MinStudies and MinAnalyses in selected studies.
+        StudyIDs (list): Study IDs. Default: All studies.
+        MinStudies (int): Minimum number of selected studies for metabolites.
+        MinAnalyses (int): Minimum number of selected analyses for
+            metabolites.
+        Sparse (bool): Setup sparse columns for metabolites.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            sample: StudyID, AnalysisID, Class followed by metabolites.
+
+    Examples:
+
+        AlignedDataFrame = MWAlignmentUtil.SetupAlignedDataFrame(AlignmentIndex, Metabolites = ["Alanine", "Glycine"])
+
+    """
+
+    Analyses = AlignmentIndex["Analyses"]
+    Entries = AlignmentIndex["Entries"]
+    NameIndex = AlignmentIndex["NameIndex"]
+    ClassColID = AlignmentIndex["ColIDs"]["Class"]
+
+    # Select analyses...
+    AnalysisNums = np.arange(len(Analyses))
+    if StudyIDs is not None:
+        AnalysisNums = np.where(Analyses["StudyID"].isin(list(StudyIDs)))[0]
+
+    SelectedAnalysesMask = np.zeros(len(Analyses), dtype = bool)
+    SelectedAnalysesMask[AnalysisNums] = True
+    EntriesMask = SelectedAnalysesMask[Entries["AnalysisNums"]]
+
+    # Select metabolites...
+    if Metabolites is not None:
+        NormalizedNames, StandardizedNames = _NormalizeMetaboliteNames(np.asarray(list(Metabolites), dtype = object), AlignmentIndex["RefMetIndex"], AlignmentIndex["NameMapIndex"])
+        NameCodes = NameIndex["Names"].get_indexer(NormalizedNames)
+        if np.any(NameCodes < 0):
+            print("***Warning: SetupAlignedDataFrame: Ignoring metabolites not present in any analysis: %s" % ", ".join([str(Name) for Name in np.asarray(list(Metabolites), dtype = object)[NameCodes < 0]]))
+        NameCodes = pd.unique(NameCodes[NameCodes >= 0])
+    else:
+        NumOfNames = len(NameIndex["Names"])
+        StudyCodes = pd.factorize(Analyses["StudyID"])[0]
+        AnalysisCounts = _CountUniquePairs(Entries["NameCodes"][EntriesMask], Entries["AnalysisNums"][EntriesMask], NumOfNames)
+        StudyCounts = _CountUniquePairs(Entries["NameCodes"][EntriesMask], StudyCodes[Entries["AnalysisNums"][EntriesMask]], NumOfNames)
+        NameCodes = np.where((StudyCounts >= max(MinStudies, 1)) & (AnalysisCounts >= max(MinAnalyses, 1)))[0]
+
+    TargetColNums = np.full(len(NameIndex["Names"]), -1, dtype = np.int64)
+    TargetColNums[NameCodes] = np.arange(len(NameCodes))
+
+    # Select first entry for each selected metabolite in each selected analysis...
+    EntryNums = np.where(EntriesMask & (TargetColNums[Entries["NameCodes"]] >= 0))[0]
+    EntryNums = EntryNums[~pd.DataFrame({"Analysis": Entries["AnalysisNums"][EntryNums], "Name": Entries["NameCodes"][EntryNums]}).duplicated().to_numpy()]
+
+    # Setup row offsets for samples in selected analyses...
+    NumOfRows = Analyses["Samples"].to_numpy()[AnalysisNums]
+    RowOffsets = np.full(len(Analyses), -1, dtype = np.int64)
+    RowOffsets[AnalysisNums] = np.cumsum(NumOfRows) - NumOfRows
+    TotalNumOfRows = int(NumOfRows.sum())
+
+    EntryAnalysisNums = Entries["AnalysisNums"][EntryNums]
+    Order = np.argsort(EntryAnalysisNums, kind = "mergesort")
+    EntryNums, EntryAnalysisNums = EntryNums[Order], EntryAnalysisNums[Order]
+    AnalysisStarts = np.searchsorted(EntryAnalysisNums, AnalysisNums, side = "left")
+    AnalysisEnds = np.searchsorted(EntryAnalysisNums, AnalysisNums, side = "right")
+
+    if Sparse:
+        ColumnParts = [[] for ColNum in range(len(NameCodes))]
+    else:
+        Values = np.full((TotalNumOfRows, len(NameCodes)), np.nan, dtype = np.float64)
+
+    SampleIDs = []
+    StudyIDValues = []
+    AnalysisIDValues = []
+    ClassValues = []
+    for AnalysisNum, StartEntryNum, EndEntryNum in zip(AnalysisNums, AnalysisStarts, AnalysisEnds):
+        StudyID, AnalysisID = Analyses["StudyID"].iat[AnalysisNum], Analyses["AnalysisID"].iat[AnalysisNum]
+        DataFrame = AlignmentIndex["StudiesResultsData"][StudyID][AnalysisID]["data_frame"]
+
+        SampleIDs.append(DataFrame.index)
+        StudyIDValues.append(np.full(DataFrame.shape[0], StudyID, dtype = object))
+        AnalysisIDValues.append(np.full(DataFrame.shape[0], AnalysisID, dtype = object))
+        ClassValues.append(DataFrame[ClassColID].to_numpy() if ClassColID in DataFrame.columns else np.full(DataFrame.shape[0], np.nan, dtype = object))
+
+        AnalysisEntryNums = EntryNums[StartEntryNum:EndEntryNum]
+        if len(AnalysisEntryNums) == 0:
+            continue
+
+        # Copy only the columns for selected metabolites...
+        ColNums = Entries["ColNums"][AnalysisEntryNums]
+        AnalysisTargetColNums = TargetColNums[Entries["NameCodes"][AnalysisEntryNums]]
+        AnalysisValues = DataFrame.iloc[:, ColNums].to_numpy(dtype = np.float64)
+
+        RowOffset = RowOffsets[AnalysisNum]
+        if Sparse:
+            for Index, TargetColNum in enumerate(AnalysisTargetColNums):
+                ColumnParts[TargetColNum].append((RowOffset, AnalysisValues[:, Index]))
+        else:
+            Values[RowOffset:RowOffset + DataFrame.shape[0], AnalysisTargetColNums] = AnalysisValues
+
+    ColIDs = list(NameIndex["StandardizedNames"][NameCodes])
+    if Sparse:
+        Columns = {}
+        for TargetColNum, ColID in enumerate(ColIDs):
+            ColumnValues = np.full(TotalNumOfRows, np.nan, dtype = np.float64)
+            for RowOffset, PartValues in ColumnParts[TargetColNum]:
+                ColumnValues[RowOffset:RowOffset + len(PartValues)] = PartValues
+            Columns[TargetColNum] = pd.arrays.SparseArray(ColumnValues, fill_value = np.nan)
+        AlignedDataFrame = pd.DataFrame(Columns)
+        AlignedDataFrame.columns = ColIDs
+    else:
+        AlignedDataFrame = pd.DataFrame(Values, columns = ColIDs, copy = False)
+
+    SampleIDsIndex = SampleIDs[0].append(SampleIDs[1:]) if len(SampleIDs) > 1 else (SampleIDs[0] if len(SampleIDs) else pd.Index([]))
+    AlignedDataFrame.index = SampleIDsIndex
+
+    AlignedDataFrame.insert(0, ClassColID, np.concatenate(ClassValues) if len(ClassValues) else [])
+    AlignedDataFrame.insert(0, "AnalysisID", np.concatenate(AnalysisIDValues) if len(AnalysisIDValues) else [])
+    AlignedDataFrame.insert(0, "StudyID", np.concatenate(StudyIDValues) if len(StudyIDValues) else [])
+
+    return AlignedDataFrame
+
+def _NormalizeMetaboliteNames(Names, RefMetIndex = None, NameMapIndex = None):
+    """Get normalized and standardized names for an array of names."""
+
+    StandardizedNames = np.array([" ".join(str(Name).split()) for Name in Names], dtype = object)
+
+    if NameMapIndex is not None and len(NameMapIndex["Names"]):
+        Positions = NameMapIndex["Names"].get_indexer(_NormalizeNameText(StandardizedNames))
+        StandardizedNames = np.where(Positions >= 0, NameMapIndex["MappedNames"][np.maximum(Positions, 0)], StandardizedNames)
+
+    if RefMetIndex is not None and RefMetIndex["NameIndex"] is not None and len(RefMetIndex["NameIndex"]):
+        NameIndex = RefMetIndex["NameIndex"]
+        Positions = NameIndex.index.get_indexer([str(Name).lower() for Name in StandardizedNames])
+        RefMetNames = RefMetIndex["DataFrame"][RefMetIndex["ColIDs"]["Name"]].to_numpy(dtype = object)
+        StandardizedNames = np.where(Positions >= 0, RefMetNames[NameIndex.to_numpy()[np.maximum(Positions, 0)]], StandardizedNames)
+
+    return (_NormalizeNameText(StandardizedNames), StandardizedNames)
+
+def _SetupNameMapIndex(NameMap):
+    """Setup a hash index for normalized names in a name map."""
+
+    if NameMap is None:
+        return None
+
+    NameMapIndex = {}
+    NameMapIndex["Names"] = pd.Index(_NormalizeNameText(list(NameMap.keys())))
+    NameMapIndex["MappedNames"] = np.array([" ".join(str(Name).split()) for Name in NameMap.values()], dtype = object)
+
+    # Use the first mapping for names differing only in case or whitespace...
+    UniqueMask = ~NameMapIndex["Names"].duplicated(keep = "first")
+    NameMapIndex["Names"] = NameMapIndex["Names"][UniqueMask]
+    NameMapIndex["MappedNames"] = NameMapIndex["MappedNames"][UniqueMask]
+
+    return NameMapIndex
+
+def _NormalizeNameText(Names):
+    """Normalize names using Unicode NFKC normalization, case folding and
+    removal of extra whitespace."""
+
+    return np.array([" ".join(unicodedata.normalize("NFKC", str(Name)).casefold().split()) for Name in Names], dtype = object)
+
+def _GetNameEntryNums(AlignmentIndex, Name):
+    """Get entry numbers for a metabolite name."""
+
+    NameIndex = AlignmentIndex["NameIndex"]
+    NormalizedNames, StandardizedNames = _NormalizeMetaboliteNames(np.array([Name], dtype = object), AlignmentIndex["RefMetIndex"], AlignmentIndex["NameMapIndex"])
+
+    try:
+        NameCode = NameIndex["Names"].get_loc(NormalizedNames[0])
+    except KeyError:
+        return np.array([], dtype = np.int64)
+
+    Start = NameIndex["Starts"][NameCode]
+
+    return NameIndex["EntryNums"][Start:Start + NameIndex["Counts"][NameCode]]
+
+def _CountUniquePairs(NameCodes, GroupCodes, NumOfNames):
+    """Count unique groups for each name code."""
+
+    if len(NameCodes) == 0:
+        return np.zeros(NumOfNames, dtype = np.int64)
+
+    UniquePairs = pd.DataFrame({"Name": NameCodes, "Group": GroupCodes}).drop_duplicates()
+
+    return np.bincount(UniquePairs["Name"].to_numpy(), minlength = NumOfNames)
@@ -0,0 +1,642 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import asyncio
+import threading
+import concurrent.futures
+from io import StringIO
+
+try:
+    from urllib.parse import urlparse, quote
+except ImportError:
+    from urlparse import urlparse
+    from urllib import quote
+
+import MWLazyImport
+
+requests = MWLazyImport.LazyImport("requests")
+
+aiohttp = MWLazyImport.LazyImport("aiohttp") if MWLazyImport.IsModuleAvailable("aiohttp") else None
+
+pd = MWLazyImport.LazyImport("pandas")
+
+import MWCache
+import MWTrace
+import MWUtil
+
+__all__ = ["CloseAsyncClient", "RetrieveExactMassDataAsync", "RetrieveMOverZDataAsync", "RetrieveRESTDataAsync", "RetrieveRESTDataForInputValuesAsync", "RetrieveStudiesAnalysisAndResultsDataAsync", "RetrieveURLAsync", "RetrieveURLsAsync", "RunAsync", "SetupAsyncClient", "StartBackgroundTask"]
+
+# Event loop running in a background thread for tasks started outside of a
+# running event loop...
+_BackgroundLoop = None
+_BackgroundLoopLock = threading.Lock()
+
+
+def SetupAsyncClient(MWBaseURL = "https://www.metabolomicsworkbench.org/rest", MaxConcurrency = 32, MaxConnectionsPerHost = 8, MaxRetries = 3, RetryBackoffFactor = 0.5, Timeout = 300, Cache = None, Backend = None, ChunkSize = 64 * 1024):
+    """Setup an asynchronous client for MW REST API. The client limits the
+    number of requests in flight to MaxConcurrency and simultaneous requests
+    to a host to MaxConnectionsPerHost. The connections are reused across
+    requests and response bodies are read in chunks of ChunkSize bytes.
+
+    The following backends are supported:
+
+    aiohttp - Make requests using aiohttp module
+    requests - Make requests using a keep-alive requests session in a pool
+        of threads
+
+    The aiohttp backend is used by default when aiohttp module is available.
+    Requests failing with status codes 429 or 5xx are retried up to
+    MaxRetries times with an exponential backoff.
+
+    The client is set up without any network connections or event loop
+    objects, which are created during its first use. It must be used in a
+    single event loop and closed using CloseAsyncClient.
+
+    Arguments:
+        MWBaseURL (str): REST URL base for MW.
+        MaxConcurrency (int): Maximum number of requests in flight.
+        MaxConnectionsPerHost (int): Maximum number of simultaneous
+            requests to a host.
+        MaxRetries (int): Maximum number of retries for a failed request.
+        RetryBackoffFactor (float): Backoff factor in seconds for retries.
+        Timeout (float): Total timeout in seconds for a request.
+        Cache (dict): REST cache information from MWCache.SetupRESTCache.
+        Backend (str): aiohttp or requests. Default: aiohttp, if available.
+        ChunkSize (int): Size of chunks in bytes for reading response
+            bodies.
+
+    Returns:
+        dict : A dictionary containing client information.
+
+    Examples:
+
+        async def RetrieveData():
+            Client = MWAsyncClient.SetupAsyncClient(MaxConcurrency = 64)
+            try:
+                Results = await MWAsyncClient.RetrieveRESTDataForInputValuesAsync(Client, "refmet", "name", ["Cholesterol", "Alanine"])
+            finally:
+                await MWAsyncClient.CloseAsyncClient(Client)
+            return Results
+
+        Results = MWAsyncClient.RunAsync(RetrieveData())
+
+    """
+
+    if Backend is None:
+        Backend = "aiohttp" if aiohttp is not None else "requests"
+
+    if re.match("^aiohttp$", Backend, re.I):
+        if aiohttp is None:
+            print("***Error: SetupAsyncClient: aiohttp backend requires aiohttp module...")
+            return None
+        Backend = "aiohttp"
+    elif re.match("^requests$", Backend, re.I):
+        Backend = "requests"
+    else:
+        print("***Error: SetupAsyncClient: Specified backend, %s, is not supported. Supported values: aiohttp or requests" % Backend)
+        return None
+
+    Client = {}
+    Client["MWBaseURL"] = MWBaseURL.rstrip("/")
+    Client["Backend"] = Backend
+    Client["MaxConcurrency"] = max(MaxConcurrency, 1)
+    Client["MaxConnectionsPerHost"] = max(MaxConnectionsPerHost, 1)
+    Client["MaxRetries"] = MaxRetries
+    Client["RetryBackoffFactor"] = RetryBackoffFactor
+    Client["Timeout"] = Timeout
+    Client["Cache"] = Cache
+    Client["ChunkSize"] = ChunkSize
+
+    # Event loop objects set up during first use...
+    Client["Session"] = None
+    Client["Executor"] = None
+    Client["CacheExecutor"] = None
+    Client["Semaphore"] = None
+    Client["HostSemaphores"] = {}
+    Client["Stats"] = {"Requests": 0, "Retries": 0, "Bytes": 0}
+
+    return Client
+
+async def CloseAsyncClient(Client):
+    """Close network connections and thread pools for an asynchronous client.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+
+    """
+
+    Session, Executor, CacheExecutor = Client["Session"], Client["Executor"], Client["CacheExecutor"]
+    Client["Session"], Client["Executor"], Client["CacheExecutor"], Client["Semaphore"], Client["HostSemaphores"] = None, None, None, None, {}
+
+    if Session is not None:
+        if Client["Backend"] == "aiohttp":
+            await Session.close()
+        else:
+            Session.close()
+
+    for PoolExecutor in [Executor, CacheExecutor]:
+        if PoolExecutor is not None:
+            PoolExecutor.shutdown(wait = False)
+
+async def RetrieveURLAsync(Client, URL):
+    """Retrieve a URL using an asynchronous client and a REST cache, if
+    specified for the client.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+        URL (str): Request URL.
+
+    Returns:
+        object : A requests response containing status code, headers and
+            content or None for a connection error.
+
+    """
+
+    _SetupClientObjects(Client)
+
+    TraceStage = MWTrace.BeginStage("HTTPFetch", URL, TrackMemory = False)
+
+    if Client["Cache"] is None:
+        Response = await _RetrieveURLAsync(Client, URL)
+    else:
+        # Run the blocking cache lookup in a thread, which schedules any
+        # requests back on the event loop and waits for them. The cache
+        # lookups use their own pool of threads to avoid waiting on requests
+        # queued behind them in the pool used by requests backend...
+        Loop = asyncio.get_running_loop()
+        RetrieveURLFuncRef = lambda Headers: asyncio.run_coroutine_threadsafe(_RetrieveURLAsync(Client, URL, Headers), Loop).result()
+        Response = await Loop.run_in_executor(Client["CacheExecutor"], MWCache.RetrieveURLUsingRESTCache, Client["Cache"], URL, RetrieveURLFuncRef)
+
+    if TraceStage is not None:
+        MWTrace.EndStage(TraceStage, Bytes = len(Response.content) if Response is not None else 0)
+
+    return Response
+
+async def RetrieveURLsAsync(Client, URLs):
+    """Retrieve URLs concurrently using an asynchronous client. The number
+    of requests in flight is limited by the client.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+        URLs (list): Request URLs.
+
+    Returns:
+        list : A list of requests responses or None in the order of URLs.
+
+    """
+
+    return list(await asyncio.gather(*[RetrieveURLAsync(Client, URL) for URL in URLs]))
+
+async def RetrieveRESTDataAsync(Client, Context, InputItem, InputValue, OutputItem = "all", OutputFormat = "json"):
+    """Retrieve data for a MW REST API request, specified as
+    <Context>/<InputItem>/<InputValue>/<OutputItem>, for contexts such as
+    compound, gene, protein, refmet and study.
+
+    The JSON data is returned as a dictionary. The text data is returned as
+    a list of (ResultType, ResultValue) tuples for tab delimited lines
+    containing a result type and value.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+        Context (str): Context, such as compound, gene, protein, refmet or
+            study.
+        InputItem (str): Input item, such as regno, gene_id, uniprot_id,
+            name or study_id.
+        InputValue (str): Input value.
+        OutputItem (str): Output item, such as all, name, classification
+            or summary.
+        OutputFormat (str): json or txt.
+
+    Returns:
+        object : A dictionary or list containing retrieved data or None.
+
+    Examples:
+
+        Results = await MWAsyncClient.RetrieveRESTDataAsync(Client, "compound", "regno", "34361", "all")
+        for ResultType in Results:
+            print("%s: %s" % (ResultType, Results[ResultType]))
+
+        Results = await MWAsyncClient.RetrieveRESTDataAsync(Client, "study", "study_id", "ST000001", "summary", "txt")
+        for ResultType, ResultValue in Results:
+            print("%s: %s" % (ResultType, ResultValue))
+
+    """
+
+    if not re.match("^(json|txt)$", OutputFormat, re.I):
+        print("***Error: RetrieveRESTDataAsync: Specified output format, %s, is not supported. Supported values: json or txt" % OutputFormat)
+        return None
+
+    MWDataURL = "%s/%s/%s/%s/%s" % (Client["MWBaseURL"], Context, InputItem, quote(str(InputValue), safe = ""), OutputItem)
+    if re.match("^txt$", OutputFormat, re.I):
+        MWDataURL += "/txt"
+
+    Response = await RetrieveURLAsync(Client, MWDataURL)
+    if Response is None or Response.status_code != 200:
+        print("***Error: Request failed: %s: status_code: %s" % (MWDataURL, Response.status_code if Response is not None else "NA"))
+        return None
+
+    if re.match("^txt$", OutputFormat, re.I):
+        return _ParseResultTypesAndValues(Response.text)
+
+    try:
+        return Response.json()
+    except ValueError:
+        # MW REST API returns an empty body for no matches...
+        return []
+
+async def RetrieveRESTDataForInputValuesAsync(Client, Context, InputItem, InputValues, OutputItem = "all", OutputFormat = "json"):
+    """Retrieve data concurrently for MW REST API requests corresponding to
+    multiple input values. The number of requests in flight is limited by
+    the client.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+        Context (str): Context, such as compound, gene, protein, refmet or
+            study.
+        InputItem (str): Input item, such as regno, gene_id, uniprot_id,
+            name or study_id.
+        InputValues (list): Input values.
+        OutputItem (str): Output item, such as all, name, classification
+            or summary.
+        OutputFormat (str): json or txt.
+
+    Returns:
+        dict : A dictionary containing retrieved data or None for each
+            input value.
+
+    Examples:
+
+        Results = await MWAsyncClient.RetrieveRESTDataForInputValuesAsync(Client, "refmet", "name", Names)
+
+    """
+
+    InputValues = list(InputValues)
+    Results = await asyncio.gather(*[RetrieveRESTDataAsync(Client, Context, InputItem, InputValue, OutputItem, OutputFormat) for InputValue in InputValues])
+
+    return dict(zip(InputValues, Results))
+
+async def RetrieveExactMassDataAsync(Client, LipidAbbreviation, IonType):
+    """Retrieve exact mass data for a lipid species and ion type.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+        LipidAbbreviation (str): Lipid abbreviation, such as PC(34:1).
+        IonType (str): Ion type, such as M+H.
+
+    Returns:
+        dict : A dictionary containing LipidAbbreviation, IonType, ExactMass
+            and MolecularFormula or None.
+
+    """
+
+    MWDataURL = "%s/exactmass/%s/%s" % (Client["MWBaseURL"], quote(LipidAbbreviation, safe = "()"), quote(IonType, safe = "+-"))
+
+    Response = await RetrieveURLAsync(Client, MWDataURL)
+    if Response is None or Response.status_code != 200:
+        print("***Error: Request failed: %s: status_code: %s" % (MWDataURL, Response.status_code if Response is not None else "NA"))
+        return None
+
+    Results = re.sub("</br>", "", Response.text, flags = re.I)
+    ResultLines = [Result for Result in Results.split("\n") if len(Result)]
+    if len(ResultLines) < 4:
+        print("***Error: RetrieveExactMassDataAsync: Failed to parse exact mass data: %s" % Results)
+        return None
+
+    return {"LipidAbbreviation": ResultLines[0], "IonType": ResultLines[1], "ExactMass": ResultLines[2], "MolecularFormula": ResultLines[3]}
+
+async def RetrieveMOverZDataAsync(Client, Database, MZValue, IonType, Tolerance):
+    """Retrieve matches for a m/z search against a database.
+
+    Arguments:
+        Client (dict): Client information from SetupAsyncClient.
+        Database (str): Database, such as MB, LIPIDS or REFMET.
+        MZValue (float): m/z value.
+        IonType (str): Ion type, such as M+H.
+        Tolerance (float): Mass tolerance.
+
+    Returns:
+        panda : A data frame containing matches or None.
+
+    """
+
+    MWDataURL = "%s/moverz/%s/%s/%s/%s/txt" % (Client["MWBaseURL"], Database, MZValue, quote(IonType, safe = "+-"), Tolerance)
+
+    Response = await RetrieveURLAsync(Client, MWDataURL)
+    if Response is None or Response.status_code != 200:
+        print("***Error: Request failed: %s: status_code: %s" % (MWDataURL, Response.status_code if Response is not None else "NA"))
+        return None
+
+    ResultLines = [Result for Result in Response.text.split("\n") if len(Result) and not re.search("pre>", Result, re.I)]
+    if len(ResultLines) == 0:
+        return pd.DataFrame()
+
+    return pd.read_csv(StringIO("\n".join(ResultLines)), sep = "\t", index_col = False)
+
+async def RetrieveStudiesAnalysisAndResultsDataAsync(StudyIDs, Client = None, MWBaseURL = "https://www.metabolomicsworkbench.org/rest", MissingValuesMethod = None, DType = None):
+    """Retrieve analysis and results data for a study ID or list of space
+    delimited study IDs asynchronously. The analysis data for all studies
+    is retrieved concurrently followed by concurrent retrieval of
+    datatables. The datatables are parsed in a pool of threads as soon as
+    they are retrieved to keep the event loop responsive.
+
+    The retrieved data is identical to the data retrieved by
+    MWUtil.RetrieveStudiesAnalysisAndResultsData. The supported methods for
+    processing missing values are listed in its documentation.
+
+    Arguments:
+        StudyIDs (str): Study ID or IDs.
+        Client (dict): Client information from SetupAsyncClient. Default:
+            A temporary client for MWBaseURL.
+        MWBaseURL (str): REST URL base for MW.
+        MissingValuesMethod (str): Method for processing missing values.
+        DType (str): Numeric type, such as float32, for metabolite values.
+
+    Returns:
+        dict : A dictionary containing retrieved data for analysis and
+            results in specified study ID(s).
+
+    Examples:
+
+        StudiesResultsData = await MWAsyncClient.RetrieveStudiesAnalysisAndResultsDataAsync(StudyIDs, Client)
+
+        # Retrieve data in the background without blocking the notebook...
+        Task = MWAsyncClient.StartBackgroundTask(MWAsyncClient.RetrieveStudiesAnalysisAndResultsDataAsync(StudyIDs), CallbackFuncRef = SetupUIF)
+
+    """
+
+    TemporaryClient = Client is None
+    if TemporaryClient:
+        Client = SetupAsyncClient(MWBaseURL)
+        if Client is None:
+            return None
+
+    StudiesResultsData = {}
+    StudyIDs = re.sub("[ ]+", " ", StudyIDs.strip())
+
+    try:
+        MWDataURLs = [Client["MWBaseURL"] + "/study/study_id/" + StudyID + "/analysis/" for StudyID in StudyIDs.split(" ")]
+
+        MWUtil._PrintMessage("Initiating %d requests for analysis data..." % len(MWDataURLs))
+        for MWDataURL, Response in zip(MWDataURLs, await RetrieveURLsAsync(Client, MWDataURLs)):
+            if Response is None or Response.status_code != 200:
+                print("Request failed: status_code: %s" % (Response.status_code if Response is not None else "NA"))
+                continue
+
+            _ProcessAnalysisDataResponse(StudiesResultsData, MWDataURL, Response)
+
+        StudyAndAnalysisIDs = [(StudyID, AnalysisID) for StudyID in StudiesResultsData for AnalysisID in StudiesResultsData[StudyID]]
+
+        MWUtil._PrintMessage("Initiating %d requests for datatables..." % len(StudyAndAnalysisIDs))
+        await asyncio.gather(*[_RetrieveAndSetupDataTableAsync(Client, StudiesResultsData, StudyID, AnalysisID, MissingValuesMethod, DType) for StudyID, AnalysisID in StudyAndAnalysisIDs])
+    finally:
+        if TemporaryClient:
+            await CloseAsyncClient(Client)
+
+    if Client["Cache"] is not None:
+        Stats = Client["Cache"]["Stats"]
+        MWUtil._PrintMessage("\nREST cache usage: Hits: %d; Misses: %d; Revalidated: %d" % (Stats["Hits"], Stats["Misses"], Stats["Revalidated"]))
+
+    return StudiesResultsData
+
+def RunAsync(Coroutine):
+    """Run a coroutine to completion and return its result. It must be
+    called outside of a running event loop, such as in scripts and batch
+    workers. Use await or StartBackgroundTask in Jupyter notebooks instead.
+
+    Arguments:
+        Coroutine (coroutine): Coroutine to run.
+
+    Returns:
+        object : Result of the coroutine.
+
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(Coroutine)
+
+    Coroutine.close()
+    print("***Error: RunAsync: Can't be called from a running event loop. Use await or StartBackgroundTask...")
+
+    return None
+
+def StartBackgroundTask(Coroutine, CallbackFuncRef = None):
+    """Start running a coroutine in the background and return immediately.
+    The coroutine is scheduled on the running event loop, such as the event
+    loop of a Jupyter kernel during widget callbacks, or an event loop
+    running in a background thread. The callback function, if specified, is
+    called with the result of the coroutine after its completion.
+
+    Arguments:
+        Coroutine (coroutine): Coroutine to run.
+        CallbackFuncRef (function): Reference to a function to call with
+            the result of the coroutine.
+
+    Returns:
+        object : An asyncio task or a concurrent future, which supports
+            done and result methods.
+
+    Examples:
+
+        def RetrieveDataCallback(StudiesResultsData):
+            ...
+
+        Task = MWAsyncClient.StartBackgroundTask(MWAsyncClient.RetrieveStudiesAnalysisAndResultsDataAsync(StudyIDs), RetrieveDataCallback)
+
+    """
+
+    try:
+        Task = asyncio.get_running_loop().create_task(Coroutine)
+    except RuntimeError:
+        Task = asyncio.run_coroutine_threadsafe(Coroutine, _GetBackgroundLoop())
+
+    def _TaskDoneCallback(CompletedTask):
+        if CompletedTask.cancelled():
+            print("***Warning: StartBackgroundTask: Task cancelled...")
+            return
+        if CompletedTask.exception() is not None:
+            print("***Error: StartBackgroundTask: Task failed: %s" % CompletedTask.exception())
+            return
+        if CallbackFuncRef is not None:
+            CallbackFuncRef(CompletedTask.result())
+
+    Task.add_done_callback(_TaskDoneCallback)
+
+    return Task
+
+def _GetBackgroundLoop():
+    """Get an event loop running in a background thread."""
+
+    global _BackgroundLoop
+
+    with _BackgroundLoopLock:
+        if _BackgroundLoop is None:
+            _BackgroundLoop = asyncio.new_event_loop()
+            Thread = threading.Thread(target = _BackgroundLoop.run_forever, name = "MWAsyncClient")
+            Thread.daemon = True
+            Thread.start()
+
+    return _BackgroundLoop
+
+def _SetupClientObjects(Client):
+    """Setup session, thread pools and semaphores for a client in the
+    running event loop."""
+
+    if Client["Session"] is not None:
+        return
+
+    Client["Semaphore"] = asyncio.Semaphore(Client["MaxConcurrency"])
+    Client["HostSemaphores"] = {}
+    Client["Executor"] = concurrent.futures.ThreadPoolExecutor(max_workers = Client["MaxConcurrency"], thread_name_prefix = "MWAsyncClient")
+    if Client["Cache"] is not None:
+        Client["CacheExecutor"] = concurrent.futures.ThreadPoolExecutor(max_workers = Client["MaxConcurrency"], thread_name_prefix = "MWAsyncClientCache")
+
+    if Client["Backend"] == "aiohttp":
+        Connector = aiohttp.TCPConnector(limit = Client["MaxConcurrency"], limit_per_host = Client["MaxConnectionsPerHost"])
+        Client["Session"] = aiohttp.ClientSession(connector = Connector, timeout = aiohttp.ClientTimeout(total = Client["Timeout"]))
+    else:
+        Client["Session"] = MWUtil._SetupRequestsSession(Client["MaxConnectionsPerHost"])
+
+def _GetHostSemaphore(Client, URL):
+    """Get semaphore for the host in a URL."""
+
+    Host = urlparse(URL).netloc
+    if Host not in Client["HostSemaphores"]:
+        Client["HostSemaphores"][Host] = asyncio.Semaphore(Client["MaxConnectionsPerHost"])
+
+    return Client["HostSemaphores"][Host]
+
+async def _RetrieveURLAsync(Client, URL, Headers = None):
+    """Retrieve a URL and retry requests failing with status codes 429 or
+    5xx or connection errors using an exponential backoff. The last response
+    is returned after all retries have failed and None is returned for a
+    connection error."""
+
+    HostSemaphore = _GetHostSemaphore(Client, URL)
+
+    Response = None
+    for RetryNum in range(Client["MaxRetries"] + 1):
+        Response = None
+        try:
+            async with Client["Semaphore"]:
+                async with HostSemaphore:
+                    if Client["Backend"] == "aiohttp":
+                        Response = await _RetrieveURLUsingAiohttp(Client, URL, Headers)
+                    else:
+                        Response = await asyncio.get_running_loop().run_in_executor(Client["Executor"], _RetrieveURLUsingRequests, Client, URL, Headers)
+        except _GetConnectionErrors() as ErrMsg:
+            if RetryNum == Client["MaxRetries"]:
+                print("***Error: Request failed: %s: %s" % (URL, ErrMsg))
+                return None
+
+        Client["Stats"]["Requests"] += 1
+        if Response is not None:
+            Client["Stats"]["Bytes"] += len(Response.content)
+            if not MWUtil._IsRetryableStatusCode(Response.status_code):
+                return Response
+
+        if RetryNum == Client["MaxRetries"]:
+            break
+
+        Delay = Client["RetryBackoffFactor"] * (2 ** RetryNum)
+        if Response is not None:
+            RetryAfter = Response.headers.get("Retry-After")
+            if RetryAfter is not None and RetryAfter.isdigit():
+                Delay = max(Delay, float(RetryAfter))
+
+        Client["Stats"]["Retries"] += 1
+        await asyncio.sleep(Delay)
+
+    return Response
+
+def _GetConnectionErrors():
+    """Get exception types corresponding to connection errors."""
+
+    ConnectionErrors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, asyncio.TimeoutError)
+    if aiohttp is not None:
+        ConnectionErrors += (aiohttp.ClientError,)
+
+    return ConnectionErrors
+
+async def _RetrieveURLUsingAiohttp(Client, URL, Headers):
+    """Retrieve a URL using aiohttp session and read response body in
+    chunks."""
+
+    async with Client["Session"].get(URL, headers = Headers) as AiohttpResponse:
+        Content = bytearray()
+        async for Chunk in AiohttpResponse.content.iter_chunked(Client["ChunkSize"]):
+            Content.extend(Chunk)
+
+        return _SetupResponse(URL, AiohttpResponse.status, AiohttpResponse.headers, bytes(Content))
+
+def _RetrieveURLUsingRequests(Client, URL, Headers):
+    """Retrieve a URL using requests session and read response body in
+    chunks."""
+
+    with Client["Session"].get(URL, headers = Headers, timeout = Client["Timeout"], stream = True) as StreamedResponse:
+        Content = b"".join(StreamedResponse.iter_content(Client["ChunkSize"]))
+
+        return _SetupResponse(URL, StreamedResponse.status_code, StreamedResponse.headers, Content)
+
+def _SetupResponse(URL, StatusCode, Headers, Content):
+    """Setup a requests response from status code, headers and content."""
+
+    Response = requests.models.Response()
+    Response.status_code = StatusCode
+    Response.url = URL
+    Response._content = Content
+    Response.headers = requests.structures.CaseInsensitiveDict(Headers)
+    Response.encoding = requests.utils.get_encoding_from_headers(Response.headers)
+
+    return Response
+
+def _ProcessAnalysisDataResponse(StudiesResultsData, MWDataURL, Response):
+    """Process analysis data response for a study or set of studies."""
+
+    try:
+        AnalysisData = Response.json()
+    except ValueError:
+        print("***Warning: No analysis data available: %s" % MWDataURL)
+        return
+
+    MWUtil._PrintMessage("Processing analysis data...")
+    MWUtil._ProcessAnalysisData(StudiesResultsData, AnalysisData)
+
+async def _RetrieveAndSetupDataTableAsync(Client, StudiesResultsData, StudyID, AnalysisID, MissingValuesMethod, DType):
+    """Retrieve datatable for an analysis ID and setup its data frame in a
+    thread."""
+
+    MWDataURL = Client["MWBaseURL"] + "/study/analysis_id/" + AnalysisID + "/datatable"
+
+    Response = await RetrieveURLAsync(Client, MWDataURL)
+    if Response is None or Response.status_code != 200:
+        print("***Error: Request failed: status_code: %s" % (Response.status_code if Response is not None else "NA"))
+        return
+
+    MWUtil._PrintMessage("\nRetrieved datatable for analysis ID, %s, in study ID, %s..." % (AnalysisID, StudyID))
+    await asyncio.get_running_loop().run_in_executor(None, _SetupStudiesResultsDataForDataTable, StudiesResultsData, StudyID, AnalysisID, Response, MissingValuesMethod, DType)
+
+def _SetupStudiesResultsDataForDataTable(StudiesResultsData, StudyID, AnalysisID, Response, MissingValuesMethod, DType):
+    """Setup data frame for a datatable in a thread."""
+
+    try:
+        MWUtil._SetupStudiesResultsDataForDataTable(StudiesResultsData, StudyID, AnalysisID, Response, MissingValuesMethod, DType)
+    finally:
+        MWTrace.SetTraceContext(None)
+
+def _ParseResultTypesAndValues(Results):
+    """Parse tab delimited lines containing result types and values."""
+
+    ResultTypesAndValues = []
+    for Result in Results.split("\n"):
+        Words = Result.rstrip("\r").split("\t")
+        if len(Words) != 2:
+            continue
+
+        ResultTypesAndValues.append((Words[0], Words[1]))
+
+    return ResultTypesAndValues
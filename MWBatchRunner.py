@@ -0,0 +1,560 @@
+#!/usr/bin/env python
+#
+# Run MW analyses for studies or data files without any widgets and write
+# results to a structured output directory.
+#
+# Usage:
+#
+#     python MWBatchRunner.py --studies "ST000001 ST000002" --analyses Volcano,PCA,RandomForest --outdir MWBatchResults --workers 4
+#     python MWBatchRunner.py --files MWSampleData1.csv MWSampleData2.txt --analyses All --outdir MWBatchResults
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import json
+import shutil
+import hashlib
+import argparse
+import contextlib
+import traceback
+import concurrent.futures
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+import MWUtil
+import MWCache
+import MWVolcanoPlotUtil
+import MWRandomForestUtil
+import MWHeatmapUtil
+import MWMultivariateUtil
+import MWRLAUtil
+import MWModelValidationUtil
+
+__all__ = ["ListBatchAnalyses", "RunAnalysis", "RunBatchAnalyses"]
+
+# Name of the file containing information about results of an analysis...
+_ResultsInfoFileName = "ResultsInfo.json"
+
+
+def RunBatchAnalyses(StudyIDs = None, DataFiles = None, Analyses = None, OutputDir = "MWBatchResults", AnalysesParams = None, MWBaseURL = "https://www.metabolomicsworkbench.org/rest", MissingValuesMethod = None, CacheDir = None, NumOfWorkers = 1, Resume = True):
+    """Run analyses for studies retrieved using MW REST API or for local data
+    files across a pool of processes and write results to an output
+    directory.
+
+    The results for each combination of study, analysis ID and analysis
+    method are written to OutputDir/StudyID/AnalysisID/Method as CSV files
+    along with a ResultsInfo.json file, which contains the parameters used for
+    the analysis and names of the results files. The results are written to a
+    temporary directory and moved in place once all files are written.
+    Consequently, an interrupted run doesn't leave partial results. A log
+    file, Log.txt, is written to OutputDir/StudyID for each study. The
+    results for a data file are written to OutputDir/FileName_PathHash, where
+    PathHash corresponds to a hash of the absolute path of the data file. It
+    keeps results separate for data files with the same name in different
+    directories.
+
+    The results already present in the output directory for the same
+    parameters are skipped during a resumed run. A study is only retrieved
+    again when any of its results are missing. A REST cache directory may be
+    specified to reuse responses retrieved during earlier runs.
+
+    The available analyses and their default parameters are listed by
+    ListBatchAnalyses. The default parameters may be overridden by
+    AnalysesParams.
+
+    Arguments:
+        StudyIDs (list): A list of study IDs.
+        DataFiles (list): A list of data files.
+        Analyses (list): A list of analysis methods. Default: All analyses.
+        OutputDir (str): Output directory.
+        AnalysesParams (dict): A dictionary containing parameter values for
+            analysis methods. For example: {"PCA": {"NumComponents": 3}}
+        MWBaseURL (str): REST URL base for MW.
+        MissingValuesMethod (str): Method for processing missing values.
+        CacheDir (str): Directory for REST cache or None.
+        NumOfWorkers (int): Number of processes for running analyses for
+            studies and data files.
+        Resume (bool): Skip results already present in the output directory.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            result: StudyID, AnalysisID, Method, Status, Time and ResultsDir.
+
+    Examples:
+
+        SummaryDataFrame = MWBatchRunner.RunBatchAnalyses(StudyIDs = ["ST000001", "ST000002"],
+                               Analyses = ["Volcano", "PCA"], OutputDir = "MWBatchResults",
+                               CacheDir = "MWRESTCache", NumOfWorkers = 4)
+
+    """
+
+    Analyses = _SetupAnalyses(Analyses)
+    if Analyses is None:
+        return None
+
+    AnalysesParams = _SetupAnalysesParams(Analyses, AnalysesParams)
+    if AnalysesParams is None:
+        return None
+
+    if not os.path.isdir(OutputDir):
+        os.makedirs(OutputDir)
+
+    # Setup a task for each study and data file...
+    Tasks = []
+    for StudyID in (StudyIDs if StudyIDs is not None else []):
+        Tasks.append({"StudyID": StudyID, "DataFile": None})
+    for DataFile in (DataFiles if DataFiles is not None else []):
+        Tasks.append({"StudyID": os.path.basename(DataFile), "DataFile": DataFile})
+
+    for Task in Tasks:
+        Task.update({"Analyses": Analyses, "AnalysesParams": AnalysesParams, "OutputDir": OutputDir, "MWBaseURL": MWBaseURL,
+                     "MissingValuesMethod": MissingValuesMethod, "CacheDir": CacheDir, "Resume": Resume})
+
+    print("Running %d analysis method(s) for %d study(s) and data file(s) using %d worker(s)..." % (len(Analyses), len(Tasks), NumOfWorkers))
+    print("Analysis methods: %s" % ", ".join(Analyses))
+    print("Output dir: %s" % OutputDir)
+
+    StartTime = time.time()
+    SummaryRows = []
+    if NumOfWorkers > 1 and len(Tasks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = NumOfWorkers) as Executor:
+            Futures = {}
+            for Task in Tasks:
+                Futures[Executor.submit(_RunStudyTask, Task)] = Task
+
+            for TaskNum, Future in enumerate(concurrent.futures.as_completed(Futures)):
+                TaskSummaryRows = Future.result()
+                _ListTaskSummary(Futures[Future], TaskSummaryRows, TaskNum + 1, len(Tasks))
+                SummaryRows.extend(TaskSummaryRows)
+    else:
+        for TaskNum, Task in enumerate(Tasks):
+            TaskSummaryRows = _RunStudyTask(Task)
+            _ListTaskSummary(Task, TaskSummaryRows, TaskNum + 1, len(Tasks))
+            SummaryRows.extend(TaskSummaryRows)
+
+    SummaryDataFrame = pd.DataFrame(SummaryRows, columns = ["StudyID", "AnalysisID", "Method", "Status", "Time", "ResultsDir"])
+    SummaryDataFrame.to_csv(os.path.join(OutputDir, "BatchSummary.csv"), index = False)
+
+    StatusCounts = SummaryDataFrame["Status"].value_counts()
+    print("\nResults: %s" % "; ".join(["%s: %d" % (Status, StatusCounts.get(Status, 0)) for Status in ["Completed", "Resumed", "Skipped", "Failed"]]))
+    print("Total time: %.2f sec" % (time.time() - StartTime))
+
+    return SummaryDataFrame
+
+def RunAnalysis(DataFrame, Method, Params = None, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Run an analysis method for data in a dataframe. The available methods
+    and their default parameters are listed by ListBatchAnalyses.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe containing class and features data.
+        Method (str): Analysis method.
+        Params (dict): Parameter values to override default values.
+        ClassColID (str): Class column ID.
+        ClassNumColID (str): Class number column ID.
+
+    Returns:
+        dict : A dictionary containing names and data frames for results.
+
+    Examples:
+
+        Results = MWBatchRunner.RunAnalysis(DataFrame, "PLSDA", {"NumComponents": 2, "NumOfPermutations": 100})
+        for Name, ResultsDataFrame in Results.items():
+            print(Name, ResultsDataFrame.shape)
+
+    """
+
+    Analyses = _SetupAnalyses([Method])
+    if Analyses is None:
+        return None
+
+    Method = Analyses[0]
+    AnalysesParams = _SetupAnalysesParams(Analyses, {Method: Params} if Params is not None else None)
+    if AnalysesParams is None:
+        return None
+
+    AnalysisFuncRef, DefaultParams, MinClassCount = _BatchAnalyses[Method]
+
+    return AnalysisFuncRef(DataFrame, AnalysesParams[Method], ClassColID, ClassNumColID)
+
+def ListBatchAnalyses():
+    """List available analysis methods along with their default parameters."""
+
+    for Method in sorted(_BatchAnalyses):
+        AnalysisFuncRef, DefaultParams, MinClassCount = _BatchAnalyses[Method]
+        print("%s: %s" % (Method, ", ".join(["%s = %s" % (Name, DefaultParams[Name]) for Name in sorted(DefaultParams)]) if len(DefaultParams) else "No parameters"))
+
+def _RunStudyTask(Task):
+    """Retrieve data for a study or a data file and run analyses for all
+    analysis IDs. The output is written to a log file in the study output
+    directory."""
+
+    StudyDir = _GetStudyDir(Task, Task["StudyID"])
+    if not os.path.isdir(StudyDir):
+        os.makedirs(StudyDir)
+
+    # Skip retrieval of data for a study whose results are all present...
+    if Task["Resume"]:
+        SummaryRows = _GetResumedStudySummary(Task, StudyDir)
+        if SummaryRows is not None:
+            return SummaryRows
+
+    SummaryRows = []
+    with open(os.path.join(StudyDir, "Log.txt"), "a") as LogFile, contextlib.redirect_stdout(LogFile):
+        print("\n%s" % time.asctime())
+
+        try:
+            StudiesResultsData = _RetrieveStudyData(Task)
+        except Exception as ErrMsg:
+            print("***Error: Failed to retrieve data: %s" % ErrMsg)
+            return [[Task["StudyID"], "NA", Method, "Failed", 0.0, None] for Method in Task["Analyses"]]
+
+        if len(StudiesResultsData) == 0:
+            print("***Error: No data available...")
+            return [[Task["StudyID"], "NA", Method, "Failed", 0.0, None] for Method in Task["Analyses"]]
+
+        for StudyID in StudiesResultsData:
+            StudyDir = _GetStudyDir(Task, StudyID)
+            AnalysisIDs = [AnalysisID for AnalysisID in StudiesResultsData[StudyID] if "data_frame" in StudiesResultsData[StudyID][AnalysisID]]
+            _WriteJSONFile(os.path.join(StudyDir, "StudyInfo.json"), {"StudyID": StudyID, "AnalysisIDs": AnalysisIDs})
+
+            for AnalysisID in AnalysisIDs:
+                AnalysisData = StudiesResultsData[StudyID][AnalysisID]
+                for Method in Task["Analyses"]:
+                    SummaryRows.append(_RunStudyAnalysis(Task, StudyID, AnalysisID, AnalysisData, Method))
+
+    return SummaryRows
+
+def _RetrieveStudyData(Task):
+    """Retrieve data for a study or a data file."""
+
+    if Task["DataFile"] is not None:
+        return MWUtil.RetrieveDataFiles([Task["DataFile"]], MissingValuesMethod = Task["MissingValuesMethod"])
+
+    Cache = MWCache.SetupRESTCache(CacheDir = Task["CacheDir"]) if Task["CacheDir"] is not None else None
+
+    return MWUtil.RetrieveStudiesAnalysisAndResultsData(Task["StudyID"], Task["MWBaseURL"], MissingValuesMethod = Task["MissingValuesMethod"], Cache = Cache)
+
+def _RunStudyAnalysis(Task, StudyID, AnalysisID, AnalysisData, Method):
+    """Run an analysis method for an analysis ID and write its results."""
+
+    ResultsDir = os.path.join(_GetStudyDir(Task, StudyID), _GetPathName(AnalysisID), Method)
+    Params = Task["AnalysesParams"][Method]
+    ParamsKey = _GetParamsKey(Method, Params, Task["MissingValuesMethod"])
+
+    if Task["Resume"] and _IsResultsAvailable(ResultsDir, ParamsKey):
+        print("Skipping method %s for study ID, %s, analysis ID, %s: Results already available..." % (Method, StudyID, AnalysisID))
+        return [StudyID, AnalysisID, Method, "Resumed", 0.0, ResultsDir]
+
+    AnalysisFuncRef, DefaultParams, MinClassCount = _BatchAnalyses[Method]
+    DataFrame = AnalysisData["data_frame"]
+
+    ClassCount = DataFrame["ClassNum"].nunique()
+    if ClassCount < MinClassCount:
+        print("***Warning: Skipping method %s for study ID, %s, analysis ID, %s: Contains less than %d classes..." % (Method, StudyID, AnalysisID, MinClassCount))
+        return [StudyID, AnalysisID, Method, "Skipped", 0.0, None]
+
+    print("\nRunning method %s for study ID, %s, analysis ID, %s..." % (Method, StudyID, AnalysisID))
+    StartTime = time.time()
+    try:
+        Results = AnalysisFuncRef(DataFrame, Params, "Class", "ClassNum")
+    except Exception as ErrMsg:
+        print("***Error: Method %s failed for study ID, %s, analysis ID, %s: %s" % (Method, StudyID, AnalysisID, ErrMsg))
+        traceback.print_exc(file = sys.stdout)
+        return [StudyID, AnalysisID, Method, "Failed", time.time() - StartTime, None]
+
+    ElapsedTime = time.time() - StartTime
+    ResultsInfo = {"StudyID": StudyID, "AnalysisID": AnalysisID, "Method": Method, "Params": Params,
+                   "MissingValuesMethod": Task["MissingValuesMethod"], "ParamsKey": ParamsKey,
+                   "Rows": int(DataFrame.shape[0]), "Columns": int(DataFrame.shape[1]),
+                   "Time": ElapsedTime, "Timestamp": time.asctime()}
+    _WriteAnalysisResults(ResultsDir, Results, ResultsInfo)
+
+    print("Completed method %s in %.2f sec..." % (Method, ElapsedTime))
+
+    return [StudyID, AnalysisID, Method, "Completed", ElapsedTime, ResultsDir]
+
+def _GetResumedStudySummary(Task, StudyDir):
+    """Get summary for a study whose results are all available in the output
+    directory or None."""
+
+    StudyInfo = _ReadJSONFile(os.path.join(StudyDir, "StudyInfo.json"))
+    if StudyInfo is None or StudyInfo["StudyID"] != Task["StudyID"]:
+        return None
+
+    SummaryRows = []
+    for AnalysisID in StudyInfo["AnalysisIDs"]:
+        for Method in Task["Analyses"]:
+            ResultsDir = os.path.join(StudyDir, _GetPathName(AnalysisID), Method)
+            ParamsKey = _GetParamsKey(Method, Task["AnalysesParams"][Method], Task["MissingValuesMethod"])
+            if not _IsResultsAvailable(ResultsDir, ParamsKey):
+                return None
+            SummaryRows.append([StudyInfo["StudyID"], AnalysisID, Method, "Resumed", 0.0, ResultsDir])
+
+    return SummaryRows
+
+def _IsResultsAvailable(ResultsDir, ParamsKey):
+    """Check availability of results for parameters."""
+
+    ResultsInfo = _ReadJSONFile(os.path.join(ResultsDir, _ResultsInfoFileName))
+
+    return ResultsInfo is not None and ResultsInfo.get("ParamsKey") == ParamsKey
+
+def _WriteAnalysisResults(ResultsDir, Results, ResultsInfo):
+    """Write results to a temporary directory and move it in place."""
+
+    ParentDir = os.path.dirname(ResultsDir)
+    if not os.path.isdir(ParentDir):
+        os.makedirs(ParentDir)
+
+    TempResultsDir = "%s.tmp%d" % (ResultsDir, os.getpid())
+    if os.path.isdir(TempResultsDir):
+        shutil.rmtree(TempResultsDir)
+    os.makedirs(TempResultsDir)
+
+    ResultsInfo["Files"] = []
+    for Name, ResultsDataFrame in Results.items():
+        FileName = "%s.csv" % Name
+        ResultsDataFrame.to_csv(os.path.join(TempResultsDir, FileName), index = not isinstance(ResultsDataFrame.index, pd.RangeIndex))
+        ResultsInfo["Files"].append(FileName)
+
+    _WriteJSONFile(os.path.join(TempResultsDir, _ResultsInfoFileName), ResultsInfo)
+
+    if os.path.isdir(ResultsDir):
+        shutil.rmtree(ResultsDir)
+    os.rename(TempResultsDir, ResultsDir)
+
+def _ListTaskSummary(Task, TaskSummaryRows, TaskNum, NumOfTasks):
+    """List summary of results for a task."""
+
+    Statuses = [Row[3] for Row in TaskSummaryRows]
+    print("Processed %s (%d of %d): %s" % (Task["StudyID"], TaskNum, NumOfTasks, "; ".join(["%s: %d" % (Status, Statuses.count(Status)) for Status in ["Completed", "Resumed", "Skipped", "Failed"] if Statuses.count(Status)])))
+
+def _SetupAnalyses(Analyses):
+    """Validate analysis methods and setup their names."""
+
+    if Analyses is None or (len(Analyses) == 1 and re.match("^All$", Analyses[0], re.I)):
+        return sorted(_BatchAnalyses)
+
+    MethodsMap = dict([(Method.lower(), Method) for Method in _BatchAnalyses])
+    ValidAnalyses = []
+    for Method in Analyses:
+        if Method.lower() not in MethodsMap:
+            print("***Error: Unknown analysis method: %s; Supported values: %s" % (Method, ", ".join(sorted(_BatchAnalyses))))
+            return None
+        if MethodsMap[Method.lower()] not in ValidAnalyses:
+            ValidAnalyses.append(MethodsMap[Method.lower()])
+
+    return ValidAnalyses
+
+def _SetupAnalysesParams(Analyses, AnalysesParams):
+    """Setup parameters for analysis methods using default values."""
+
+    SpecifiedParams = {}
+    if AnalysesParams is not None:
+        for Method, Params in AnalysesParams.items():
+            SpecifiedParams[Method.lower()] = Params
+
+    SetupParams = {}
+    for Method in Analyses:
+        AnalysisFuncRef, DefaultParams, MinClassCount = _BatchAnalyses[Method]
+        SetupParams[Method] = dict(DefaultParams)
+
+        for Name, Value in SpecifiedParams.get(Method.lower(), {}).items():
+            if Name not in DefaultParams:
+                print("***Error: Unknown parameter, %s, for analysis method %s; Supported values: %s" % (Name, Method, ", ".join(sorted(DefaultParams))))
+                return None
+            SetupParams[Method][Name] = Value
+
+    return SetupParams
+
+def _GetParamsKey(Method, Params, MissingValuesMethod):
+    """Get a key for parameters used to generate results."""
+
+    return hashlib.sha256(json.dumps([Method, Params, MissingValuesMethod], sort_keys = True).encode("utf-8")).hexdigest()
+
+def _GetStudyDir(Task, StudyID):
+    """Get output directory for a study or a data file. The directory name
+    for a data file includes a hash of its absolute path."""
+
+    if Task["DataFile"] is None:
+        return os.path.join(Task["OutputDir"], _GetPathName(StudyID))
+
+    PathHash = hashlib.sha256(os.path.abspath(Task["DataFile"]).encode("utf-8")).hexdigest()[:12]
+
+    return os.path.join(Task["OutputDir"], "%s_%s" % (_GetPathName(StudyID), PathHash))
+
+def _GetPathName(ID):
+    """Get a name for a directory path from an ID."""
+
+    return re.sub("[^A-Za-z0-9_.\\-]", "_", str(ID))
+
+def _ReadJSONFile(FilePath):
+    """Read a JSON file or return None."""
+
+    if not os.path.isfile(FilePath):
+        return None
+
+    try:
+        with open(FilePath, "r") as FileHandle:
+            return json.load(FileHandle)
+    except ValueError:
+        return None
+
+def _WriteJSONFile(FilePath, Data):
+    """Write a JSON file atomically."""
+
+    TempFilePath = "%s.tmp%d" % (FilePath, os.getpid())
+    with open(TempFilePath, "w") as FileHandle:
+        json.dump(Data, FileHandle, indent = 1, default = str)
+    os.replace(TempFilePath, FilePath)
+
+def _SetupExplainedVarianceDataFrame(ExplainedVariance, ColIDPrefix):
+    """Setup a data frame for explained variance ratios of components."""
+
+    return pd.DataFrame({"Component": ["%s%d" % (ColIDPrefix, Index + 1) for Index in range(len(ExplainedVariance))],
+                         "Explained Variance": ExplainedVariance})
+
+def _AddModelValidationResults(Results, DataFrame, Method, Params, ClassColID, ClassNumColID):
+    """Add cross-validation and permutation test results."""
+
+    if Params["NumOfFolds"]:
+        Results["CrossValidationData"] = MWModelValidationUtil.GenerateCrossValidationData(DataFrame, Method = Method, NumComponents = Params["NumComponents"], NumOfFolds = Params["NumOfFolds"], RandomSeed = Params["RandomSeed"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)
+
+    if Params.get("NumOfPermutations"):
+        PermutationsDataFrame, SummaryDataFrame = MWModelValidationUtil.GeneratePermutationTestData(DataFrame, Method = Method, NumComponents = Params["NumComponents"], NumOfPermutations = Params["NumOfPermutations"], NumOfFolds = Params["NumOfFolds"], RandomSeed = Params["RandomSeed"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)
+        Results["PermutationTestData"] = PermutationsDataFrame
+        Results["PermutationTestSummary"] = SummaryDataFrame
+
+    return Results
+
+def _RunVolcanoAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Generate volcano plot data for all pairs of classes."""
+
+    return {"VolcanoPlotData": MWVolcanoPlotUtil.GenerateVolcanoPlotDataForClassPairs(DataFrame, ClassNumColID = ClassNumColID, ContainsClassCol = ClassColID in DataFrame.columns)}
+
+def _RunRandomForestAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Generate stability of variable importance for all pairs of classes."""
+
+    VIPStabilityDataFrame = MWRandomForestUtil.GenerateVIPStabilityData({"NA": {"NA": {"data_frame": DataFrame}}}, NumOfSplits = Params["NumOfSplits"], StartRandomSeed = Params["StartRandomSeed"], ClassNumColID = ClassNumColID, ClassColID = ClassColID, NumOfEstimators = Params["NumOfEstimators"], TrainSize = Params["TrainSize"], NumOfJobs = Params["NumOfJobs"])
+
+    return {"VIPStabilityData": VIPStabilityDataFrame.drop(["StudyID", "AnalysisID"], axis = 1)}
+
+def _RunPCAAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Perform PCA and optional cross-validation."""
+
+    PCADataFrame, ExplainedVariance = MWMultivariateUtil.GeneratePCAData(DataFrame, NumComponents = Params["NumComponents"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)
+
+    Results = {"PCAData": PCADataFrame,
+               "ExplainedVariance": _SetupExplainedVarianceDataFrame(ExplainedVariance, "PC")}
+
+    return _AddModelValidationResults(Results, DataFrame, "PCA", Params, ClassColID, ClassNumColID)
+
+def _RunLDAAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Perform LDA and optional cross-validation and permutation tests."""
+
+    LDADataFrame, ExplainedVariance = MWMultivariateUtil.GenerateLDAData(DataFrame, NumComponents = Params["NumComponents"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)
+
+    Results = {"LDAData": LDADataFrame,
+               "ExplainedVariance": _SetupExplainedVarianceDataFrame(ExplainedVariance, "LD")}
+
+    return _AddModelValidationResults(Results, DataFrame, "LDA", Params, ClassColID, ClassNumColID)
+
+def _RunPLSDAAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Perform PLSDA and optional cross-validation and permutation tests."""
+
+    Results = {"PLSDAData": MWMultivariateUtil.GeneratePLSDAData(DataFrame, NumComponents = Params["NumComponents"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)}
+
+    return _AddModelValidationResults(Results, DataFrame, "PLSDA", Params, ClassColID, ClassNumColID)
+
+def _RunRLAAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Calculate relative log abundance and box plot statistics."""
+
+    RLAValuesDataFrame = MWRLAUtil.CalculateRLAValues(DataFrame, Mode = Params["Mode"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)
+    BoxPlotStatsDataFrame = MWRLAUtil.CalculateBoxPlotStats(RLAValuesDataFrame, IncludeFliers = False)
+
+    TrackColIDs = [ColID for ColID in [ClassColID, ClassNumColID] if ColID in DataFrame.columns]
+    RLADataFrame = pd.concat([DataFrame[TrackColIDs], RLAValuesDataFrame], axis = 1)
+
+    return {"RLAData": RLADataFrame, "BoxPlotStats": BoxPlotStatsDataFrame}
+
+def _RunHeatmapAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Normalize data and generate clustered heatmap data and linkages."""
+
+    DropColIDs = [ColID for ColID in [ClassColID, ClassNumColID] if ColID in DataFrame.columns]
+    NormalizedDataFrame = MWUtil.NormalizeData(DataFrame.drop(DropColIDs, axis = 1), Method = Params["Normalization"], ClassColID = None, ClassNumColID = None)
+
+    PlotDataFrame, RowLinkage, ColLinkage = MWHeatmapUtil.GenerateClusteredHeatmapData(NormalizedDataFrame, Method = Params["Method"], Metric = Params["Metric"], MaxFeatures = Params["MaxFeatures"], FeatureReductionMethod = Params["FeatureReductionMethod"])
+
+    LinkageColIDs = ["Cluster1", "Cluster2", "Distance", "Count"]
+    PlotDataFrame = PlotDataFrame.copy()
+    PlotDataFrame.insert(0, ClassNumColID, DataFrame[ClassNumColID])
+
+    return {"HeatmapData": PlotDataFrame,
+            "RowLinkage": pd.DataFrame(RowLinkage, columns = LinkageColIDs),
+            "ColLinkage": pd.DataFrame(ColLinkage, columns = LinkageColIDs)}
+
+def _RunNormalizationAnalysis(DataFrame, Params, ClassColID, ClassNumColID):
+    """Normalize data."""
+
+    return {"NormalizedData": MWUtil.NormalizeData(DataFrame, Method = Params["Method"], LogTransform = Params["LogTransform"], ClassColID = ClassColID, ClassNumColID = ClassNumColID)}
+
+# Analysis methods along with their functions, default parameters and
+# minimum number of classes...
+_BatchAnalyses = {
+    "Volcano": (_RunVolcanoAnalysis, {}, 2),
+    "RandomForest": (_RunRandomForestAnalysis, {"NumOfSplits": 10, "StartRandomSeed": 0, "NumOfEstimators": 250, "TrainSize": 0.75, "NumOfJobs": 1}, 2),
+    "PCA": (_RunPCAAnalysis, {"NumComponents": 2, "NumOfFolds": 5, "RandomSeed": 0}, 1),
+    "LDA": (_RunLDAAnalysis, {"NumComponents": 2, "NumOfFolds": 5, "NumOfPermutations": 0, "RandomSeed": 0}, 2),
+    "PLSDA": (_RunPLSDAAnalysis, {"NumComponents": 2, "NumOfFolds": 5, "NumOfPermutations": 0, "RandomSeed": 0}, 2),
+    "RLA": (_RunRLAAnalysis, {"Mode": "WithinClasses"}, 1),
+    "Heatmap": (_RunHeatmapAnalysis, {"Normalization": "ZScore", "Method": "average", "Metric": "correlation", "MaxFeatures": 1000, "FeatureReductionMethod": "Variance"}, 1),
+    "Normalization": (_RunNormalizationAnalysis, {"Method": "Auto", "LogTransform": None}, 1),
+}
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Run MW analyses for studies or data files and write results to an output directory.")
+    Parser.add_argument("--studies", nargs = "*", default = [], help = "Study IDs")
+    Parser.add_argument("--studies-file", default = None, help = "File containing a study ID on each line")
+    Parser.add_argument("--files", nargs = "*", default = [], help = "Data files")
+    Parser.add_argument("--analyses", default = "All", help = "Comma delimited analysis methods or All. Use --list to list available methods")
+    Parser.add_argument("--params", default = None, help = "JSON dictionary containing parameters for methods. For example: '{\"PCA\": {\"NumComponents\": 3}}'")
+    Parser.add_argument("--outdir", default = "MWBatchResults", help = "Output directory")
+    Parser.add_argument("--workers", type = int, default = 1, help = "Number of worker processes")
+    Parser.add_argument("--cache-dir", default = None, help = "REST cache directory")
+    Parser.add_argument("--missing-values", default = None, help = "Method for processing missing values")
+    Parser.add_argument("--base-url", default = "https://www.metabolomicsworkbench.org/rest", help = "REST URL base for MW")
+    Parser.add_argument("--no-resume", action = "store_true", help = "Run analyses again for results already present in output directory")
+    Parser.add_argument("--list", action = "store_true", help = "List available analysis methods and default parameters")
+    Options = Parser.parse_args()
+
+    if Options.list:
+        ListBatchAnalyses()
+        return 0
+
+    StudyIDs = []
+    for StudyIDsText in Options.studies:
+        StudyIDs.extend(StudyIDsText.split())
+    if Options.studies_file is not None:
+        with open(Options.studies_file, "r") as FileHandle:
+            StudyIDs.extend([Line.strip() for Line in FileHandle if len(Line.strip()) and not Line.startswith("#")])
+
+    if len(StudyIDs) == 0 and len(Options.files) == 0:
+        Parser.error("No study IDs or data files specified")
+
+    AnalysesParams = json.loads(Options.params) if Options.params is not None else None
+    SummaryDataFrame = RunBatchAnalyses(StudyIDs = StudyIDs, DataFiles = Options.files, Analyses = Options.analyses.split(","), OutputDir = Options.outdir, AnalysesParams = AnalysesParams, MWBaseURL = Options.base_url, MissingValuesMethod = Options.missing_values, CacheDir = Options.cache_dir, NumOfWorkers = Options.workers, Resume = not Options.no_resume)
+
+    if SummaryDataFrame is None:
+        return 1
+
+    return 1 if (SummaryDataFrame["Status"] == "Failed").any() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+from __future__ import print_function
+
+import os
+import time
+import json
+import gzip
+import hashlib
+import tempfile
+import threading
+
+import MWLazyImport
+
+requests = MWLazyImport.LazyImport("requests")
+
+__all__ = ["ClearRESTCache", "GetRESTCacheKey", "ListRESTCacheInfo", "RetrieveURLUsingRESTCache", "SetupRESTCache"]
+
+
+def SetupRESTCache(CacheDir = None, TimeToLive = 7 * 24 * 3600, MaxCacheSize = 1024 * 1024 * 1024, OfflineMode = False, CompressionLevel = 6):
+    """Setup a persistent on-disk cache for MW REST responses. The cache is
+    content addressed using a key corresponding to SHA-256 hash of the
+    request URL, which consists of MW base URL and REST path.
+
+    Each successful response is stored as a gzip compressed raw payload along
+    with a metadata file containing its URL, storage time and any ETag and
+    Last-Modified headers. A cached response is used without any network
+    traffic during its time to live. An expired response is revalidated
+    using a conditional request when the server provided ETag or Last-Modified
+    headers; otherwise, it is retrieved again. A time to live of 0 revalidates
+    every cached response before its use, which avoids any reuse of stale
+    study data at the cost of a request for each URL. The least recently
+    used responses are evicted once the total size of cached payloads
+    exceeds MaxCacheSize. The total size is tracked during storage of
+    responses and the cache directory is only scanned when it exceeds
+    MaxCacheSize. In offline mode, cached responses are used irrespective of
+    their age and no requests are made.
+
+    Arguments:
+        CacheDir (str): Cache directory. Default: MWUTIL_CACHE_DIR
+            environment variable or ~/.cache/MWUtil
+        TimeToLive (int): Time to live for cached responses in seconds
+            before their revalidation. Default: 7 days. Specify 0 to always
+            revalidate.
+        MaxCacheSize (int): Maximum size of cached payloads in bytes.
+        OfflineMode (bool): Use cached responses only.
+        CompressionLevel (int): Gzip compression level for payloads.
+
+    Returns:
+        dict : A dictionary containing cache information.
+
+    Examples:
+
+        MWRESTCache = MWCache.SetupRESTCache()
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL, Cache = MWRESTCache)
+
+    """
+
+    if CacheDir is None:
+        CacheDir = os.environ.get("MWUTIL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "MWUtil"))
+
+    if not os.path.isdir(CacheDir):
+        os.makedirs(CacheDir)
+
+    Cache = {}
+    Cache["CacheDir"] = CacheDir
+    Cache["TimeToLive"] = TimeToLive
+    Cache["MaxCacheSize"] = MaxCacheSize
+    Cache["OfflineMode"] = OfflineMode
+    Cache["CompressionLevel"] = CompressionLevel
+    Cache["Lock"] = threading.Lock()
+
+    # Total size of cached payloads, which is set during first storage...
+    Cache["CacheSize"] = None
+
+    Cache["Stats"] = {"Hits": 0, "Misses": 0, "Revalidated": 0, "Evicted": 0}
+
+    return Cache
+
+def GetRESTCacheKey(URL):
+    """Get cache key for a request URL.
+
+    Arguments:
+        URL (str): Request URL consisting of MW base URL and REST path.
+
+    Returns:
+        str : SHA-256 hex digest of the URL.
+
+    """
+
+    return hashlib.sha256(URL.encode("utf-8")).hexdigest()
+
+def RetrieveURLUsingRESTCache(Cache, URL, RetrieveURLFuncRef):
+    """Retrieve response for a URL from the cache or using a function to
+    make a request. The function is called with a dictionary containing any
+    conditional request headers and must return a requests response or None.
+
+    Arguments:
+        Cache (dict): Cache information from SetupRESTCache.
+        URL (str): Request URL.
+        RetrieveURLFuncRef (function): Reference to a function to
+            retrieve the URL.
+
+    Returns:
+        object : A requests response or None.
+
+    """
+
+    PayloadFile, MetadataFile = _GetCacheFiles(Cache, URL)
+    Metadata = _ReadMetadata(MetadataFile)
+
+    if Metadata is not None:
+        Age = time.time() - Metadata["StoredTime"]
+        if Cache["OfflineMode"] or Age <= Cache["TimeToLive"]:
+            Response = _SetupCachedResponse(PayloadFile, MetadataFile, Metadata)
+            if Response is not None:
+                _UpdateStats(Cache, "Hits")
+                return Response
+            Metadata = None
+
+    if Cache["OfflineMode"]:
+        _UpdateStats(Cache, "Misses")
+        print("***Error: No cached response available in offline mode: %s" % URL)
+        return None
+
+    # Setup conditional request headers for revalidation...
+    Headers = {}
+    if Metadata is not None:
+        if Metadata["ETag"] is not None:
+            Headers["If-None-Match"] = Metadata["ETag"]
+        if Metadata["LastModified"] is not None:
+            Headers["If-Modified-Since"] = Metadata["LastModified"]
+
+    Response = RetrieveURLFuncRef(Headers)
+    if Response is None:
+        return None
+
+    if Response.status_code == 304 and Metadata is not None:
+        Response.close()
+        Response = _SetupCachedResponse(PayloadFile, MetadataFile, Metadata)
+        if Response is not None:
+            Metadata["StoredTime"] = time.time()
+            _WriteFile(MetadataFile, json.dumps(Metadata).encode("utf-8"))
+            _UpdateStats(Cache, "Revalidated")
+            return Response
+
+        # Cached payload is no longer available...
+        Response = RetrieveURLFuncRef({})
+        if Response is None:
+            return None
+
+    _UpdateStats(Cache, "Misses")
+    if Response.status_code == 200:
+        _StoreResponse(Cache, URL, Response, PayloadFile, MetadataFile)
+
+    return Response
+
+def ClearRESTCache(Cache):
+    """Remove all cached responses.
+
+    Arguments:
+        Cache (dict): Cache information from SetupRESTCache.
+
+    """
+
+    with Cache["Lock"]:
+        for FilePath, _, _ in _ListCachedEntries(Cache):
+            _RemoveCacheEntry(FilePath)
+        Cache["CacheSize"] = 0
+
+def ListRESTCacheInfo(Cache):
+    """List information about cached responses and cache usage.
+
+    Arguments:
+        Cache (dict): Cache information from SetupRESTCache.
+
+    """
+
+    Entries = _ListCachedEntries(Cache)
+    CacheSize = sum([Size for _, Size, _ in Entries])
+    Stats = Cache["Stats"]
+
+    print("Cache dir: %s; Offline mode: %s" % (Cache["CacheDir"], Cache["OfflineMode"]))
+    print("Cached responses: %d; Cache size: %.2f MB; Max cache size: %.2f MB" % (len(Entries), CacheSize / (1024.0 * 1024.0), Cache["MaxCacheSize"] / (1024.0 * 1024.0)))
+    print("Hits: %d; Misses: %d; Revalidated: %d; Evicted: %d" % (Stats["Hits"], Stats["Misses"], Stats["Revalidated"], Stats["Evicted"]))
+
+def _GetCacheFiles(Cache, URL):
+    """Get payload and metadata files for a URL."""
+
+    Key = GetRESTCacheKey(URL)
+    KeyDir = os.path.join(Cache["CacheDir"], Key[:2])
+
+    return (os.path.join(KeyDir, Key + ".gz"), os.path.join(KeyDir, Key + ".json"))
+
+def _ReadMetadata(MetadataFile):
+    """Read metadata for a cached response."""
+
+    try:
+        with open(MetadataFile, "rb") as FileHandle:
+            return json.loads(FileHandle.read().decode("utf-8"))
+    except (IOError, OSError, ValueError):
+        return None
+
+def _SetupCachedResponse(PayloadFile, MetadataFile, Metadata):
+    """Setup a requests response from a cached payload and track its
+    access time for LRU eviction."""
+
+    try:
+        with gzip.open(PayloadFile, "rb") as FileHandle:
+            Content = FileHandle.read()
+        os.utime(MetadataFile, None)
+    except (IOError, OSError, EOFError):
+        return None
+
+    Response = requests.models.Response()
+    Response.status_code = 200
+    Response.url = Metadata["URL"]
+    Response._content = Content
+    Response.encoding = Metadata["Encoding"]
+    Response.headers["Content-Type"] = Metadata["ContentType"]
+
+    return Response
+
+def _StoreResponse(Cache, URL, Response, PayloadFile, MetadataFile):
+    """Store a response in the cache and evict least recently used responses."""
+
+    Content = Response.content
+
+    Metadata = {}
+    Metadata["URL"] = URL
+    Metadata["StoredTime"] = time.time()
+    Metadata["Size"] = len(Content)
+    Metadata["ETag"] = Response.headers.get("ETag")
+    Metadata["LastModified"] = Response.headers.get("Last-Modified")
+    Metadata["ContentType"] = Response.headers.get("Content-Type", "")
+    Metadata["Encoding"] = Response.encoding
+
+    KeyDir = os.path.dirname(PayloadFile)
+    if not os.path.isdir(KeyDir):
+        try:
+            os.makedirs(KeyDir)
+        except OSError:
+            # Created by another thread...
+            pass
+
+    # Track size of any payload being replaced...
+    try:
+        ReplacedSize = os.path.getsize(PayloadFile)
+    except OSError:
+        ReplacedSize = 0
+
+    Payload = gzip.compress(Content, Cache["CompressionLevel"])
+    _WriteFile(PayloadFile, Payload)
+    _WriteFile(MetadataFile, json.dumps(Metadata).encode("utf-8"))
+
+    _UpdateCacheSize(Cache, len(Payload) - ReplacedSize)
+
+def _WriteFile(FilePath, Data):
+    """Write data to a file atomically."""
+
+    FileDescriptor, TempFilePath = tempfile.mkstemp(dir = os.path.dirname(FilePath), suffix = ".tmp")
+    with os.fdopen(FileDescriptor, "wb") as FileHandle:
+        FileHandle.write(Data)
+    os.replace(TempFilePath, FilePath)
+
+def _ListCachedEntries(Cache):
+    """List metadata files for cached responses along with payload sizes and
+    access times."""
+
+    Entries = []
+    CacheDir = Cache["CacheDir"]
+    for KeyDir in os.listdir(CacheDir):
+        KeyDirPath = os.path.join(CacheDir, KeyDir)
+        if not os.path.isdir(KeyDirPath):
+            continue
+
+        for FileName in os.listdir(KeyDirPath):
+            if not FileName.endswith(".json"):
+                continue
+
+            MetadataFile = os.path.join(KeyDirPath, FileName)
+            PayloadFile = MetadataFile[:-len(".json")] + ".gz"
+            try:
+                Size = os.path.getsize(PayloadFile)
+                AccessTime = os.path.getmtime(MetadataFile)
+            except OSError:
+                continue
+
+            Entries.append((MetadataFile, Size, AccessTime))
+
+    return Entries
+
+def _UpdateCacheSize(Cache, SizeChange):
+    """Update total size of cached payloads and evict least recently used
+    responses once it exceeds the specified maximum size. The cache directory
+    is scanned to initialize the total size during first storage."""
+
+    with Cache["Lock"]:
+        if Cache["CacheSize"] is None:
+            Cache["CacheSize"] = sum([Size for _, Size, _ in _ListCachedEntries(Cache)])
+        else:
+            Cache["CacheSize"] += SizeChange
+
+        if Cache["CacheSize"] > Cache["MaxCacheSize"]:
+            _EvictLeastRecentlyUsed(Cache)
+
+def _EvictLeastRecentlyUsed(Cache):
+    """Evict least recently used responses until the cache size is within
+    the specified maximum size. The cache lock must be held by the caller."""
+
+    Entries = _ListCachedEntries(Cache)
+    CacheSize = sum([Size for _, Size, _ in Entries])
+    if CacheSize > Cache["MaxCacheSize"]:
+        Entries.sort(key = lambda Entry: Entry[2])
+        for MetadataFile, Size, _ in Entries:
+            if CacheSize <= Cache["MaxCacheSize"]:
+                break
+
+            _RemoveCacheEntry(MetadataFile)
+            CacheSize -= Size
+            Cache["Stats"]["Evicted"] += 1
+
+    Cache["CacheSize"] = CacheSize
+
+def _RemoveCacheEntry(MetadataFile):
+    """Remove metadata and payload files for a cached response."""
+
+    for FilePath in [MetadataFile, MetadataFile[:-len(".json")] + ".gz"]:
+        try:
+            os.remove(FilePath)
+        except OSError:
+            pass
+
+def _UpdateStats(Cache, StatName):
+    """Update cache usage statistics."""
+
+    with Cache["Lock"]:
+        Cache["Stats"][StatName] += 1
@@ -0,0 +1,227 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import warnings
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+scipy = MWLazyImport.LazyImport("scipy", SubModules = ["spatial.distance", "cluster.hierarchy"])
+
+fastcluster = MWLazyImport.LazyImport("fastcluster") if MWLazyImport.IsModuleAvailable("fastcluster") else None
+
+import MWPipeline
+
+__all__ = ["CalculateCondensedDistances", "CalculateLinkage", "GenerateClusteredHeatmapData", "ReduceHeatmapFeatures"]
+
+
+def GenerateClusteredHeatmapData(FeaturesDataFrame, Method = "average", Metric = "correlation", RowCluster = True, ColCluster = True, MaxFeatures = None, FeatureReductionMethod = "Variance", Cache = None, DataKey = None):
+    """Generate data and linkages for drawing a hierarchically clustered
+    heatmap for features data.
+
+    The condensed distances are calculated once for each combination of
+    data, axis and metric, and the linkages are calculated once for each
+    combination of distances and clustering method. A pipeline cache set up
+    using MWPipeline.SetupPipelineCache may be specified to reuse these
+    results across calls. Consequently, toggling clustering of rows or
+    columns, or changing plot options, doesn't recalculate any distances or
+    linkages.
+
+    The number of plotted features may be limited to MaxFeatures to handle
+    wide datasets interactively. The following methods are supported to
+    reduce features:
+
+    Variance - Retain features with the largest variance
+    ClusterMean - Cluster features and plot mean values for clusters
+
+    Arguments:
+        FeaturesDataFrame (panda): Panda dataframe containing only features.
+        Method (str): Clustering method.
+        Metric (str): Distance metric.
+        RowCluster (bool): Cluster rows.
+        ColCluster (bool): Cluster columns.
+        MaxFeatures (int): Maximum number of features to plot or None.
+        FeatureReductionMethod (str): Method to reduce features.
+        Cache (dict): Pipeline cache from MWPipeline.SetupPipelineCache or None.
+        DataKey (str): Key for features data. Default: Calculated using
+            MWPipeline.GetDataFrameKey.
+
+    Returns:
+        panda : Features data frame for plotting.
+        array : Row linkage or None.
+        array : Column linkage or None.
+
+    Examples:
+
+        PipelineCache = MWPipeline.SetupPipelineCache()
+        PlotDataFrame, RowLinkage, ColLinkage = MWHeatmapUtil.GenerateClusteredHeatmapData(NormalizedDataFrame,
+                                                    Method = "average", Metric = "correlation", MaxFeatures = 1000,
+                                                    Cache = PipelineCache)
+        sns.clustermap(PlotDataFrame, row_linkage = RowLinkage, col_linkage = ColLinkage)
+
+    """
+
+    if DataKey is None:
+        DataKey = MWPipeline.GetDataFrameKey(FeaturesDataFrame)
+
+    # Reduce features...
+    if MaxFeatures is not None and FeaturesDataFrame.shape[1] > MaxFeatures:
+        # Clustering method and metric are only used for aggregating features...
+        KeyParts = (DataKey, MaxFeatures, FeatureReductionMethod)
+        if re.match("^ClusterMean$", FeatureReductionMethod, re.I):
+            KeyParts = KeyParts + (Method, Metric)
+
+        DataKey, FeaturesDataFrame = MWPipeline.RunPipelineStage(Cache, "ReduceFeatures", KeyParts,
+                                                                 ReduceHeatmapFeatures, FeaturesDataFrame, MaxFeatures,
+                                                                 FeatureReductionMethod, Method, Metric, Cache, DataKey)
+
+    RowLinkage = None
+    if RowCluster:
+        RowLinkage = _GetCachedLinkage(Cache, DataKey, FeaturesDataFrame, "Rows", Method, Metric)
+
+    ColLinkage = None
+    if ColCluster:
+        ColLinkage = _GetCachedLinkage(Cache, DataKey, FeaturesDataFrame, "Cols", Method, Metric)
+
+    return (FeaturesDataFrame, RowLinkage, ColLinkage)
+
+def ReduceHeatmapFeatures(FeaturesDataFrame, MaxFeatures, FeatureReductionMethod = "Variance", Method = "average", Metric = "correlation", Cache = None, DataKey = None):
+    """Reduce number of features for plotting a heatmap. The supported methods
+    are described in GenerateClusteredHeatmapData.
+
+    Arguments:
+        FeaturesDataFrame (panda): Panda dataframe containing only features.
+        MaxFeatures (int): Maximum number of features.
+        FeatureReductionMethod (str): Method to reduce features.
+        Method (str): Clustering method for ClusterMean.
+        Metric (str): Distance metric for ClusterMean.
+        Cache (dict): Pipeline cache from MWPipeline.SetupPipelineCache or None.
+        DataKey (str): Key for features data.
+
+    Returns:
+        panda : Reduced features data frame.
+
+    """
+
+    if FeaturesDataFrame.shape[1] <= MaxFeatures:
+        return FeaturesDataFrame
+
+    if re.match("^Variance$", FeatureReductionMethod, re.I):
+        print("Retaining %d of %d features with the largest variance..." % (MaxFeatures, FeaturesDataFrame.shape[1]))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category = RuntimeWarning)
+            Variances = np.nanvar(FeaturesDataFrame.to_numpy(dtype = np.float64), axis = 0, ddof = 1)
+        Variances = np.where(np.isnan(Variances), -np.inf, Variances)
+
+        # Retain original order of features...
+        ColNums = np.sort(np.argsort(-Variances, kind = "mergesort")[:MaxFeatures])
+
+        return FeaturesDataFrame.iloc[:, ColNums]
+    elif re.match("^ClusterMean$", FeatureReductionMethod, re.I):
+        print("Aggregating %d features into %d clusters..." % (FeaturesDataFrame.shape[1], MaxFeatures))
+        if DataKey is None:
+            DataKey = MWPipeline.GetDataFrameKey(FeaturesDataFrame)
+        ColLinkage = _GetCachedLinkage(Cache, DataKey, FeaturesDataFrame, "Cols", Method, Metric)
+        ClusterNums = scipy.cluster.hierarchy.fcluster(ColLinkage, MaxFeatures, criterion = "maxclust")
+
+        ClusterDataFrames = []
+        ClusterColIDs = []
+        for ClusterNum in np.unique(ClusterNums):
+            ColNums = np.where(ClusterNums == ClusterNum)[0]
+            ClusterColIDs.append(FeaturesDataFrame.columns[ColNums[0]] if len(ColNums) == 1 else "%s (+%d)" % (FeaturesDataFrame.columns[ColNums[0]], len(ColNums) - 1))
+            ClusterDataFrames.append(FeaturesDataFrame.iloc[:, ColNums].mean(axis = 1))
+
+        ReducedDataFrame = pd.concat(ClusterDataFrames, axis = 1)
+        ReducedDataFrame.columns = ClusterColIDs
+
+        return ReducedDataFrame
+
+    print("***Warning: Unknown feature reduction method %s; Using all features..." % FeatureReductionMethod)
+    return FeaturesDataFrame
+
+def CalculateCondensedDistances(Values, Metric = "correlation", BlockSize = 8 * 1024 * 1024):
+    """Calculate condensed distances between rows of a two dimensional array.
+    The correlation and cosine distances are calculated using matrix
+    products in blocks of rows, which only require memory for condensed
+    distances along with a block of products. Distances for other metrics
+    are calculated using scipy.spatial.distance.pdist.
+
+    Arguments:
+        Values (array): Two dimensional array.
+        Metric (str): Distance metric.
+        BlockSize (int): Number of values in a block of products.
+
+    Returns:
+        array : Condensed distances.
+
+    """
+
+    if not re.match("^(correlation|cosine)$", Metric, re.I):
+        return scipy.spatial.distance.pdist(Values, metric = Metric)
+
+    # Setup rows with unit norm after any centering...
+    Values = np.array(Values, dtype = np.float64, copy = True)
+    if re.match("^correlation$", Metric, re.I):
+        Values -= Values.mean(axis = 1)[:, np.newaxis]
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        Values /= np.sqrt(np.einsum("ij,ij->i", Values, Values))[:, np.newaxis]
+
+    NumOfRows = Values.shape[0]
+    Distances = np.empty(NumOfRows * (NumOfRows - 1) // 2, dtype = np.float64)
+    NumOfBlockRows = max(1, BlockSize // max(1, NumOfRows))
+
+    for StartRowNum in range(0, NumOfRows, NumOfBlockRows):
+        EndRowNum = min(StartRowNum + NumOfBlockRows, NumOfRows)
+        Products = np.dot(Values[StartRowNum:EndRowNum], Values[StartRowNum:].T)
+
+        for RowNum in range(StartRowNum, EndRowNum):
+            Offset = RowNum * NumOfRows - RowNum * (RowNum + 1) // 2
+            BlockRowNum = RowNum - StartRowNum
+            Distances[Offset:Offset + NumOfRows - RowNum - 1] = Products[BlockRowNum, BlockRowNum + 1:]
+
+    np.subtract(1.0, Distances, out = Distances)
+    np.clip(Distances, 0.0, 2.0, out = Distances)
+
+    return Distances
+
+def CalculateLinkage(Distances, Method = "average"):
+    """Calculate linkage for hierarchical clustering using condensed
+    distances. The fastcluster module is used when it's available.
+
+    Arguments:
+        Distances (array): Condensed distances.
+        Method (str): Clustering method.
+
+    Returns:
+        array : Linkage matrix.
+
+    """
+
+    if fastcluster is not None:
+        return fastcluster.linkage(Distances, method = Method)
+
+    return scipy.cluster.hierarchy.linkage(Distances, method = Method)
+
+def _GetCachedLinkage(Cache, DataKey, FeaturesDataFrame, Axis, Method, Metric):
+    """Get linkage for rows or columns using cached distances and linkages."""
+
+    DistancesKey, Distances = MWPipeline.RunPipelineStage(Cache, "Distances", (DataKey, Axis, Metric),
+                                                          _CalculateAxisDistances, FeaturesDataFrame, Axis, Metric)
+    LinkageKey, Linkage = MWPipeline.RunPipelineStage(Cache, "Linkage", (DistancesKey, Method),
+                                                      CalculateLinkage, Distances, Method)
+
+    return Linkage
+
+def _CalculateAxisDistances(FeaturesDataFrame, Axis, Metric):
+    """Calculate condensed distances for rows or columns of a data frame."""
+
+    Values = FeaturesDataFrame.to_numpy(dtype = np.float64)
+    if Axis == "Cols":
+        Values = Values.T
+
+    return CalculateCondensedDistances(Values, Metric)
@@ -0,0 +1,129 @@
+from __future__ import print_function
+
+import os
+import sys
+import types
+import threading
+import importlib
+import importlib.util
+
+__all__ = ["IsLazyModuleLoaded", "IsModuleAvailable", "LazyImport"]
+
+# Set MW_EAGER_IMPORTS environment variable to 1 to import modules
+# immediately, such as in batch workers or for comparing import times...
+_EagerImports = os.environ.get("MW_EAGER_IMPORTS", "0").lower() in ("1", "true", "yes")
+
+
+def LazyImport(ModuleName, SubModules = None):
+    """Setup a module, which is imported during its first attribute access.
+    The submodules, if specified, are imported along with the module and may
+    be accessed as its attributes. It allows MW modules and notebooks to
+    defer loading of heavy dependencies, such as pandas, numpy, scipy and
+    sklearn, until a function using them is first called.
+
+    The modules are imported immediately when MW_EAGER_IMPORTS environment
+    variable is set to 1.
+
+    Arguments:
+        ModuleName (str): Module name, such as pandas or matplotlib.pyplot.
+        SubModules (list): Submodule names relative to the module, such as
+            cluster.hierarchy for scipy.
+
+    Returns:
+        object : A module or a lazy module loaded during first use.
+
+    Examples:
+
+        pd = MWLazyImport.LazyImport("pandas")
+        plt = MWLazyImport.LazyImport("matplotlib.pyplot")
+        scipy = MWLazyImport.LazyImport("scipy", SubModules = ["spatial.distance", "cluster.hierarchy"])
+
+    """
+
+    SubModules = [] if SubModules is None else list(SubModules)
+
+    if _EagerImports:
+        return _ImportModule(ModuleName, SubModules)
+
+    return _LazyModule(ModuleName, SubModules)
+
+def IsModuleAvailable(ModuleName):
+    """Check whether a module is available without importing it.
+
+    Arguments:
+        ModuleName (str): Module name.
+
+    Returns:
+        bool : True or False.
+
+    """
+
+    if ModuleName in sys.modules:
+        return sys.modules[ModuleName] is not None
+
+    try:
+        return importlib.util.find_spec(ModuleName) is not None
+    except (ImportError, ValueError):
+        return False
+
+def IsLazyModuleLoaded(Module):
+    """Check whether a lazy module has been loaded. Modules imported without
+    LazyImport are always loaded.
+
+    Arguments:
+        Module (object): Module returned by LazyImport.
+
+    Returns:
+        bool : True or False.
+
+    """
+
+    if not isinstance(Module, _LazyModule):
+        return True
+
+    return Module.__dict__["_LazyModuleInfo"]["Module"] is not None
+
+class _LazyModule(types.ModuleType):
+    """Module proxy, which imports the module during its first attribute
+    access and subsequently exposes its attributes directly."""
+
+    def __init__(self, ModuleName, SubModules):
+        super(_LazyModule, self).__init__(ModuleName)
+        self.__dict__["_LazyModuleInfo"] = {"ModuleName": ModuleName, "SubModules": SubModules, "Module": None, "Lock": threading.Lock()}
+
+    def __getattr__(self, Name):
+        return getattr(self._LoadModule(), Name)
+
+    def __dir__(self):
+        return dir(self._LoadModule())
+
+    def __repr__(self):
+        LazyModuleInfo = self.__dict__["_LazyModuleInfo"]
+        if LazyModuleInfo["Module"] is None:
+            return "<lazy module '%s'>" % LazyModuleInfo["ModuleName"]
+
+        return repr(LazyModuleInfo["Module"])
+
+    def _LoadModule(self):
+        LazyModuleInfo = self.__dict__["_LazyModuleInfo"]
+        if LazyModuleInfo["Module"] is not None:
+            return LazyModuleInfo["Module"]
+
+        with LazyModuleInfo["Lock"]:
+            if LazyModuleInfo["Module"] is None:
+                Module = _ImportModule(LazyModuleInfo["ModuleName"], LazyModuleInfo["SubModules"])
+
+                # Expose module attributes directly for subsequent access...
+                self.__dict__.update(Module.__dict__)
+                LazyModuleInfo["Module"] = Module
+
+        return LazyModuleInfo["Module"]
+
+def _ImportModule(ModuleName, SubModules):
+    """Import a module along with its submodules."""
+
+    Module = importlib.import_module(ModuleName)
+    for SubModule in SubModules:
+        importlib.import_module("%s.%s" % (ModuleName, SubModule))
+
+    return Module
@@ -0,0 +1,319 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import warnings
+import concurrent.futures
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+sklearn = MWLazyImport.LazyImport("sklearn", SubModules = ["cross_decomposition", "discriminant_analysis", "decomposition", "model_selection"])
+
+threadpoolctl = MWLazyImport.LazyImport("threadpoolctl") if MWLazyImport.IsModuleAvailable("threadpoolctl") else None
+
+__all__ = ["GenerateCrossValidationData", "GeneratePermutationTestData"]
+
+# Data for evaluating models in worker processes...
+_WorkerData = {}
+
+
+def GenerateCrossValidationData(DataFrame, Method = "PLSDA", NumComponents = 2, NumOfFolds = 5, RandomSeed = 0, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Perform k-fold cross-validation for a PLSDA, LDA or PCA model using
+    standardized features data.
+
+    The features are standardized for each fold using mean and standard
+    deviation of its training data. These statistics are derived from sums
+    of values and squared values calculated once for each fold, instead of
+    refitting a scaler to the training data of each fold.
+
+    The following metrics are calculated for each fold and for predictions
+    pooled across all folds:
+
+    Q2 - 1 - PRESS/TSS for predicted class membership matrix for PLSDA,
+        class membership probabilities for LDA and reconstructed features
+        for PCA
+    Accuracy - Fraction of correctly predicted classes for PLSDA and LDA
+
+    The folds are stratified by class for PLSDA and LDA. The results are
+    reproducible for a random seed.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe containing class and features data.
+        Method (str): PLSDA, LDA or PCA.
+        NumComponents (int): Number of components.
+        NumOfFolds (int): Number of folds.
+        RandomSeed (int): Random seed for assigning samples to folds.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID.
+
+    Returns:
+        panda : A data frame containing the following columns: Fold,
+            Samples, Q2 and Accuracy. The last row corresponds to all folds.
+
+    Examples:
+
+        CVDataFrame = MWModelValidationUtil.GenerateCrossValidationData(DataFrame, Method = "PLSDA",
+                          NumComponents = 2, NumOfFolds = 5, RandomSeed = 42)
+
+    """
+
+    FoldsData = _SetupFoldsData(DataFrame, Method, NumComponents, NumOfFolds, RandomSeed, ClassColID, ClassNumColID)
+    if FoldsData is None:
+        return None
+
+    Q2, Accuracy, FoldQ2Values, FoldAccuracies = _EvaluateFolds(FoldsData, FoldsData["ClassValues"])
+
+    FoldSizes = [len(TestIndices) for TestIndices in FoldsData["TestIndices"]]
+    CVDataFrame = pd.DataFrame({"Fold": [str(FoldNum + 1) for FoldNum in range(len(FoldSizes))] + ["All"],
+                                "Samples": FoldSizes + [sum(FoldSizes)],
+                                "Q2": FoldQ2Values + [Q2],
+                                "Accuracy": FoldAccuracies + [Accuracy]})
+
+    return CVDataFrame
+
+def GeneratePermutationTestData(DataFrame, Method = "PLSDA", NumComponents = 2, NumOfPermutations = 1000, NumOfFolds = 5, RandomSeed = 0, ClassColID = "Class", ClassNumColID = "ClassNum", NumOfWorkers = 1, BatchSize = None):
+    """Perform a permutation test for a PLSDA or LDA model by comparing
+    cross-validated Q2 and accuracy for the observed classes against their
+    values for randomly shuffled classes.
+
+    The folds and standardized features data for all folds are set up once
+    and are reused for all permutations. The permutations are evaluated in
+    batches across a pool of NumOfWorkers processes. The permutations are
+    generated from the random seed before they are distributed to workers.
+    Consequently, the results are reproducible irrespective of the number of
+    workers and batch size.
+
+    The p-value for a metric corresponds to (C + 1) / (N + 1), where C is the
+    number of permutations with a value greater than or equal to the
+    observed value and N is the number of permutations.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe containing class and features data.
+        Method (str): PLSDA or LDA.
+        NumComponents (int): Number of components.
+        NumOfPermutations (int): Number of random permutations of classes.
+        NumOfFolds (int): Number of folds.
+        RandomSeed (int): Random seed for folds and permutations.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID.
+        NumOfWorkers (int): Number of processes for evaluating permutations.
+        BatchSize (int): Number of permutations evaluated in a task. Default:
+            Permutations split into four batches for each worker.
+
+    Returns:
+        panda : A data frame containing Q2 and Accuracy for permutations
+            along with the fraction of samples whose classes are unchanged.
+        panda : A data frame containing the following columns for Q2 and
+            Accuracy: Metric, Observed, Permuted Mean, Permuted Standard
+            Deviation and PValue.
+
+    Examples:
+
+        PermutationsDataFrame, SummaryDataFrame = MWModelValidationUtil.GeneratePermutationTestData(DataFrame,
+                                                      Method = "PLSDA", NumOfPermutations = 1000, RandomSeed = 42,
+                                                      NumOfWorkers = 4)
+
+    """
+
+    if re.match("^PCA$", Method, re.I):
+        print("***Error: GeneratePermutationTestData: Permutation tests aren't supported for PCA...")
+        return (None, None)
+
+    FoldsData = _SetupFoldsData(DataFrame, Method, NumComponents, NumOfFolds, RandomSeed, ClassColID, ClassNumColID)
+    if FoldsData is None:
+        return (None, None)
+
+    ObservedQ2, ObservedAccuracy, FoldQ2Values, FoldAccuracies = _EvaluateFolds(FoldsData, FoldsData["ClassValues"])
+
+    # Generate permutations independent of the number of workers...
+    RandomState = np.random.RandomState(RandomSeed)
+    NumOfSamples = len(FoldsData["ClassValues"])
+    Permutations = np.vstack([RandomState.permutation(NumOfSamples) for PermutationNum in range(NumOfPermutations)]) if NumOfPermutations else np.empty((0, NumOfSamples), dtype = int)
+
+    if BatchSize is None:
+        BatchSize = max(1, int(np.ceil(NumOfPermutations / (4.0 * max(1, NumOfWorkers)))))
+    Batches = [Permutations[StartNum:StartNum + BatchSize] for StartNum in range(0, NumOfPermutations, BatchSize)]
+
+    print("Evaluating %d permutation(s) using %d-fold cross-validation for %s; Models: %d..." % (NumOfPermutations, len(FoldsData["TestIndices"]), FoldsData["Method"], NumOfPermutations * len(FoldsData["TestIndices"])))
+
+    StartTime = time.time()
+    BatchResults = [None] * len(Batches)
+    if NumOfWorkers > 1 and len(Batches) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = NumOfWorkers, initializer = _InitializeWorker, initargs = (FoldsData,)) as Executor:
+            Futures = {}
+            for BatchNum, Batch in enumerate(Batches):
+                Futures[Executor.submit(_EvaluatePermutations, Batch)] = BatchNum
+
+            for Future in concurrent.futures.as_completed(Futures):
+                BatchResults[Futures[Future]] = Future.result()
+    else:
+        for BatchNum, Batch in enumerate(Batches):
+            BatchResults[BatchNum] = _EvaluatePermutations(Batch, FoldsData)
+
+    if NumOfPermutations:
+        ElapsedTime = time.time() - StartTime
+        NumOfModels = NumOfPermutations * len(FoldsData["TestIndices"])
+        print("Total time: %.2f sec; Models/sec: %.2f" % (ElapsedTime, NumOfModels / ElapsedTime if ElapsedTime > 0 else 0.0))
+
+    PermutationResults = np.vstack(BatchResults) if len(BatchResults) else np.empty((0, 2))
+    PermutationsDataFrame = pd.DataFrame({"Permutation": np.arange(1, NumOfPermutations + 1),
+                                          "Q2": PermutationResults[:, 0],
+                                          "Accuracy": PermutationResults[:, 1],
+                                          "Unchanged Classes": (FoldsData["ClassValues"][Permutations] == FoldsData["ClassValues"][np.newaxis, :]).mean(axis = 1)})
+
+    SummaryRows = []
+    for Metric, ObservedValue in [("Q2", ObservedQ2), ("Accuracy", ObservedAccuracy)]:
+        PermutedValues = PermutationsDataFrame[Metric].to_numpy()
+        PValue = (np.sum(PermutedValues >= ObservedValue) + 1.0) / (NumOfPermutations + 1.0)
+        SummaryRows.append([Metric, ObservedValue, PermutedValues.mean() if NumOfPermutations else np.nan,
+                            PermutedValues.std(ddof = 1) if NumOfPermutations > 1 else np.nan, PValue])
+
+    SummaryDataFrame = pd.DataFrame(SummaryRows, columns = ["Metric", "Observed", "Permuted Mean", "Permuted Standard Deviation", "PValue"])
+
+    return (PermutationsDataFrame, SummaryDataFrame)
+
+def _SetupFoldsData(DataFrame, Method, NumComponents, NumOfFolds, RandomSeed, ClassColID, ClassNumColID):
+    """Setup folds and standardized training and test features data for each
+    fold."""
+
+    if re.match("^PLSDA$", Method, re.I):
+        Method = "PLSDA"
+    elif re.match("^LDA$", Method, re.I):
+        Method = "LDA"
+    elif re.match("^PCA$", Method, re.I):
+        Method = "PCA"
+    else:
+        print("***Error: Unknown model validation method: %s; Supported values: PLSDA, LDA or PCA" % Method)
+        return None
+
+    DropColIDs = [ClassNumColID] if ClassColID is None else [ClassColID, ClassNumColID]
+    XData = DataFrame.drop(DropColIDs, axis = 1).to_numpy(dtype = np.float64)
+    ClassValues = DataFrame[ClassNumColID].to_numpy()
+    NumOfSamples = XData.shape[0]
+
+    if NumOfFolds < 2 or NumOfFolds > NumOfSamples:
+        print("***Error: Number of folds, %d, must be between 2 and number of samples, %d..." % (NumOfFolds, NumOfSamples))
+        return None
+
+    # Setup folds stratified by class for classification models...
+    if Method == "PCA":
+        Folds = sklearn.model_selection.KFold(n_splits = NumOfFolds, shuffle = True, random_state = RandomSeed)
+    else:
+        MinClassSize = pd.Series(ClassValues).value_counts().min()
+        if MinClassSize < NumOfFolds:
+            print("***Warning: Number of samples, %d, in the smallest class is less than number of folds, %d..." % (MinClassSize, NumOfFolds))
+        Folds = sklearn.model_selection.StratifiedKFold(n_splits = NumOfFolds, shuffle = True, random_state = RandomSeed)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category = UserWarning)
+        TestIndices = [FoldTestIndices for FoldTrainIndices, FoldTestIndices in Folds.split(XData, ClassValues)]
+
+    # Calculate sums of values and squared values for each fold around the
+    # overall mean and derive training statistics for each fold by removing
+    # the contribution of its test data...
+    XData = XData - XData.mean(axis = 0)
+    FoldSums = np.vstack([XData[FoldTestIndices].sum(axis = 0) for FoldTestIndices in TestIndices])
+    FoldSquaredSums = np.vstack([np.einsum("ij,ij->j", XData[FoldTestIndices], XData[FoldTestIndices]) for FoldTestIndices in TestIndices])
+    TotalSums = FoldSums.sum(axis = 0)
+    TotalSquaredSums = FoldSquaredSums.sum(axis = 0)
+
+    FoldsData = {"Method": Method, "NumComponents": NumComponents, "ClassValues": ClassValues, "Classes": np.unique(ClassValues),
+                 "TrainIndices": [], "TestIndices": TestIndices, "XTrain": [], "XTest": []}
+
+    for FoldNum, FoldTestIndices in enumerate(TestIndices):
+        TrainMask = np.ones(NumOfSamples, dtype = bool)
+        TrainMask[FoldTestIndices] = False
+        NumOfTrainSamples = NumOfSamples - len(FoldTestIndices)
+
+        Means = (TotalSums - FoldSums[FoldNum]) / NumOfTrainSamples
+        Variances = np.maximum((TotalSquaredSums - FoldSquaredSums[FoldNum]) / NumOfTrainSamples - Means * Means, 0.0)
+
+        # Handle features with zero variance as StandardScaler...
+        Scales = np.sqrt(Variances)
+        Scales[Scales < 10 * np.finfo(np.float64).eps] = 1.0
+
+        FoldsData["TrainIndices"].append(np.where(TrainMask)[0])
+        FoldsData["XTrain"].append((XData[TrainMask] - Means) / Scales)
+        FoldsData["XTest"].append((XData[FoldTestIndices] - Means) / Scales)
+
+    return FoldsData
+
+def _EvaluateFolds(FoldsData, ClassValues):
+    """Fit and evaluate models for all folds using specified class values and
+    return pooled and fold Q2 values and accuracies."""
+
+    Method = FoldsData["Method"]
+    Classes = FoldsData["Classes"]
+    ClassesMatrix = (ClassValues[:, np.newaxis] == Classes[np.newaxis, :]).astype(np.float64)
+
+    PRESS, NumOfCorrect = 0.0, 0
+    FoldQ2Values, FoldAccuracies = [], []
+    for TrainIndices, TestIndices, XTrain, XTest in zip(FoldsData["TrainIndices"], FoldsData["TestIndices"], FoldsData["XTrain"], FoldsData["XTest"]):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            if Method == "PCA":
+                Model = sklearn.decomposition.PCA(n_components = min(FoldsData["NumComponents"], XTrain.shape[0], XTrain.shape[1])).fit(XTrain)
+                YTest = XTest
+                YPredicted = Model.inverse_transform(Model.transform(XTest))
+                YTrainMeans = np.zeros(XTest.shape[1])
+            else:
+                YTest = ClassesMatrix[TestIndices]
+                YTrainMeans = ClassesMatrix[TrainIndices].mean(axis = 0)
+                if Method == "PLSDA":
+                    Model = sklearn.cross_decomposition.PLSRegression(n_components = FoldsData["NumComponents"], scale = False).fit(XTrain, ClassesMatrix[TrainIndices])
+                    YPredicted = Model.predict(XTest)
+                    PredictedClasses = Classes[np.argmax(YPredicted, axis = 1)]
+                else:
+                    Model = sklearn.discriminant_analysis.LinearDiscriminantAnalysis().fit(XTrain, ClassValues[TrainIndices])
+                    YPredicted = np.zeros(YTest.shape)
+                    YPredicted[:, np.searchsorted(Classes, Model.classes_)] = Model.predict_proba(XTest)
+                    PredictedClasses = Model.predict(XTest)
+
+        FoldPRESS = np.sum((YTest - YPredicted) ** 2)
+        FoldTSS = np.sum((YTest - YTrainMeans) ** 2)
+        PRESS += FoldPRESS
+        FoldQ2Values.append(1.0 - FoldPRESS / FoldTSS if FoldTSS > 0 else np.nan)
+
+        if Method == "PCA":
+            FoldAccuracies.append(np.nan)
+        else:
+            FoldNumOfCorrect = int(np.sum(PredictedClasses == ClassValues[TestIndices]))
+            NumOfCorrect += FoldNumOfCorrect
+            FoldAccuracies.append(FoldNumOfCorrect / float(len(TestIndices)))
+
+    if Method == "PCA":
+        TSS = sum([np.sum(XTest ** 2) for XTest in FoldsData["XTest"]])
+        Accuracy = np.nan
+    else:
+        TSS = np.sum((ClassesMatrix - ClassesMatrix.mean(axis = 0)) ** 2)
+        Accuracy = NumOfCorrect / float(len(ClassValues))
+
+    Q2 = 1.0 - PRESS / TSS if TSS > 0 else np.nan
+
+    return (Q2, Accuracy, FoldQ2Values, FoldAccuracies)
+
+def _EvaluatePermutations(Permutations, FoldsData = None):
+    """Evaluate Q2 and accuracy for a batch of permutations of classes."""
+
+    if FoldsData is None:
+        FoldsData = _WorkerData["FoldsData"]
+
+    Results = np.empty((len(Permutations), 2))
+    for PermutationNum, Permutation in enumerate(Permutations):
+        Q2, Accuracy, FoldQ2Values, FoldAccuracies = _EvaluateFolds(FoldsData, FoldsData["ClassValues"][Permutation])
+        Results[PermutationNum] = (Q2, Accuracy)
+
+    return Results
+
+def _InitializeWorker(FoldsData):
+    """Setup folds data once for a worker process and limit its BLAS threads
+    to avoid oversubscription of processors across workers."""
+
+    _WorkerData["FoldsData"] = FoldsData
+    if threadpoolctl is not None:
+        _WorkerData["ThreadpoolLimits"] = threadpoolctl.threadpool_limits(limits = 1)
@@ -0,0 +1,115 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+sklearn = MWLazyImport.LazyImport("sklearn", SubModules = ["preprocessing", "decomposition", "discriminant_analysis", "cross_decomposition"])
+
+__all__ = ["GenerateLDAData", "GeneratePCAData", "GeneratePLSDAData"]
+
+
+def GeneratePCAData(DataFrame, NumComponents = 2, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Perform principal component analysis (PCA) on standardized features
+    data and generate a data frame containing principal components.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        NumComponents (int): Number of principal components.
+        ClassColID (str): Class column ID.
+        ClassNumColID (str): Class number column ID.
+
+    Returns:
+        panda : A data frame containing class numbers followed by PC1, PC2
+            and so on for each sample.
+        list : Explained variance ratio for each principal component.
+
+    Examples:
+
+        PCADataFrame, ExplainedVariance = MWMultivariateUtil.GeneratePCAData(DataFrame, NumComponents = 2)
+
+    """
+
+    FeaturesDataValues, ClassValues = _SetupFeaturesAndClassValues(DataFrame, ClassColID, ClassNumColID)
+
+    PCAModel = sklearn.decomposition.PCA(n_components = NumComponents)
+    PrincipalComponents = PCAModel.fit_transform(FeaturesDataValues)
+
+    return (_SetupComponentsDataFrame(PrincipalComponents, "PC", ClassValues), PCAModel.explained_variance_ratio_.tolist())
+
+def GenerateLDAData(DataFrame, NumComponents = 2, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Perform linear discriminant analysis (LDA) on standardized features
+    data and generate a data frame containing linear discriminants. The
+    number of components is limited to one less than the number of classes.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        NumComponents (int): Number of linear discriminants.
+        ClassColID (str): Class column ID.
+        ClassNumColID (str): Class number column ID.
+
+    Returns:
+        panda : A data frame containing class numbers followed by LD1, LD2
+            and so on for each sample.
+        list : Explained variance ratio for each linear discriminant.
+
+    """
+
+    FeaturesDataValues, ClassValues = _SetupFeaturesAndClassValues(DataFrame, ClassColID, ClassNumColID)
+
+    # Number of components is limited by number of classes...
+    NumComponents = min(NumComponents, ClassValues.nunique() - 1)
+
+    LDAModel = sklearn.discriminant_analysis.LinearDiscriminantAnalysis(n_components = NumComponents)
+    LDComponents = LDAModel.fit_transform(FeaturesDataValues, ClassValues.tolist())
+
+    return (_SetupComponentsDataFrame(LDComponents, "LD", ClassValues), LDAModel.explained_variance_ratio_.tolist())
+
+def GeneratePLSDAData(DataFrame, NumComponents = 2, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Perform partial least squares discriminant analysis (PLSDA) on
+    standardized features data and a dummy matrix corresponding to class
+    numbers, and generate a data frame containing latent variables.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        NumComponents (int): Number of latent variables.
+        ClassColID (str): Class column ID.
+        ClassNumColID (str): Class number column ID.
+
+    Returns:
+        panda : A data frame containing class numbers followed by LV1, LV2
+            and so on for each sample.
+
+    """
+
+    FeaturesDataValues, ClassValues = _SetupFeaturesAndClassValues(DataFrame, ClassColID, ClassNumColID)
+
+    # Setup a dummy identity matrix corresponding to class values...
+    ClassValuesMatrix = pd.get_dummies(ClassValues.tolist()).values
+
+    PLSModel = sklearn.cross_decomposition.PLSRegression(n_components = NumComponents, scale = False)
+    PLSComponents = PLSModel.fit(FeaturesDataValues, ClassValuesMatrix).transform(FeaturesDataValues)
+
+    return _SetupComponentsDataFrame(PLSComponents, "LV", ClassValues)
+
+def _SetupFeaturesAndClassValues(DataFrame, ClassColID, ClassNumColID):
+    """Setup standardized features data and class numbers."""
+
+    DropColIDs = [ColID for ColID in [ClassColID, ClassNumColID] if ColID is not None and ColID in DataFrame.columns]
+    FeaturesDataValues = sklearn.preprocessing.StandardScaler().fit_transform(DataFrame.drop(DropColIDs, axis = 1).values)
+
+    return (FeaturesDataValues, DataFrame[ClassNumColID])
+
+def _SetupComponentsDataFrame(Components, ColIDPrefix, ClassValues):
+    """Setup a data frame for components along with class numbers."""
+
+    ComponentsDataFrame = pd.DataFrame(Components, columns = ["%s%d" % (ColIDPrefix, Index + 1) for Index in range(Components.shape[1])], index = ClassValues.index)
+    ComponentsDataFrame.insert(0, ClassValues.name, ClassValues)
+
+    return ComponentsDataFrame
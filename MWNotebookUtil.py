@@ -0,0 +1,209 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+
+import MWLazyImport
+
+widgets = MWLazyImport.LazyImport("ipywidgets")
+IPythonDisplay = MWLazyImport.LazyImport("IPython.display")
+
+plt = MWLazyImport.LazyImport("matplotlib.pyplot")
+sns = MWLazyImport.LazyImport("seaborn")
+
+import MWUtil
+
+__all__ = ["DrawScoresPlot", "SetupDataRetrievalUIF"]
+
+MissingValuesMethods = ["NoAction", "DeleteRows", "DeleteColumns", "ReplaceByColumnMean", "ReplaceColumnMedian", "ReplaceByZero" , "ReplaceByHalfMinimum",
+                        "ReplaceByClassMean", "ReplaceByClassMedian", "ReplaceByClassHalfMinimum", "ReplaceByKNN",
+                        "ReplaceByClassKNN", "LinearInterpolation"]
+
+
+def SetupDataRetrievalUIF(MWBaseURL, Cache = None, Namespace = None, StudyIDs = "ST000001 ST000002"):
+    """Setup and display UIF to retrieve data for study IDs or upload data
+    files and process any missing values in Jupyter notebooks.
+
+    The retrieved data and a flag indicating retrieval of MW data are
+    stored as StudiesResultsData and RetrievedMWData in the returned
+    dictionary along with the namespace, such as globals() of a notebook,
+    for use in subsequent cells.
+
+    Arguments:
+        MWBaseURL (str): REST URL base for MW.
+        Cache (dict): REST cache information from MWCache.SetupRESTCache.
+        Namespace (dict): Namespace for storing retrieved data or None.
+        StudyIDs (str): Default study ID or IDs.
+
+    Returns:
+        dict : A dictionary containing UIF widgets, such as StudyIDText,
+            MissingValuesMethodsDropdown and FileUploadBtn, along with any
+            retrieved data.
+
+    Examples:
+
+        DataRetrievalUIF = MWNotebookUtil.SetupDataRetrievalUIF(MWBaseURL, Cache = MWRESTCache, Namespace = globals())
+        StudyIDText = DataRetrievalUIF["StudyIDText"]
+
+    """
+
+    DataRetrievalUIF = {"StudiesResultsData": None, "RetrievedMWData": None}
+
+    def _StoreData(StudiesResultsData, RetrievedMWData):
+        DataRetrievalUIF["StudiesResultsData"] = StudiesResultsData
+        DataRetrievalUIF["RetrievedMWData"] = RetrievedMWData
+        if Namespace is not None:
+            Namespace["StudiesResultsData"] = StudiesResultsData
+            Namespace["RetrievedMWData"] = RetrievedMWData
+
+    # Setup UIF info text...
+    TopInfoTextHTML = widgets.HTML(value = "<strong>Retrieve or upload data and process any missing values</strong>",
+                                   placeholder='', description='')
+
+    # Setup UIF to process any missing values...
+    MissingValuesMethodsDropdown = widgets.Dropdown(options = MissingValuesMethods,
+                                                    value = "NoAction",
+                                                    description = " ")
+    ProcessMissingValueTopTextHTML = widgets.HTML(value = "Method for processing missing values:",
+                                                  placeholder='', description='')
+
+    # Setup UIF to retrieve...
+    StudyIDText = widgets.Text(value = StudyIDs, description = "Study ID (s)",
+                               placeholder = "Type study ID", disabled = False,
+                               layout = widgets.Layout(margin='0 10px 0 0'))
+    RetrieveDataBtn = widgets.Button(description = 'Retrieve Data', disabled = False, button_stype = '',
+                                     tooltip = "Retrieve data for study ID")
+
+    RetrieveDataOutput = widgets.Output()
+    UploadDataOutput = widgets.Output()
+
+    def RetrieveDataBtnEventHandler(Object):
+        _StoreData(None, True)
+
+        StudyIDs = StudyIDText.value
+        MissingValuesMethod = MissingValuesMethodsDropdown.value
+
+        RetrieveDataOutput.clear_output()
+        UploadDataOutput.clear_output()
+        with RetrieveDataOutput:
+            if len(StudyIDs):
+                print("\nProcessing study ID(s): %s" % StudyIDs)
+                StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL, MissingValuesMethod, Cache = Cache)
+                _StoreData(StudiesResultsData, True)
+                DisplayData = False if len(StudiesResultsData.keys()) > 5 else True
+                MWUtil.ListStudiesAnalysisAndResultsData(StudiesResultsData, DisplayDataFrame = DisplayData,
+                                                         IPythonDisplayFuncRef = IPythonDisplay.display, IPythonHTMLFuncRef = IPythonDisplay.HTML)
+            else:
+                print("\nNo study ID(s) specified...")
+
+    RetrieveDataBtn.on_click(RetrieveDataBtnEventHandler)
+
+    # Setup UIF to upload data file(s)...
+    FileUploadBtn = widgets.FileUpload(description = 'Upload File(s)', accept='.csv,.txt,.tsv', multiple = True,
+                                       disabled = False)
+    FileUploadTextHTML = widgets.HTML(value = "<strong>File format:</strong> Col 1: Sample names; \
+                                    Col 2: Class identifiers; Remaining cols: Named metabolites; \
+                                    <strong>Exts: </strong>.csv, .txt, or .tsv", placeholder='', description='')
+
+    def FileUploadBtnEventHandler(Change):
+        _StoreData(None, False)
+
+        MissingValuesMethod = MissingValuesMethodsDropdown.value
+        UploadedDataInfo = FileUploadBtn.value
+
+        RetrieveDataOutput.clear_output()
+        UploadDataOutput.clear_output()
+        with UploadDataOutput:
+            StudiesResultsData = MWUtil.RetrieveUploadedData(UploadedDataInfo, MissingValuesMethod)
+            _StoreData(StudiesResultsData, False)
+            DisplayData = False if len(StudiesResultsData.keys()) > 5 else True
+            MWUtil.ListStudiesAnalysisAndResultsData(StudiesResultsData, DisplayDataFrame = DisplayData,
+                                                     IPythonDisplayFuncRef = IPythonDisplay.display, IPythonHTMLFuncRef = IPythonDisplay.HTML)
+
+    FileUploadBtn.observe(FileUploadBtnEventHandler, names = 'value')
+
+    # Setup UIF to retrieve or upload data file...
+    DataWarningTextHTML = widgets.HTML(value = "<div class='alert alert-warning'><strong>Warning:</strong> Don't re-run the current cell after specifying study ID(s) or selecting file(s) and retrieving the data. Click on the next cell to advance.</div>", placeholder='', description='')
+    OrTextHTML = widgets.HTML(value = "<strong>Or</strong>", placeholder='', description='')
+
+    UIFDataBoxes = []
+    UIFDataBoxes.append(widgets.HBox([TopInfoTextHTML]))
+    UIFDataBoxes.append(widgets.HBox([ProcessMissingValueTopTextHTML, MissingValuesMethodsDropdown]))
+    UIFDataBoxes.append(widgets.HBox([StudyIDText, RetrieveDataBtn],
+                                     layout = widgets.Layout(margin='10px 0 0 0')))
+    UIFDataBoxes.append(widgets.HBox([OrTextHTML]))
+    UIFDataBoxes.append(widgets.HBox([FileUploadBtn]))
+    UIFDataBoxes.append(widgets.HBox([FileUploadTextHTML]))
+    UIFDataBoxes.append(widgets.HBox([DataWarningTextHTML]))
+
+    for UIFDataBox in UIFDataBoxes:
+        IPythonDisplay.display(UIFDataBox)
+
+    IPythonDisplay.display(RetrieveDataOutput)
+    IPythonDisplay.display(UploadDataOutput)
+
+    DataRetrievalUIF["StudyIDText"] = StudyIDText
+    DataRetrievalUIF["MissingValuesMethodsDropdown"] = MissingValuesMethodsDropdown
+    DataRetrievalUIF["RetrieveDataBtn"] = RetrieveDataBtn
+    DataRetrievalUIF["FileUploadBtn"] = FileUploadBtn
+    DataRetrievalUIF["RetrieveDataOutput"] = RetrieveDataOutput
+    DataRetrievalUIF["UploadDataOutput"] = UploadDataOutput
+
+    return DataRetrievalUIF
+
+def DrawScoresPlot(ScoresDataFrame, XColID, YColID, Title, ClassNumColID = "ClassNum",
+                   ColorPaletteName = "bright", PlotStyle = "darkgrid", FontScale = 1.3,
+                   TitleFontWeight = "bold", LabelsFontWeight = "bold",
+                   PlotWidth = 9, PlotHeight = 6):
+    """Draw a scores plot for two components, such as principal components
+    or linear discriminants, with samples colored by class numbers. The
+    markers are styled by class numbers for up to 5 classes.
+
+    Arguments:
+        ScoresDataFrame (panda): Data frame containing class numbers and
+            components.
+        XColID (str): Column ID for component on X axis.
+        YColID (str): Column ID for component on Y axis.
+        Title (str): Plot title.
+        ClassNumColID (str): Class number column ID.
+        ColorPaletteName (str): Color palette name: deep, muted, pastel,
+            bright, dark, or colorblind.
+        PlotStyle (str): Plot style.
+        FontScale (float): Font scale.
+        TitleFontWeight (str): Title font weight.
+        LabelsFontWeight (str): Labels font weight.
+        PlotWidth (float): Plot width.
+        PlotHeight (float): Plot height.
+
+    Examples:
+
+        PCADataFrame, ExplainedVariance = MWMultivariateUtil.GeneratePCAData(DataFrame)
+        MWNotebookUtil.DrawScoresPlot(PCADataFrame, "PC1", "PC2", "PCA Scores Plot")
+
+    """
+
+    sns.set(rc = {'figure.figsize':(PlotWidth, PlotHeight)})
+    sns.set(style = PlotStyle, font_scale = FontScale)
+
+    NumOfClasses = len(ScoresDataFrame[ClassNumColID].unique().tolist())
+    ColorsPalette = sns.color_palette(ColorPaletteName, NumOfClasses)
+
+    StyleColID = ClassNumColID if NumOfClasses <= 5 else None
+    if StyleColID is not None:
+        Axis = sns.scatterplot(x = XColID, y = YColID, hue = ClassNumColID, style = StyleColID,
+                               data = ScoresDataFrame, palette = ColorsPalette, legend = "brief")
+    else:
+        Axis = sns.scatterplot(x = XColID, y = YColID, hue = ClassNumColID, data = ScoresDataFrame,
+                               palette = ColorsPalette, legend = "brief")
+
+    # Set title and labels...
+    Axis.set_title(Title, fontweight = TitleFontWeight)
+    Axis.set_xlabel(XColID, fontweight = LabelsFontWeight)
+    Axis.set_ylabel(YColID, fontweight = LabelsFontWeight)
+
+    # Draw legend outside the plot...
+    plt.legend(bbox_to_anchor = (1.05, 1), loc = 2, borderaxespad = 0.)
+
+    plt.show()
@@ -0,0 +1,224 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import hashlib
+import weakref
+import threading
+import collections
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+__all__ = ["ClearPipelineCache", "GetDataFrameKey", "GetPipelineStageKey", "ListPipelineCacheInfo", "RunPipelineStage", "SetupPipelineCache"]
+
+# Data frame keys tracked by object ID along with weak references...
+_DataFrameKeys = {}
+_DataFrameKeysLock = threading.RLock()
+
+
+def SetupPipelineCache(MaxCacheSize = 256 * 1024 * 1024, MaxEntries = 128):
+    """Setup an in-memory cache for memoizing intermediate stages of analysis
+    pipelines driven by widgets in notebooks.
+
+    Each stage is identified by a key derived from its name, keys for its
+    input stages and values of its parameters. A change in a widget only
+    changes keys for stages downstream of the corresponding parameter.
+    Consequently, only those stages are recomputed and the results of
+    upstream stages are retrieved from the cache. The least recently used
+    stages are evicted once the estimated size of cached results exceeds
+    MaxCacheSize or the number of cached stages exceeds MaxEntries.
+
+    The cached results are shared between calls and must not be modified in
+    place.
+
+    Arguments:
+        MaxCacheSize (int): Maximum size of cached results in bytes.
+        MaxEntries (int): Maximum number of cached stages.
+
+    Returns:
+        dict : A dictionary containing cache information.
+
+    Examples:
+
+        PipelineCache = MWPipeline.SetupPipelineCache()
+
+        DataKey = MWPipeline.GetDataFrameKey(DataFrame)
+        FeaturesKey, FeaturesDataFrame = MWPipeline.RunPipelineStage(PipelineCache, "Features",
+                                             (DataKey,), SetupFeaturesData, DataFrame)
+        NormalizedKey, NormalizedDataFrame = MWPipeline.RunPipelineStage(PipelineCache, "Normalize",
+                                                 (FeaturesKey, Method), NormalizeData, FeaturesDataFrame, Method)
+
+    """
+
+    Cache = {}
+    Cache["MaxCacheSize"] = MaxCacheSize
+    Cache["MaxEntries"] = MaxEntries
+    Cache["Entries"] = collections.OrderedDict()
+    Cache["CacheSize"] = 0
+    Cache["Lock"] = threading.Lock()
+    Cache["Stats"] = {"Hits": 0, "Misses": 0, "Evicted": 0}
+
+    return Cache
+
+def GetDataFrameKey(DataFrame):
+    """Get a key identifying data in a data frame. The key corresponds to a
+    hash of its values, index and columns. It's calculated once for a data
+    frame and is tracked for subsequent calls as long as the data frame is
+    alive. Consequently, the data frame must not be modified in place after
+    retrieving its key.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+
+    Returns:
+        str : Data frame key.
+
+    """
+
+    ObjectID = id(DataFrame)
+    with _DataFrameKeysLock:
+        if ObjectID in _DataFrameKeys:
+            DataFrameRef, Key = _DataFrameKeys[ObjectID]
+            if DataFrameRef() is DataFrame:
+                return Key
+
+    HashValues = pd.util.hash_pandas_object(DataFrame, index = True).to_numpy()
+    Hash = hashlib.sha256(HashValues.tobytes())
+    Hash.update(("\t".join([str(ColID) for ColID in DataFrame.columns])).encode("utf-8"))
+    Key = "DataFrame:%s" % Hash.hexdigest()
+
+    with _DataFrameKeysLock:
+        _DataFrameKeys[ObjectID] = (weakref.ref(DataFrame, lambda Ref, ObjectID = ObjectID: _RemoveDataFrameKey(ObjectID, Ref)), Key)
+
+    return Key
+
+def GetPipelineStageKey(StageName, KeyParts):
+    """Get a key for a pipeline stage from its name, keys for its input
+    stages and values of its parameters.
+
+    Arguments:
+        StageName (str): Name of the stage.
+        KeyParts (tuple): Keys for input stages and parameter values with
+            deterministic string representations.
+
+    Returns:
+        str : Stage key.
+
+    """
+
+    return "%s:%s" % (StageName, hashlib.sha256(repr(KeyParts).encode("utf-8")).hexdigest())
+
+def RunPipelineStage(Cache, StageName, KeyParts, StageFuncRef, *StageFuncArgs, **StageFuncKwargs):
+    """Retrieve results of a pipeline stage from the cache or run the stage
+    function and cache its results. The stage function is only called when
+    the cache doesn't contain results for the stage key.
+
+    Arguments:
+        Cache (dict): Cache information from SetupPipelineCache or None.
+        StageName (str): Name of the stage.
+        KeyParts (tuple): Keys for input stages and parameter values used
+            to derive the stage key.
+        StageFuncRef (function): Reference to a function to run the stage.
+        *StageFuncArgs: Positional arguments for the stage function.
+        **StageFuncKwargs: Keyword arguments for the stage function.
+
+    Returns:
+        str : Stage key.
+        object : Results of the stage.
+
+    """
+
+    StageKey = GetPipelineStageKey(StageName, KeyParts)
+    if Cache is None:
+        return (StageKey, StageFuncRef(*StageFuncArgs, **StageFuncKwargs))
+
+    with Cache["Lock"]:
+        if StageKey in Cache["Entries"]:
+            Cache["Entries"].move_to_end(StageKey)
+            Cache["Stats"]["Hits"] += 1
+            return (StageKey, Cache["Entries"][StageKey][0])
+
+        Cache["Stats"]["Misses"] += 1
+
+    Results = StageFuncRef(*StageFuncArgs, **StageFuncKwargs)
+    _StoreStageResults(Cache, StageKey, Results)
+
+    return (StageKey, Results)
+
+def ClearPipelineCache(Cache):
+    """Remove all cached results.
+
+    Arguments:
+        Cache (dict): Cache information from SetupPipelineCache.
+
+    """
+
+    with Cache["Lock"]:
+        Cache["Entries"].clear()
+        Cache["CacheSize"] = 0
+
+def ListPipelineCacheInfo(Cache):
+    """List information about cached stages and cache usage.
+
+    Arguments:
+        Cache (dict): Cache information from SetupPipelineCache.
+
+    """
+
+    Stats = Cache["Stats"]
+    StageCounts = collections.Counter([StageKey.split(":")[0] for StageKey in Cache["Entries"]])
+
+    print("Cached stages: %d; Max cached stages: %d" % (len(Cache["Entries"]), Cache["MaxEntries"]))
+    print("Cache size: %.2f MB; Max cache size: %.2f MB" % (Cache["CacheSize"] / (1024.0 * 1024.0), Cache["MaxCacheSize"] / (1024.0 * 1024.0)))
+    print("Hits: %d; Misses: %d; Evicted: %d" % (Stats["Hits"], Stats["Misses"], Stats["Evicted"]))
+    if len(StageCounts):
+        print("Stages: %s" % "; ".join(["%s: %d" % (StageName, Count) for StageName, Count in sorted(StageCounts.items())]))
+
+def _StoreStageResults(Cache, StageKey, Results):
+    """Store results of a stage in the cache and evict least recently used
+    stages."""
+
+    Size = _GetObjectSize(Results)
+    if Size > Cache["MaxCacheSize"]:
+        # Too large to cache...
+        return
+
+    with Cache["Lock"]:
+        if StageKey in Cache["Entries"]:
+            Cache["CacheSize"] -= Cache["Entries"][StageKey][1]
+
+        Cache["Entries"][StageKey] = (Results, Size)
+        Cache["Entries"].move_to_end(StageKey)
+        Cache["CacheSize"] += Size
+
+        while len(Cache["Entries"]) > Cache["MaxEntries"] or Cache["CacheSize"] > Cache["MaxCacheSize"]:
+            _, (_, EvictedSize) = Cache["Entries"].popitem(last = False)
+            Cache["CacheSize"] -= EvictedSize
+            Cache["Stats"]["Evicted"] += 1
+
+def _GetObjectSize(Object):
+    """Estimate memory used by results of a stage."""
+
+    if isinstance(Object, pd.DataFrame):
+        return int(Object.memory_usage(index = True, deep = True).sum())
+    elif isinstance(Object, pd.Series):
+        return int(Object.memory_usage(index = True, deep = True))
+    elif isinstance(Object, np.ndarray):
+        return int(Object.nbytes)
+    elif isinstance(Object, (list, tuple)):
+        return sys.getsizeof(Object) + sum([_GetObjectSize(Item) for Item in Object])
+    elif isinstance(Object, dict):
+        return sys.getsizeof(Object) + sum([_GetObjectSize(Item) for Item in Object.values()])
+
+    return sys.getsizeof(Object)
+
+def _RemoveDataFrameKey(ObjectID, DataFrameRef):
+    """Remove key for a data frame no longer alive."""
+
+    with _DataFrameKeysLock:
+        if ObjectID in _DataFrameKeys and _DataFrameKeys[ObjectID][0] is DataFrameRef:
+            del _DataFrameKeys[ObjectID]
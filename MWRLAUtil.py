@@ -0,0 +1,160 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import warnings
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+__all__ = ["CalculateBoxPlotStats", "CalculateRLAValues", "SetupBoxPlotStatsForDrawing"]
+
+
+def CalculateRLAValues(DataFrame, Mode = "WithinClasses", ClassColID = "Class", ClassNumColID = "ClassNum", BlockSize = 4 * 1024 * 1024):
+    """Calculate relative log abundance (RLA) for features data in a
+    dataframe. The features data is log transformed and the median of each
+    feature is subtracted from its values across all samples or within
+    samples for each class. The following modes are supported:
+
+    WithinClasses - Subtract median for class
+    AcrossClasses - Subtract median across all classes
+
+    The features data is copied and log transformed once into a contiguous
+    array. The medians for all classes are calculated in one grouped
+    reduction and are subtracted in place in blocks of rows. The samples
+    retain their original order.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        Mode (str): WithinClasses or AcrossClasses.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID or None.
+        BlockSize (int): Number of values in a block of rows.
+
+    Returns:
+        panda : A data frame containing RLA values for features.
+
+    Examples:
+
+        RLAValuesDataFrame = MWRLAUtil.CalculateRLAValues(DataFrame, Mode = "WithinClasses")
+        BoxPlotStatsDataFrame = MWRLAUtil.CalculateBoxPlotStats(RLAValuesDataFrame)
+
+    """
+
+    TrackColIDs = [ColID for ColID in [ClassColID, ClassNumColID] if ColID is not None and ColID in DataFrame.columns]
+    FeaturesDataFrame = DataFrame.drop(TrackColIDs, axis = 1) if len(TrackColIDs) else DataFrame
+
+    if re.match("^WithinClasses$", Mode, re.I):
+        if ClassNumColID is None or ClassNumColID not in DataFrame.columns:
+            print("***Error: CalculateRLAValues: Class number column, %s, not available for mode %s..." % (ClassNumColID, Mode))
+            return None
+        ClassCodes, Classes = pd.factorize(DataFrame[ClassNumColID])
+    else:
+        ClassCodes = np.zeros(FeaturesDataFrame.shape[0], dtype = np.int64)
+
+    Values = FeaturesDataFrame.to_numpy(dtype = np.float64, copy = True)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        np.log(Values, out = Values)
+
+    # Calculate medians for all classes ignoring missing values...
+    ClassMedians = pd.DataFrame(Values, copy = False).groupby(ClassCodes, sort = True).median().to_numpy()
+
+    NumOfBlockRows = max(1, BlockSize // max(1, Values.shape[1]))
+    for StartRowNum in range(0, Values.shape[0], NumOfBlockRows):
+        EndRowNum = min(StartRowNum + NumOfBlockRows, Values.shape[0])
+        with np.errstate(invalid = "ignore"):
+            Values[StartRowNum:EndRowNum] -= ClassMedians[ClassCodes[StartRowNum:EndRowNum]]
+
+    return pd.DataFrame(Values, index = FeaturesDataFrame.index, columns = FeaturesDataFrame.columns, copy = False)
+
+def CalculateBoxPlotStats(RLAValuesDataFrame, Whis = 1.5, IncludeFliers = True):
+    """Calculate statistics for drawing a box plot for each sample using RLA
+    values for all features. The quartiles are calculated using linear
+    interpolation and the whiskers extend to the most extreme values within
+    Whis times the interquartile range from the quartiles, which matches box
+    plots drawn by matplotlib and seaborn. Missing values are ignored.
+
+    Arguments:
+        RLAValuesDataFrame (panda): A data frame containing RLA values for
+            samples in rows.
+        Whis (float): Multiple of interquartile range for whiskers.
+        IncludeFliers (bool): Include values beyond whiskers.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            sample: Count, Mean, Median, Q1, Q3, Lower Whisker, Upper
+            Whisker and Fliers.
+
+    """
+
+    Values = RLAValuesDataFrame.to_numpy(dtype = np.float64)
+    Values = np.where(np.isinf(Values), np.nan, Values)
+    MissingValuesMask = np.isnan(Values)
+
+    with warnings.catch_warnings():
+        # Samples without any values...
+        warnings.simplefilter("ignore", category = RuntimeWarning)
+        Q1Values, Medians, Q3Values = np.nanpercentile(Values, [25, 50, 75], axis = 1)
+        Means = np.nanmean(Values, axis = 1)
+
+    InterQuartileRanges = Q3Values - Q1Values
+    LowerLimits = (Q1Values - Whis * InterQuartileRanges)[:, np.newaxis]
+    UpperLimits = (Q3Values + Whis * InterQuartileRanges)[:, np.newaxis]
+
+    with np.errstate(invalid = "ignore"):
+        WithinLimitsMask = ~MissingValuesMask & (Values >= LowerLimits) & (Values <= UpperLimits)
+        LowerWhiskers = np.where(WithinLimitsMask, Values, np.inf).min(axis = 1)
+        UpperWhiskers = np.where(WithinLimitsMask, Values, -np.inf).max(axis = 1)
+
+    # Whiskers collapse to quartiles without any values within limits...
+    LowerWhiskers = np.where(np.isinf(LowerWhiskers), Q1Values, LowerWhiskers)
+    UpperWhiskers = np.where(np.isinf(UpperWhiskers), Q3Values, UpperWhiskers)
+
+    BoxPlotStatsDataFrame = pd.DataFrame({"Count": (~MissingValuesMask).sum(axis = 1),
+                                          "Mean": Means,
+                                          "Median": Medians,
+                                          "Q1": Q1Values,
+                                          "Q3": Q3Values,
+                                          "Lower Whisker": LowerWhiskers,
+                                          "Upper Whisker": UpperWhiskers},
+                                         index = RLAValuesDataFrame.index)
+
+    if IncludeFliers:
+        FliersMask = ~MissingValuesMask & ~WithinLimitsMask
+        FlierRowNums, FlierColNums = np.nonzero(FliersMask)
+        FlierValues = np.split(Values[FlierRowNums, FlierColNums], np.cumsum(FliersMask.sum(axis = 1))[:-1])
+        BoxPlotStatsDataFrame["Fliers"] = FlierValues
+
+    return BoxPlotStatsDataFrame
+
+def SetupBoxPlotStatsForDrawing(BoxPlotStatsDataFrame):
+    """Setup a list of dictionaries containing box plot statistics for
+    drawing box plots using bxp method of matplotlib axes.
+
+    Arguments:
+        BoxPlotStatsDataFrame (panda): A data frame generated by
+            CalculateBoxPlotStats.
+
+    Returns:
+        list : A list of dictionaries containing box plot statistics.
+
+    Examples:
+
+        BoxPlotStats = MWRLAUtil.SetupBoxPlotStatsForDrawing(BoxPlotStatsDataFrame)
+        Axes.bxp(BoxPlotStats, showfliers = True, patch_artist = True)
+
+    """
+
+    BoxPlotStats = []
+    HasFliers = "Fliers" in BoxPlotStatsDataFrame.columns
+    for Label, Row in BoxPlotStatsDataFrame.iterrows():
+        BoxPlotStats.append({"label": Label, "mean": Row["Mean"], "med": Row["Median"],
+                             "q1": Row["Q1"], "q3": Row["Q3"],
+                             "whislo": Row["Lower Whisker"], "whishi": Row["Upper Whisker"],
+                             "fliers": Row["Fliers"] if HasFliers else np.array([])})
+
+    return BoxPlotStats
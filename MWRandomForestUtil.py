@@ -0,0 +1,381 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import itertools
+import threading
+import collections
+import concurrent.futures
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+sklearn = MWLazyImport.LazyImport("sklearn", SubModules = ["ensemble", "model_selection", "metrics"])
+
+import MWUtil
+import MWPipeline
+
+__all__ = ["GenerateVIPData", "GenerateVIPStabilityData", "ListRandomForestFitsCacheInfo", "SetupRandomForestFitsCache"]
+
+# Data for tasks set up once for each worker process...
+_WorkerData = {}
+
+
+def SetupRandomForestFitsCache(MaxFits = 256):
+    """Setup an in-memory cache for memoizing random forest fits. The fits are
+    identified by a key consisting of analysis data, class columns, class
+    pair, classifier parameters and random seed. Consequently, changing any plot options
+    doesn't require retraining of random forest models. The least recently
+    used fits are evicted once the number of cached fits exceeds MaxFits.
+
+    Only the results of a fit, consisting of feature importances, their
+    standard deviations across trees and model accuracy, are cached. The
+    fitted trees aren't retained to keep the memory usage and transfer of
+    results from worker processes small.
+
+    Arguments:
+        MaxFits (int): Maximum number of cached fits.
+
+    Returns:
+        dict : A dictionary containing cache information.
+
+    Examples:
+
+        RFFitsCache = MWRandomForestUtil.SetupRandomForestFitsCache()
+        VIPDataFrame, ModelAccuracy = MWRandomForestUtil.GenerateVIPData(DataFrame, 1, 2, Cache = RFFitsCache)
+
+    """
+
+    Cache = {}
+    Cache["MaxFits"] = MaxFits
+    Cache["Fits"] = collections.OrderedDict()
+    Cache["Lock"] = threading.Lock()
+    Cache["Stats"] = {"Hits": 0, "Misses": 0, "Evicted": 0}
+
+    return Cache
+
+def ListRandomForestFitsCacheInfo(Cache):
+    """List information about cached random forest fits and cache usage.
+
+    Arguments:
+        Cache (dict): Cache information from SetupRandomForestFitsCache.
+
+    """
+
+    Stats = Cache["Stats"]
+    print("Cached fits: %d; Max cached fits: %d" % (len(Cache["Fits"]), Cache["MaxFits"]))
+    print("Hits: %d; Misses: %d; Evicted: %d" % (Stats["Hits"], Stats["Misses"], Stats["Evicted"]))
+
+def GenerateVIPData(DataFrame, FirstClassNum, SecondClassNum, ClassNumColID = "ClassNum", ClassColID = "Class", NumOfEstimators = 250, TrainSize = 0.75, RandomSeed = None, NumOfJobs = 1, Cache = None):
+    """Generate variable importance plot (VIP) data using random forest
+    classifier for a pair of classes. The data is split into training and
+    test sets using the specified random seed.
+
+    The results are memoized in the cache for a random seed other than None.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        FirstClassNum (int): First class number.
+        SecondClassNum (int): Second class number.
+        ClassNumColID (str): Class number column ID.
+        ClassColID (str): Class column ID or None.
+        NumOfEstimators (int): Number of trees in the forest.
+        TrainSize (float): Fraction of data used for training.
+        RandomSeed (int): Random seed for splitting data and training or None.
+        NumOfJobs (int): Number of jobs to run in parallel for training
+            trees in the forest. A value of -1 implies all processors.
+        Cache (dict): Cache information from SetupRandomForestFitsCache.
+
+    Returns:
+        panda : A data frame containing variable importance and standard
+            deviation in descending order of variable importance.
+        float : Model accuracy.
+
+    Examples:
+
+        VIPDataFrame, ModelAccuracy = MWRandomForestUtil.GenerateVIPData(DataFrame, 1, 2, NumOfEstimators = 250,
+                                          TrainSize = 0.75, RandomSeed = 42, NumOfJobs = -1, Cache = RFFitsCache)
+
+    """
+
+    XData, yData = _SetupClassPairData(DataFrame, FirstClassNum, SecondClassNum, ClassNumColID, ClassColID)
+
+    CacheKey = None
+    FitResults = None
+    if Cache is not None and RandomSeed is not None:
+        CacheKey = _GetFitCacheKey(MWPipeline.GetDataFrameKey(DataFrame), ClassNumColID, ClassColID, FirstClassNum, SecondClassNum, NumOfEstimators, TrainSize, RandomSeed)
+        FitResults = _GetCachedFit(Cache, CacheKey)
+
+    if FitResults is None:
+        FitResults = _FitRandomForest(XData.to_numpy(), yData.to_numpy(), NumOfEstimators, TrainSize, RandomSeed, NumOfJobs)
+        if CacheKey is not None:
+            _StoreCachedFit(Cache, CacheKey, FitResults)
+
+    FeatureImportances, StandardDeviations, ModelAccuracy = FitResults
+
+    VIPDataFrame = pd.DataFrame({'Variable Importance' : FeatureImportances,
+                                 'Standard Deviation' : StandardDeviations},
+                                index = list(XData.columns.values))
+
+    VIPDataFrame = VIPDataFrame.sort_values(by = ['Variable Importance'], ascending = False)
+
+    return (VIPDataFrame, ModelAccuracy)
+
+def GenerateVIPStabilityData(StudiesResultsData, StudiesUIFData = None, ClassPairs = None, NumOfSplits = 10, StartRandomSeed = 0, ClassNumColID = "ClassNum", ClassColID = "Class", NumOfEstimators = 250, TrainSize = 0.75, NumOfWorkers = 1, NumOfJobs = 1, Cache = None):
+    """Generate stability of variable importance using random forest
+    classifiers trained on repeated random splits of data for pairs of
+    classes in all analysis available in studies results data.
+
+    The random forests for all splits and class pairs are trained across a
+    pool of NumOfWorkers processes and NumOfJobs threads are used for
+    training trees in each forest. The number of processors in use is
+    NumOfWorkers x NumOfJobs. The features data for each analysis is sent
+    once to each worker process and the forests are trained using row indices
+    for class pairs. The random seed for a split corresponds to
+    StartRandomSeed + SplitNum and the results are reproducible irrespective
+    of the number of workers and jobs.
+
+    The feature importances across all splits are aggregated into mean,
+    standard deviation, coefficient of variation and mean rank of each
+    feature. Any fits already present in the cache are reused.
+
+    Arguments:
+        StudiesResultsData (dict): A dictionary containing retrieved data for
+            analysis and results in specified study ID(s).
+        StudiesUIFData (dict): A dictionary containing studies and analysis
+            data for creating UIF. It's used to limit the analysis.
+        ClassPairs (list): A list of (FirstClassNum, SecondClassNum) tuples.
+            Default: All pairs of classes in each analysis.
+        NumOfSplits (int): Number of random splits of data for each pair.
+        StartRandomSeed (int): Random seed for the first split.
+        ClassNumColID (str): Class number column ID.
+        ClassColID (str): Class column ID or None.
+        NumOfEstimators (int): Number of trees in a forest.
+        TrainSize (float): Fraction of data used for training.
+        NumOfWorkers (int): Number of processes for training forests.
+        NumOfJobs (int): Number of jobs to run in parallel for training
+            trees in a forest.
+        Cache (dict): Cache information from SetupRandomForestFitsCache.
+
+    Returns:
+        panda : A long form data frame containing the following columns:
+            StudyID, AnalysisID, FirstClassNum, SecondClassNum, Metabolite,
+            Mean Variable Importance, Standard Deviation, Coefficient of
+            Variation, Mean Rank, Mean Accuracy and Splits.
+
+    Examples:
+
+        VIPStabilityDataFrame = MWRandomForestUtil.GenerateVIPStabilityData(StudiesResultsData, StudiesUIFData,
+                                    NumOfSplits = 25, NumOfWorkers = 4, NumOfJobs = 2, Cache = RFFitsCache)
+
+    """
+
+    # Setup tasks for all splits of class pairs along with features data for
+    # each analysis shared by its class pairs...
+    Tasks = []
+    TasksData = {"AnalysesData": [], "TaskRows": []}
+    for StudyID, AnalysisID in MWUtil.GetStudyAndAnalysisIDs(StudiesResultsData, StudiesUIFData):
+        AnalysisResultsData = StudiesResultsData[StudyID][AnalysisID]
+        if "data_frame" not in AnalysisResultsData:
+            continue
+
+        DataFrame = AnalysisResultsData["data_frame"]
+        DataKey = MWPipeline.GetDataFrameKey(DataFrame) if Cache is not None else None
+
+        FeaturesDataFrame = DataFrame.drop([ColID for ColID in [ClassColID, ClassNumColID] if ColID is not None], axis = 1)
+        ClassNums = DataFrame[ClassNumColID].to_numpy()
+        FeatureNames = list(FeaturesDataFrame.columns.values)
+
+        AnalysisIndex = len(TasksData["AnalysesData"])
+        TasksData["AnalysesData"].append((FeaturesDataFrame.to_numpy(), ClassNums))
+
+        AnalysisClassPairs = ClassPairs
+        if AnalysisClassPairs is None:
+            AnalysisClassPairs = list(itertools.combinations(sorted(DataFrame[ClassNumColID].unique().tolist()), 2))
+
+        for FirstClassNum, SecondClassNum in AnalysisClassPairs:
+            # Rows for first class are followed by rows for second class...
+            RowIndices = np.concatenate([np.flatnonzero(ClassNums == FirstClassNum), np.flatnonzero(ClassNums == SecondClassNum)])
+            TasksData["TaskRows"].append((AnalysisIndex, RowIndices))
+
+            Task = {"StudyID": StudyID, "AnalysisID": AnalysisID, "FirstClassNum": FirstClassNum, "SecondClassNum": SecondClassNum,
+                    "FeatureNames": FeatureNames, "RandomSeeds": [StartRandomSeed + SplitNum for SplitNum in range(NumOfSplits)],
+                    "CacheKeys": [], "FitResults": {}}
+
+            for RandomSeed in Task["RandomSeeds"]:
+                CacheKey = None
+                if Cache is not None:
+                    CacheKey = _GetFitCacheKey(DataKey, ClassNumColID, ClassColID, FirstClassNum, SecondClassNum, NumOfEstimators, TrainSize, RandomSeed)
+                    FitResults = _GetCachedFit(Cache, CacheKey)
+                    if FitResults is not None:
+                        Task["FitResults"][RandomSeed] = FitResults
+                Task["CacheKeys"].append(CacheKey)
+
+            Tasks.append(Task)
+
+    # Train forests for splits missing in the cache...
+    FitArgs = []
+    for TaskIndex, Task in enumerate(Tasks):
+        for RandomSeed in Task["RandomSeeds"]:
+            if RandomSeed not in Task["FitResults"]:
+                FitArgs.append((TaskIndex, RandomSeed))
+
+    NumOfFits = len(FitArgs)
+    NumOfCachedFits = sum([len(Task["FitResults"]) for Task in Tasks])
+    print("Training random forests for %d class pair(s) and %d split(s); Fits: %d; Cached fits: %d..." % (len(Tasks), NumOfSplits, NumOfFits, NumOfCachedFits))
+
+    StartTime = time.time()
+    if NumOfWorkers > 1 and NumOfFits > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = NumOfWorkers, initializer = _InitializeWorker, initargs = (TasksData,)) as Executor:
+            Futures = {}
+            for TaskIndex, RandomSeed in FitArgs:
+                Future = Executor.submit(_FitRandomForestForTask, TaskIndex, RandomSeed, NumOfEstimators, TrainSize, NumOfJobs)
+                Futures[Future] = (TaskIndex, RandomSeed)
+
+            for Future in concurrent.futures.as_completed(Futures):
+                TaskIndex, RandomSeed = Futures[Future]
+                Tasks[TaskIndex]["FitResults"][RandomSeed] = Future.result()
+    else:
+        for TaskIndex, RandomSeed in FitArgs:
+            Tasks[TaskIndex]["FitResults"][RandomSeed] = _FitRandomForestForTask(TaskIndex, RandomSeed, NumOfEstimators, TrainSize, NumOfJobs, TasksData)
+
+    if NumOfFits:
+        ElapsedTime = time.time() - StartTime
+        print("Total time: %.2f sec; Fits/sec: %.2f" % (ElapsedTime, NumOfFits / ElapsedTime if ElapsedTime > 0 else 0.0))
+
+    # Aggregate feature importances across splits...
+    StabilityDataFrames = []
+    for Task in Tasks:
+        if Cache is not None:
+            for RandomSeed, CacheKey in zip(Task["RandomSeeds"], Task["CacheKeys"]):
+                _StoreCachedFit(Cache, CacheKey, Task["FitResults"][RandomSeed])
+
+        StabilityDataFrame = _AggregateFeatureImportances(Task["FeatureNames"], [Task["FitResults"][RandomSeed] for RandomSeed in Task["RandomSeeds"]])
+        StabilityDataFrame.insert(0, "SecondClassNum", Task["SecondClassNum"])
+        StabilityDataFrame.insert(0, "FirstClassNum", Task["FirstClassNum"])
+        StabilityDataFrame.insert(0, "AnalysisID", Task["AnalysisID"])
+        StabilityDataFrame.insert(0, "StudyID", Task["StudyID"])
+
+        StabilityDataFrames.append(StabilityDataFrame)
+
+    if len(StabilityDataFrames) == 0:
+        return pd.DataFrame(columns = ["StudyID", "AnalysisID", "FirstClassNum", "SecondClassNum", "Metabolite", "Mean Variable Importance", "Standard Deviation", "Coefficient of Variation", "Mean Rank", "Mean Accuracy", "Splits"])
+
+    return pd.concat(StabilityDataFrames, axis = 0, ignore_index = True)
+
+def _AggregateFeatureImportances(FeatureNames, FitResultsList):
+    """Aggregate feature importances across fits for random splits."""
+
+    FeatureImportances = np.vstack([FitResults[0] for FitResults in FitResultsList])
+    ModelAccuracies = np.array([FitResults[2] for FitResults in FitResultsList])
+
+    # Rank 1 corresponds to the most important feature in a split...
+    Ranks = np.empty_like(FeatureImportances)
+    SortedIndices = np.argsort(-FeatureImportances, axis = 1, kind = "mergesort")
+    np.put_along_axis(Ranks, SortedIndices, np.arange(1, FeatureImportances.shape[1] + 1, dtype = np.float64)[np.newaxis, :], axis = 1)
+
+    MeanImportances = FeatureImportances.mean(axis = 0)
+    StandardDeviations = FeatureImportances.std(axis = 0, ddof = 1) if FeatureImportances.shape[0] > 1 else np.zeros(FeatureImportances.shape[1])
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        CoefficientsOfVariation = np.where(MeanImportances > 0, StandardDeviations / MeanImportances, np.nan)
+
+    StabilityDataFrame = pd.DataFrame({"Metabolite": FeatureNames,
+                                       "Mean Variable Importance": MeanImportances,
+                                       "Standard Deviation": StandardDeviations,
+                                       "Coefficient of Variation": CoefficientsOfVariation,
+                                       "Mean Rank": Ranks.mean(axis = 0),
+                                       "Mean Accuracy": ModelAccuracies.mean(),
+                                       "Splits": len(FitResultsList)})
+
+    StabilityDataFrame = StabilityDataFrame.sort_values(by = ["Mean Variable Importance"], ascending = False, kind = "mergesort")
+
+    return StabilityDataFrame
+
+def _InitializeWorker(TasksData):
+    """Setup features data for tasks once for a worker process."""
+
+    _WorkerData["TasksData"] = TasksData
+
+def _FitRandomForestForTask(TaskIndex, RandomSeed, NumOfEstimators, TrainSize, NumOfJobs = 1, TasksData = None):
+    """Train a random forest for a split of data for a class pair task."""
+
+    if TasksData is None:
+        TasksData = _WorkerData["TasksData"]
+
+    AnalysisIndex, RowIndices = TasksData["TaskRows"][TaskIndex]
+    XData, yData = TasksData["AnalysesData"][AnalysisIndex]
+
+    return _FitRandomForest(XData[RowIndices], yData[RowIndices], NumOfEstimators, TrainSize, RandomSeed, NumOfJobs)
+
+def _FitRandomForest(XData, yData, NumOfEstimators, TrainSize, RandomSeed, NumOfJobs = 1):
+    """Split data, train a random forest classifier and return feature
+    importances, their standard deviations across trees and model accuracy."""
+
+    # Split X and y data for training and testing...
+    TestSize = 1 - TrainSize
+    XDataTrain, XDataTest, yDataTrain, yDataTest = sklearn.model_selection.train_test_split(XData, yData, test_size = TestSize, train_size = TrainSize,
+                                                                                         random_state = RandomSeed, shuffle = True)
+    # Setup a classifier and train the model...
+    RFC = sklearn.ensemble.RandomForestClassifier(n_estimators = NumOfEstimators, random_state = RandomSeed, n_jobs = NumOfJobs)
+    RFC.fit(XDataTrain, yDataTrain)
+
+    # Calculate accuracy of the model...
+    yDataPredict = RFC.predict(XDataTest)
+    ModelAccuracy = sklearn.metrics.accuracy_score(yDataTest, yDataPredict)
+
+    # Calculate standard deviation for feature importance values...
+    FeatureImportances = RFC.feature_importances_
+    StandardDeviations = np.std([Tree.feature_importances_ for Tree in RFC.estimators_], axis = 0)
+
+    return (FeatureImportances, StandardDeviations, ModelAccuracy)
+
+def _SetupClassPairData(DataFrame, FirstClassNum, SecondClassNum, ClassNumColID = "ClassNum", ClassColID = "Class"):
+    """Setup X and y data for a pair of classes."""
+
+    # Drop Class column...
+    if ClassColID is not None:
+        DataFrame = DataFrame.drop(ClassColID, axis = 1)
+
+    # Extract data for two specified classes...
+    ClassDataA = DataFrame[DataFrame[ClassNumColID] == FirstClassNum]
+    ClassDataB = DataFrame[DataFrame[ClassNumColID] == SecondClassNum]
+    ClassData = pd.concat([ClassDataA, ClassDataB])
+
+    # Retrieve X and y data...
+    XData = ClassData.drop(ClassNumColID, axis = 1)
+    yData = ClassData[ClassNumColID]
+
+    return (XData, yData)
+
+def _GetFitCacheKey(DataKey, ClassNumColID, ClassColID, FirstClassNum, SecondClassNum, NumOfEstimators, TrainSize, RandomSeed):
+    """Get cache key for a random forest fit."""
+
+    return (DataKey, ClassNumColID, ClassColID, FirstClassNum, SecondClassNum, NumOfEstimators, TrainSize, RandomSeed)
+
+def _GetCachedFit(Cache, CacheKey):
+    """Get a cached fit and mark it as most recently used."""
+
+    with Cache["Lock"]:
+        if CacheKey in Cache["Fits"]:
+            Cache["Fits"].move_to_end(CacheKey)
+            Cache["Stats"]["Hits"] += 1
+            return Cache["Fits"][CacheKey]
+
+        Cache["Stats"]["Misses"] += 1
+
+    return None
+
+def _StoreCachedFit(Cache, CacheKey, FitResults):
+    """Store a fit in the cache and evict least recently used fits."""
+
+    with Cache["Lock"]:
+        Cache["Fits"][CacheKey] = FitResults
+        Cache["Fits"].move_to_end(CacheKey)
+
+        while len(Cache["Fits"]) > Cache["MaxFits"]:
+            Cache["Fits"].popitem(last = False)
+            Cache["Stats"]["Evicted"] += 1
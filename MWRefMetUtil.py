@@ -0,0 +1,410 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import json
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+import MWUtil
+
+__all__ = ["AnnotateMZValues", "LoadRefMetIndex", "LookupRefMetFormulas", "LookupRefMetNames", "RetrieveRefMetData", "SaveRefMetIndex", "SetupRefMetIndex"]
+
+# Monoisotopic masses used for calculating m/z values of ion types...
+_ProtonMass = 1.007276
+_ElectronMass = 0.000549
+_WaterMass = 18.010565
+_AcetonitrileMass = 41.026549
+_SodiumFormateMass = 67.987424
+_AmmoniumFormateMass = 63.032028
+
+# Ion types along with their number of molecules, mass change and charge. The
+# m/z value for an ion type corresponds to (NumOfMolecules * M + MassChange) / abs(Charge).
+# The ion types for derivatized molecules, M.CH3, M.TMSi and M.tBuDMSi, aren't
+# included.
+IonTypesInfo = {
+    "M+H": (1, _ProtonMass, 1),
+    "M+H-H2O": (1, _ProtonMass - _WaterMass, 1),
+    "M+2H": (1, 2 * _ProtonMass, 2),
+    "M+3H": (1, 3 * _ProtonMass, 3),
+    "M+4H": (1, 4 * _ProtonMass, 4),
+    "M+K": (1, 38.963158, 1),
+    "M+2K": (1, 2 * 38.963158, 2),
+    "M+Na": (1, 22.989218, 1),
+    "M+2Na": (1, 2 * 22.989218, 2),
+    "M+Li": (1, 7.015455, 1),
+    "M+2Li": (1, 2 * 7.015455, 2),
+    "M+NH4": (1, 18.033823, 1),
+    "M+H+CH3CN": (1, _ProtonMass + _AcetonitrileMass, 1),
+    "M+Na+CH3CN": (1, 22.989218 + _AcetonitrileMass, 1),
+    "M.NaFormate+H": (1, _SodiumFormateMass + _ProtonMass, 1),
+    "M.NH4Formate+H": (1, _AmmoniumFormateMass + _ProtonMass, 1),
+    "M-H": (1, -_ProtonMass, -1),
+    "M-H-H2O": (1, -_ProtonMass - _WaterMass, -1),
+    "M+Na-2H": (1, 22.989218 - 2 * _ProtonMass, -1),
+    "M+K-2H": (1, 38.963158 - 2 * _ProtonMass, -1),
+    "M-2H": (1, -2 * _ProtonMass, -2),
+    "M-3H": (1, -3 * _ProtonMass, -3),
+    "M-4H": (1, -4 * _ProtonMass, -4),
+    "M.Cl": (1, 34.968853 + _ElectronMass, -1),
+    "M.F": (1, 18.998403 + _ElectronMass, -1),
+    "M.HF2": (1, 39.004631 + _ElectronMass, -1),
+    "M.OAc": (1, 59.013851, -1),
+    "M.Formate": (1, 44.998201, -1),
+    "M.NaFormate-H": (1, _SodiumFormateMass - _ProtonMass, -1),
+    "M.NH4Formate-H": (1, _AmmoniumFormateMass - _ProtonMass, -1),
+    "Neutral": (1, 0.0, 1),
+}
+
+
+def RetrieveRefMetData(MWBaseURL = "https://www.metabolomicsworkbench.org/rest", Cache = None, MaxRetries = 3, RetryBackoffFactor = 0.5, Timeout = 120):
+    """Retrieve all available RefMet data using MW REST API and set up a data
+    frame containing a row for each RefMet entry. The exact masses are
+    converted to numeric values.
+
+    The request is retried up to MaxRetries times with an exponential backoff
+    for status codes 429 or 5xx, connection errors and timeouts.
+
+    A cache set up using MWCache.SetupRESTCache may be specified to reuse
+    the bulk RefMet data across sessions.
+
+    Arguments:
+        MWBaseURL (str): REST URL base for MW.
+        Cache (dict): REST cache information from MWCache.SetupRESTCache.
+        MaxRetries (int): Maximum number of retries for a failed request.
+        RetryBackoffFactor (float): Backoff factor in seconds for retries.
+        Timeout (float): Timeout in seconds for connecting to the server and
+            for waiting between bytes of the response.
+
+    Returns:
+        panda : A data frame containing RefMet data or None.
+
+    Examples:
+
+        RefMetDataFrame = MWRefMetUtil.RetrieveRefMetData(MWBaseURL)
+        RefMetIndex = MWRefMetUtil.SetupRefMetIndex(RefMetDataFrame)
+        MWRefMetUtil.SaveRefMetIndex(RefMetIndex, "RefMetData.arrow")
+
+    """
+
+    MWDataURL = MWBaseURL + "/refmet/all"
+
+    MWUtil._PrintMessage("Retrieving RefMet data: %s" % MWDataURL)
+    Session = MWUtil._SetupRequestsSession()
+    try:
+        Response = MWUtil._RetrieveURLUsingCache(Session, MWDataURL, MWUtil._SetupHostSemaphores(1), MaxRetries, RetryBackoffFactor, Cache, Timeout)
+    finally:
+        Session.close()
+
+    if Response is None or Response.status_code != 200:
+        print("***Error: Request failed: status_code: %s" % (Response.status_code if Response is not None else "NA"))
+        return None
+
+    Results = Response.json()
+    if isinstance(Results, dict):
+        Results = [Results[ResultNum] for ResultNum in Results]
+
+    RefMetDataFrame = pd.DataFrame.from_records(Results)
+    if "exactmass" in RefMetDataFrame.columns:
+        RefMetDataFrame["exactmass"] = pd.to_numeric(RefMetDataFrame["exactmass"], errors = "coerce")
+
+    MWUtil._PrintMessage("Number of RefMet entries: %d" % RefMetDataFrame.shape[0])
+
+    return RefMetDataFrame
+
+def SetupRefMetIndex(RefMetDataFrame, IonTypes = None, NameColID = "name", FormulaColID = "formula", ExactMassColID = "exactmass"):
+    """Setup an index for performing m/z, name and formula searches against
+    RefMet data locally.
+
+    The RefMet entries with exact masses are sorted by exact mass and the m/z
+    values for all specified ion types are precomputed for the sorted
+    entries. Consequently, the entries within a m/z tolerance window are
+    found using a binary search. The names and formulas are indexed using
+    hash tables for batched lookups.
+
+    Arguments:
+        RefMetDataFrame (panda): A data frame containing RefMet data.
+        IonTypes (list): Ion types for precomputing m/z values. Default:
+            All ion types in IonTypesInfo.
+        NameColID (str): Name column ID.
+        FormulaColID (str): Formula column ID.
+        ExactMassColID (str): Exact mass column ID.
+
+    Returns:
+        dict : A dictionary containing RefMet index.
+
+    """
+
+    if IonTypes is None:
+        IonTypes = list(IonTypesInfo.keys())
+
+    for IonType in IonTypes:
+        if IonType not in IonTypesInfo:
+            print("***Error: SetupRefMetIndex: Unknown ion type: %s" % IonType)
+            return None
+
+    # Sort entries by exact mass and drop entries without exact masses...
+    ExactMasses = pd.to_numeric(RefMetDataFrame[ExactMassColID], errors = "coerce").to_numpy(dtype = np.float64)
+    SortedIndices = np.argsort(ExactMasses, kind = "mergesort")
+    SortedIndices = SortedIndices[~np.isnan(ExactMasses[SortedIndices])]
+
+    DataFrame = RefMetDataFrame.iloc[SortedIndices].reset_index(drop = True)
+    SortedExactMasses = ExactMasses[SortedIndices]
+
+    RefMetIndex = {}
+    RefMetIndex["DataFrame"] = DataFrame
+    RefMetIndex["ColIDs"] = {"Name": NameColID, "Formula": FormulaColID, "ExactMass": ExactMassColID}
+    RefMetIndex["ExactMasses"] = SortedExactMasses
+
+    # Precompute m/z values for ion types in ascending order of exact masses...
+    RefMetIndex["IonTypes"] = list(IonTypes)
+    RefMetIndex["IonMZValues"] = {}
+    for IonType in IonTypes:
+        NumOfMolecules, MassChange, Charge = IonTypesInfo[IonType]
+        RefMetIndex["IonMZValues"][IonType] = (NumOfMolecules * SortedExactMasses + MassChange) / abs(Charge)
+
+    # Setup hash indices for names and formulas...
+    RefMetIndex["NameIndex"] = None
+    if NameColID in DataFrame.columns:
+        Names = DataFrame[NameColID].astype(str).str.lower()
+        RefMetIndex["NameIndex"] = pd.Series(np.arange(len(Names)), index = Names.to_numpy())
+        RefMetIndex["NameIndex"] = RefMetIndex["NameIndex"][~RefMetIndex["NameIndex"].index.duplicated(keep = "first")]
+
+    RefMetIndex["FormulaIndex"] = None
+    if FormulaColID in DataFrame.columns:
+        # Group entries by formula codes...
+        FormulaCodes, UniqueFormulas = pd.factorize(DataFrame[FormulaColID].astype(str))
+        Counts = np.bincount(FormulaCodes, minlength = len(UniqueFormulas))
+        RefMetIndex["FormulaIndex"] = {"Formulas": pd.Index(UniqueFormulas), "EntryNums": np.argsort(FormulaCodes, kind = "mergesort"), "Starts": np.cumsum(Counts) - Counts, "Counts": Counts}
+
+    return RefMetIndex
+
+def AnnotateMZValues(RefMetIndex, MZValues, IonTypes = "M+H", Tolerance = 0.01, ToleranceUnits = "Da"):
+    """Annotate m/z values using RefMet entries within a tolerance window for
+    specified ion types. All m/z values are searched together using binary
+    searches against the precomputed m/z values for each ion type.
+
+    Arguments:
+        RefMetIndex (dict): RefMet index from SetupRefMetIndex.
+        MZValues (list): A list or an array of m/z values.
+        IonTypes (str or list): Ion type or a list of ion types.
+        Tolerance (float): Mass tolerance.
+        ToleranceUnits (str): Da or ppm.
+
+    Returns:
+        panda : A long form data frame containing a row for each match
+            along with the following columns: QueryNum, QueryMZ, IonType,
+            IonMZ and DeltaMZ followed by columns for RefMet data.
+
+    Examples:
+
+        RefMetIndex = MWRefMetUtil.LoadRefMetIndex("RefMetData.arrow")
+        AnnotationsDataFrame = MWRefMetUtil.AnnotateMZValues(RefMetIndex, [635.52, 760.58],
+                                   IonTypes = ["M+H", "M+Na"], Tolerance = 0.01)
+
+    """
+
+    if isinstance(IonTypes, str):
+        IonTypes = [IonTypes]
+
+    MZValues = np.asarray(MZValues, dtype = np.float64).ravel()
+
+    if re.match("^ppm$", ToleranceUnits, re.I):
+        Tolerances = MZValues * Tolerance * 1e-6
+    elif re.match("^Da$", ToleranceUnits, re.I):
+        Tolerances = np.full(MZValues.shape, Tolerance, dtype = np.float64)
+    else:
+        print("***Error: AnnotateMZValues: Unknown tolerance units: %s" % ToleranceUnits)
+        return None
+
+    QueryNumsList, EntryNumsList, IonTypesList = [], [], []
+    for IonType in IonTypes:
+        if IonType not in RefMetIndex["IonMZValues"]:
+            print("***Warning: AnnotateMZValues: Ion type, %s, not available in RefMet index..." % IonType)
+            continue
+
+        IonMZValues = RefMetIndex["IonMZValues"][IonType]
+        StartPositions = np.searchsorted(IonMZValues, MZValues - Tolerances, side = "left")
+        EndPositions = np.searchsorted(IonMZValues, MZValues + Tolerances, side = "right")
+
+        QueryNums, EntryNums = _ExpandRanges(StartPositions, np.maximum(EndPositions - StartPositions, 0))
+
+        QueryNumsList.append(QueryNums)
+        EntryNumsList.append(EntryNums)
+        IonTypesList.append(np.full(len(EntryNums), IonType, dtype = object))
+
+    if len(QueryNumsList):
+        QueryNums = np.concatenate(QueryNumsList)
+        EntryNums = np.concatenate(EntryNumsList)
+        MatchIonTypes = np.concatenate(IonTypesList)
+    else:
+        QueryNums, EntryNums, MatchIonTypes = np.array([], dtype = int), np.array([], dtype = int), np.array([], dtype = object)
+
+    IonMZValues = np.empty(len(EntryNums), dtype = np.float64)
+    for IonType in set(MatchIonTypes.tolist()):
+        IonTypeMask = MatchIonTypes == IonType
+        IonMZValues[IonTypeMask] = RefMetIndex["IonMZValues"][IonType][EntryNums[IonTypeMask]]
+
+    AnnotationsDataFrame = RefMetIndex["DataFrame"].iloc[EntryNums].reset_index(drop = True)
+    AnnotationsDataFrame.insert(0, "DeltaMZ", IonMZValues - MZValues[QueryNums])
+    AnnotationsDataFrame.insert(0, "IonMZ", IonMZValues)
+    AnnotationsDataFrame.insert(0, "IonType", MatchIonTypes)
+    AnnotationsDataFrame.insert(0, "QueryMZ", MZValues[QueryNums])
+    AnnotationsDataFrame.insert(0, "QueryNum", QueryNums)
+
+    # Order matches by query and closeness of m/z values...
+    SortedIndices = np.lexsort((np.abs(AnnotationsDataFrame["DeltaMZ"].to_numpy()), QueryNums))
+
+    return AnnotationsDataFrame.iloc[SortedIndices].reset_index(drop = True)
+
+def LookupRefMetNames(RefMetIndex, Names):
+    """Lookup RefMet entries for a list of names. The names are matched
+    ignoring case.
+
+    Arguments:
+        RefMetIndex (dict): RefMet index from SetupRefMetIndex.
+        Names (list): A list of names.
+
+    Returns:
+        panda : A data frame containing a row for each name in the order of
+            specified names. The RefMet data for names without any matches
+            correspond to missing values.
+
+    """
+
+    if RefMetIndex["NameIndex"] is None:
+        print("***Error: LookupRefMetNames: Names not available in RefMet index...")
+        return None
+
+    Names = list(Names)
+    NameIndex = RefMetIndex["NameIndex"]
+    Positions = NameIndex.index.get_indexer([str(Name).lower() for Name in Names])
+    EntryNums = NameIndex.to_numpy()[np.maximum(Positions, 0)]
+
+    LookupDataFrame = RefMetIndex["DataFrame"].iloc[EntryNums].reset_index(drop = True)
+    if np.any(Positions < 0):
+        LookupDataFrame = LookupDataFrame.astype(object)
+        LookupDataFrame.loc[Positions < 0, :] = np.nan
+    LookupDataFrame.insert(0, "QueryName", Names)
+
+    return LookupDataFrame
+
+def LookupRefMetFormulas(RefMetIndex, Formulas):
+    """Lookup RefMet entries for a list of formulas.
+
+    Arguments:
+        RefMetIndex (dict): RefMet index from SetupRefMetIndex.
+        Formulas (list): A list of formulas.
+
+    Returns:
+        panda : A long form data frame containing a row for each matching
+            entry along with QueryNum and QueryFormula columns.
+
+    """
+
+    if RefMetIndex["FormulaIndex"] is None:
+        print("***Error: LookupRefMetFormulas: Formulas not available in RefMet index...")
+        return None
+
+    Formulas = list(Formulas)
+    FormulaIndex = RefMetIndex["FormulaIndex"]
+    Codes = FormulaIndex["Formulas"].get_indexer([str(Formula) for Formula in Formulas])
+    Found = Codes >= 0
+
+    QueryNums, Positions = _ExpandRanges(np.where(Found, FormulaIndex["Starts"][np.maximum(Codes, 0)], 0), np.where(Found, FormulaIndex["Counts"][np.maximum(Codes, 0)], 0))
+    EntryNums = FormulaIndex["EntryNums"][Positions]
+
+    LookupDataFrame = RefMetIndex["DataFrame"].iloc[EntryNums].reset_index(drop = True)
+    LookupDataFrame.insert(0, "QueryFormula", [Formulas[QueryNum] for QueryNum in QueryNums])
+    LookupDataFrame.insert(0, "QueryNum", QueryNums)
+
+    return LookupDataFrame
+
+def SaveRefMetIndex(RefMetIndex, OutputFile):
+    """Save RefMet data in a RefMet index to an uncompressed Arrow IPC
+    (Feather) file. The data is saved in ascending order of exact masses and
+    is memory-mapped by LoadRefMetIndex. This functionality requires pyarrow
+    module.
+
+    Arguments:
+        RefMetIndex (dict): RefMet index from SetupRefMetIndex.
+        OutputFile (str): Output file name.
+
+    Returns:
+        bool : True on success; Otherwise, False.
+
+    """
+
+    try:
+        import pyarrow as pa
+        import pyarrow.feather
+    except ImportError:
+        print("***Error: SaveRefMetIndex: Saving RefMet data requires pyarrow module...")
+        return False
+
+    MWUtil._PrintMessage("Saving RefMet data to file %s..." % OutputFile)
+
+    DataTable = pa.Table.from_pandas(RefMetIndex["DataFrame"], preserve_index = False)
+    DataTable = DataTable.replace_schema_metadata(dict(list((DataTable.schema.metadata or {}).items()) + [(b"MWRefMetColIDs", json.dumps(RefMetIndex["ColIDs"]).encode("utf-8"))]))
+    pyarrow.feather.write_feather(DataTable, OutputFile, compression = "uncompressed")
+
+    return True
+
+def LoadRefMetIndex(InputFile, IonTypes = None, MemoryMap = True):
+    """Load RefMet data saved using SaveRefMetIndex and set up a RefMet index
+    for performing searches offline.
+
+    Arguments:
+        InputFile (str): Input file name.
+        IonTypes (list): Ion types for precomputing m/z values. Default:
+            All ion types in IonTypesInfo.
+        MemoryMap (bool): Memory-map input file.
+
+    Returns:
+        dict : A dictionary containing RefMet index or None.
+
+    """
+
+    if not os.path.isfile(InputFile):
+        print("***Error: LoadRefMetIndex: RefMet data file doesn't exist: %s" % InputFile)
+        return None
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("***Error: LoadRefMetIndex: Loading RefMet data requires pyarrow module...")
+        return None
+
+    Source = pa.memory_map(InputFile, "r") if MemoryMap else pa.OSFile(InputFile, "rb")
+    DataTable = pa.ipc.open_file(Source).read_all()
+
+    ColIDs = {"Name": "name", "Formula": "formula", "ExactMass": "exactmass"}
+    Metadata = DataTable.schema.metadata or {}
+    if b"MWRefMetColIDs" in Metadata:
+        try:
+            ColIDs = json.loads(Metadata[b"MWRefMetColIDs"].decode("utf-8"))
+        except ValueError:
+            ColIDs = None
+
+        if not (isinstance(ColIDs, dict) and all([isinstance(ColIDs.get(ColType), str) for ColType in ["Name", "Formula", "ExactMass"]])):
+            print("***Error: LoadRefMetIndex: Invalid RefMet column IDs in file: %s" % InputFile)
+            return None
+
+    RefMetDataFrame = DataTable.to_pandas(split_blocks = True)
+
+    return SetupRefMetIndex(RefMetDataFrame, IonTypes = IonTypes, NameColID = ColIDs["Name"], FormulaColID = ColIDs["Formula"], ExactMassColID = ColIDs["ExactMass"])
+
+def _ExpandRanges(Starts, Counts):
+    """Expand ranges of positions for queries into query numbers and
+    positions for all matches."""
+
+    NumOfMatches = int(Counts.sum())
+    QueryNums = np.repeat(np.arange(len(Starts)), Counts)
+    Offsets = np.arange(NumOfMatches) - np.repeat(np.cumsum(Counts) - Counts, Counts)
+
+    return (QueryNums, np.repeat(Starts, Counts) + Offsets)
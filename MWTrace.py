@@ -0,0 +1,320 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import json
+import threading
+import tracemalloc
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+__all__ = ["BeginStage", "EndStage", "GetTraceDataFrame", "GetTraceSummary", "IsTraceActive", "SaveTrace", "SetTraceContext", "StartTrace", "StopTrace"]
+
+# Active trace or None. The instrumented code only checks this value when
+# tracing is disabled...
+_ActiveTrace = None
+
+# Context labels, such as study and analysis IDs, tracked for each thread...
+_ThreadContext = threading.local()
+
+_TraceColIDs = ["Stage", "Context", "Label", "Start Time", "Wall Time", "Bytes", "Rows", "Columns", "Memory Delta", "Peak Memory Delta", "Thread"]
+
+
+def StartTrace(TrackMemory = True):
+    """Start recording structured timing and memory information for stages
+    of the MWUtil data path. The following stages are recorded:
+
+    HTTPFetch - Retrieve a REST response
+    FileRead - Read a local data file
+    Normalize - Encode datatable text and scan its lines
+    Parse - Parse datatable text into a data frame
+    Coerce - Coerce data frame column values to numerical values
+    MissingValues - Process missing values
+    UIFSetup - Setup data for creating UIF
+
+    The wall time, number of bytes processed, number of rows and columns in
+    the resulting data frame and change in memory are recorded for each
+    stage. The memory change corresponds to Python memory allocations
+    tracked by tracemalloc module and it's only recorded when TrackMemory is
+    True. The peak memory delta is the largest increase in allocated memory
+    during a stage over the memory allocated at its start. Allocations made
+    by other threads during a stage, such as concurrent REST requests, are
+    included. The memory isn't tracked for HTTPFetch stages.
+
+    The peak of allocated memory tracked by tracemalloc module is global to
+    the process. Consequently, the peak memory delta is only recorded for
+    stages which don't overlap other memory tracked stages, and it's set to
+    None for overlapping stages, such as stages running concurrently in
+    multiple threads.
+
+    The tracing is disabled by default and instrumented code only checks
+    whether a trace is active. The tracemalloc module slows down allocations
+    of Python objects while a trace is active.
+
+    Arguments:
+        TrackMemory (bool): Track memory allocations using tracemalloc.
+
+    Returns:
+        dict : A dictionary containing trace information.
+
+    Examples:
+
+        MWTrace.StartTrace()
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL)
+        Trace = MWTrace.StopTrace()
+
+        TraceDataFrame = MWTrace.GetTraceDataFrame(Trace)
+        display(MWTrace.GetTraceSummary(Trace))
+        MWTrace.SaveTrace("MWTrace.json", Trace)
+
+    """
+
+    global _ActiveTrace
+
+    if _ActiveTrace is not None:
+        print("***Warning: StartTrace: Stopping active trace...")
+        StopTrace()
+
+    Trace = {}
+    Trace["StartTime"] = time.time()
+    Trace["Timestamp"] = time.asctime()
+    Trace["TrackMemory"] = TrackMemory
+    Trace["StartedTracemalloc"] = False
+    Trace["Lock"] = threading.Lock()
+    Trace["Stages"] = []
+    Trace["MemoryStages"] = {}
+
+    if TrackMemory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        Trace["StartedTracemalloc"] = True
+
+    _ActiveTrace = Trace
+
+    return Trace
+
+def StopTrace():
+    """Stop recording stages for the active trace.
+
+    Returns:
+        dict : A dictionary containing trace information or None.
+
+    """
+
+    global _ActiveTrace
+
+    Trace = _ActiveTrace
+    if Trace is None:
+        print("***Warning: StopTrace: No active trace...")
+        return None
+
+    _ActiveTrace = None
+    Trace["EndTime"] = time.time()
+
+    if Trace["StartedTracemalloc"]:
+        tracemalloc.stop()
+        Trace["StartedTracemalloc"] = False
+
+    return Trace
+
+def IsTraceActive():
+    """Check whether a trace is active.
+
+    Returns:
+        bool : True or False.
+
+    """
+
+    return _ActiveTrace is not None
+
+def SetTraceContext(Context):
+    """Set a context label, such as study and analysis IDs, for stages
+    subsequently recorded by the current thread.
+
+    Arguments:
+        Context (str): Context label or None.
+
+    """
+
+    if _ActiveTrace is None:
+        return
+
+    _ThreadContext.Context = Context
+
+def BeginStage(StageName, Label = None, TrackMemory = True):
+    """Begin recording a stage for the active trace. Nothing is recorded
+    without an active trace.
+
+    Arguments:
+        StageName (str): Name of the stage.
+        Label (str): Label for the stage, such as a URL or file name.
+        TrackMemory (bool): Track memory for the stage.
+
+    Returns:
+        dict : A dictionary containing stage information or None.
+
+    Examples:
+
+        TraceStage = MWTrace.BeginStage("Parse")
+        DataFrame = ParseDataTable(DataTable)
+        MWTrace.EndStage(TraceStage, Bytes = len(DataTable), DataFrame = DataFrame)
+
+    """
+
+    Trace = _ActiveTrace
+    if Trace is None:
+        return None
+
+    TraceStage = {"Trace": Trace, "Stage": StageName, "Context": getattr(_ThreadContext, "Context", None), "Label": Label, "Thread": threading.current_thread().name}
+
+    TraceStage["StartMemory"] = None
+    TraceStage["Overlapped"] = False
+    if TrackMemory and Trace["TrackMemory"] and tracemalloc.is_tracing():
+        with Trace["Lock"]:
+            # Peak memory is global to the process and it's only reset in the
+            # absence of any other memory tracked stages...
+            if len(Trace["MemoryStages"]):
+                TraceStage["Overlapped"] = True
+                for ActiveTraceStage in Trace["MemoryStages"].values():
+                    ActiveTraceStage["Overlapped"] = True
+            else:
+                tracemalloc.reset_peak()
+            
+            TraceStage["StartMemory"] = tracemalloc.get_traced_memory()[0]
+            Trace["MemoryStages"][id(TraceStage)] = TraceStage
+
+    TraceStage["StartTime"] = time.time()
+
+    return TraceStage
+
+def EndStage(TraceStage, Bytes = None, DataFrame = None, Rows = None, Columns = None):
+    """End recording a stage started by BeginStage. The number of rows and
+    columns are retrieved from a data frame, if specified.
+
+    Arguments:
+        TraceStage (dict): Stage information from BeginStage or None.
+        Bytes (int): Number of bytes transferred or processed.
+        DataFrame (panda): Data frame resulting from the stage.
+        Rows (int): Number of rows.
+        Columns (int): Number of columns.
+
+    """
+
+    if TraceStage is None:
+        return
+
+    EndTime = time.time()
+    Trace = TraceStage["Trace"]
+
+    MemoryDelta = None
+    PeakMemoryDelta = None
+    if TraceStage["StartMemory"] is not None:
+        with Trace["Lock"]:
+            Trace["MemoryStages"].pop(id(TraceStage), None)
+            if tracemalloc.is_tracing():
+                CurrentMemory, PeakMemory = tracemalloc.get_traced_memory()
+                MemoryDelta = CurrentMemory - TraceStage["StartMemory"]
+                if not TraceStage["Overlapped"]:
+                    PeakMemoryDelta = max(PeakMemory - TraceStage["StartMemory"], 0)
+
+    if DataFrame is not None:
+        Rows, Columns = DataFrame.shape
+
+    Record = [TraceStage["Stage"], TraceStage["Context"], TraceStage["Label"], TraceStage["StartTime"] - Trace["StartTime"], EndTime - TraceStage["StartTime"], Bytes, Rows, Columns, MemoryDelta, PeakMemoryDelta, TraceStage["Thread"]]
+
+    with Trace["Lock"]:
+        Trace["Stages"].append(dict(zip(_TraceColIDs, Record)))
+
+def GetTraceDataFrame(Trace = None):
+    """Get a data frame containing recorded stages. The times are in seconds
+    and the memory deltas are in bytes.
+
+    Arguments:
+        Trace (dict): Trace information. Default: Active trace.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            stage: Stage, Context, Label, Start Time, Wall Time, Bytes, Rows,
+            Columns, Memory Delta, Peak Memory Delta and Thread.
+
+    """
+
+    Trace = _GetTrace(Trace)
+    if Trace is None:
+        return None
+
+    with Trace["Lock"]:
+        Stages = list(Trace["Stages"])
+
+    TraceDataFrame = pd.DataFrame(Stages, columns = _TraceColIDs)
+    for ColID in ["Bytes", "Rows", "Columns", "Memory Delta", "Peak Memory Delta"]:
+        TraceDataFrame[ColID] = pd.to_numeric(TraceDataFrame[ColID])
+
+    return TraceDataFrame
+
+def GetTraceSummary(Trace = None):
+    """Get a summary of recorded stages, which contains the number of times
+    each stage was recorded, total and mean wall time, fraction of total wall
+    time, total bytes and largest peak memory delta.
+
+    Arguments:
+        Trace (dict): Trace information. Default: Active trace.
+
+    Returns:
+        panda : A data frame containing summary for each stage.
+
+    """
+
+    TraceDataFrame = GetTraceDataFrame(Trace)
+    if TraceDataFrame is None:
+        return None
+
+    Groups = TraceDataFrame.groupby("Stage", sort = False)
+    SummaryDataFrame = pd.DataFrame({"Count": Groups.size(),
+                                     "Wall Time": Groups["Wall Time"].sum(),
+                                     "Mean Wall Time": Groups["Wall Time"].mean(),
+                                     "Bytes": Groups["Bytes"].sum(min_count = 1),
+                                     "Peak Memory Delta": Groups["Peak Memory Delta"].max()})
+
+    TotalWallTime = SummaryDataFrame["Wall Time"].sum()
+    SummaryDataFrame.insert(3, "Wall Time Fraction", SummaryDataFrame["Wall Time"] / TotalWallTime if TotalWallTime > 0 else np.nan)
+
+    return SummaryDataFrame
+
+def SaveTrace(FileName, Trace = None):
+    """Save recorded stages along with trace information to a JSON file.
+
+    Arguments:
+        FileName (str): JSON file name.
+        Trace (dict): Trace information. Default: Active trace.
+
+    """
+
+    Trace = _GetTrace(Trace)
+    if Trace is None:
+        return
+
+    TraceDataFrame = GetTraceDataFrame(Trace)
+
+    TraceData = {"Timestamp": Trace["Timestamp"], "TrackMemory": Trace["TrackMemory"],
+                 "WallTime": Trace.get("EndTime", time.time()) - Trace["StartTime"],
+                 "Stages": json.loads(TraceDataFrame.to_json(orient = "records"))}
+
+    with open(FileName, "w") as FileHandle:
+        json.dump(TraceData, FileHandle, indent = 1)
+
+    print("Saved %d stage(s) to trace file %s..." % (len(TraceDataFrame), FileName))
+
+def _GetTrace(Trace):
+    """Get specified or active trace."""
+
+    if Trace is None:
+        Trace = _ActiveTrace
+
+    if Trace is None:
+        print("***Error: No trace specified or active...")
+
+    return Trace
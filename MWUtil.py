@@ -4,15 +4,36 @@ import os
 import sys
 import time
 import re
-from io import StringIO
+from io import BytesIO
 import base64
+import json
+import gzip
+import html
+import warnings
+import threading
+import concurrent.futures
 
-import requests
+try:
+    from urllib.parse import urlparse, quote
+except ImportError:
+    from urlparse import urlparse
+    from urllib import quote
 
-import pandas as pd
-import numpy as np
+import MWLazyImport
 
-__all__ = ["CheckAndWarnEmptyStudiesData", "CheckAndWarnEmptyStudiesUIFData", "CoerceDataFramColumnValuesToNumeric", "GetNumberOfMissingValue", "ListClassInformation", "ListStudiesAnalysisAndResultsData", "ProcessMissingValues", "RetrieveStudiesAnalysisAndResultsData", "RetrieveUploadedData", "SetupUIFDataForStudiesAnalysisAndResults, SetupCSVDownloadLink"]
+requests = MWLazyImport.LazyImport("requests")
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+import MWCache
+import MWTrace
+import MWPipeline
+
+__all__ = ["CheckAndWarnEmptyStudiesData", "CheckAndWarnEmptyStudiesUIFData", "CoerceDataFramColumnValuesToNumeric", "ExportDataFrame", "ExportStudiesResultsData", "FitNormalizationParams", "GetMissingValuesInfo", "GetNumberOfMissingValue", "GetStudyAndAnalysisIDs", "ImputeMissingValues", "ListClassInformation", "ListStudiesAnalysisAndResultsData", "LoadStudiesResultsData", "NormalizeData", "ProcessMissingValues", "RetrieveDataFiles", "RetrieveStudiesAnalysisAndResultsData", "RetrieveUploadedData", "SaveStudiesResultsData", "SetQuietMode", "SetupCSVDownloadLink", "SetupDataFrameDownloadLink", "SetupFileDownloadLink", "SetupUIFDataForStudiesAnalysisAndResults"]
+
+# Progress messages are suppressed in quiet mode...
+_QuietMode = False
 
 
 def ListStudiesAnalysisAndResultsData(StudiesResultsData, DisplayDataFrame = False, IPythonDisplayFuncRef = None, IPythonHTMLFuncRef = None):
@@ -51,7 +72,7 @@ def ListStudiesAnalysisAndResultsData(StudiesResultsData, DisplayDataFrame = Fal
                 else:
                     print("%s: %s" % (DataType, DataValue))
 
-def RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL = "https://www.metabolomicsworkbench.org/rest", MissingValuesMethod = None):
+def RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL = "https://www.metabolomicsworkbench.org/rest", MissingValuesMethod = None, NumOfWorkers = 1, MaxConnectionsPerHost = 4, MaxRetries = 3, RetryBackoffFactor = 0.5, Cache = None, DType = None):
     """Retrieve analysis and results data for a study ID or list of space
     delimited study IDs. In addition, study substrings are allowed to
     perform fuzzy match.
@@ -66,11 +87,29 @@ def RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL = "https://www.met
     ReplaceByZero - Replace missing values by 0
     LinearInterpolation - Replace missing values by linear interpolation
     
+    All requests are made using a shared keep-alive session. A value of
+    NumOfWorkers greater than 1 retrieves analysis data and datatables
+    concurrently using a pool of threads while limiting the number of
+    simultaneous requests to a host to MaxConnectionsPerHost. Requests
+    failing with status codes 429 or 5xx are retried up to MaxRetries times
+    with an exponential backoff. The retrieved data is always processed in
+    the order of specified study IDs and their analysis IDs.
+    
+    A cache set up using MWCache.SetupRESTCache may be specified to store
+    and reuse REST responses across sessions.
     
     Arguments:
         StudyIDs (str): Study ID or IDs.
         MWBaseURL (str): REST URL base for MW.
         MissingValuesMethod (str): Method for processing missing values.
+        NumOfWorkers (int): Number of threads for concurrent retrieval.
+        MaxConnectionsPerHost (int): Maximum number of simultaneous
+            requests to a host.
+        MaxRetries (int): Maximum number of retries for a failed request.
+        RetryBackoffFactor (float): Backoff factor in seconds for retries.
+        Cache (dict): REST cache information from MWCache.SetupRESTCache.
+        DType (str): Numeric type, such as float32, for metabolite values.
+            Default: float64 for any coerced values.
 
     Returns:
         dict : A dictionary containing retrieved data  for analysis and
@@ -92,56 +131,187 @@ def RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL = "https://www.met
                     else:
                         print("%s: %s" % (DataType, DataValue))
 
+        # Retrieve data for a large number of studies concurrently...
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL, NumOfWorkers = 8)
+
+        # Reuse REST responses retrieved in earlier sessions...
+        MWRESTCache = MWCache.SetupRESTCache()
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL, Cache = MWRESTCache)
+
     """
     
     StudiesResultsData = {}
     
-    StudyIDs = re.sub("[ ]+", " ", StudyIDs)
+    StudyIDs = re.sub("[ ]+", " ", StudyIDs.strip())
     
-    for StudyID in StudyIDs.split(" "):
-        MWDataURL = MWBaseURL + "/study/study_id/" + StudyID + "/analysis/"
-        
-        print("Initiating request: %s" % MWDataURL)
-        Response = requests.get(MWDataURL)
-        if Response.status_code != 200:
-            print("Request failed: status_code: %d" % Response.status_code)
-            continue
-        
-        AnalysisData = Response.json()
-        
-        print("Processing analysis data...")
-        _ProcessAnalysisData(StudiesResultsData, AnalysisData)
+    Session = _SetupRequestsSession(NumOfWorkers)
+    HostSemaphores = _SetupHostSemaphores(MaxConnectionsPerHost)
     
-    for StudyID in StudiesResultsData:
-        for AnalysisID in StudiesResultsData[StudyID]:
-            print("\nRetrieving datatable for analysis ID, %s, in study ID, %s..." % (AnalysisID, StudyID))
-            
-            MWDataURL = MWBaseURL + "/study/analysis_id/" + AnalysisID + "/datatable"
-            
-            print("Initiating request: %s" % MWDataURL)
-            Response = requests.get(MWDataURL)
-            if Response.status_code != 200:
-                print("***Error: Request failed: status_code: %d" % Response.status_code)
+    try:
+        MWDataURLs = []
+        for StudyID in StudyIDs.split(" "):
+            MWDataURLs.append(MWBaseURL + "/study/study_id/" + StudyID + "/analysis/")
+        
+        for MWDataURL, Response in _RetrieveURLs(Session, MWDataURLs, NumOfWorkers, HostSemaphores, MaxRetries, RetryBackoffFactor, Cache):
+            if Response is None or Response.status_code != 200:
+                print("Request failed: status_code: %s" % (Response.status_code if Response is not None else "NA"))
                 continue
             
-            print("Processing datatable text...")
-            Separator = "\t"
-            ResultsDataTable, ClassNamesToNumsMap = _ProcessDataTableText(Response.text, Sep = Separator, AddClassNum = True)
-            StudiesResultsData[StudyID][AnalysisID]["class_names_to_nums"] = ClassNamesToNumsMap
+            AnalysisData = Response.json()
             
-            print("Setting up Pandas dataframe...")
-            RESULTSDATATABLE = StringIO(ResultsDataTable)
-            DataFrame = pd.read_csv(RESULTSDATATABLE, sep = Separator, index_col = "Samples")
-            
-            CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 2)
-            DataFrame = ProcessMissingValues(DataFrame, MissingValuesMethod)
-            
-            StudiesResultsData[StudyID][AnalysisID]["data_frame"] = DataFrame
+            _PrintMessage("Processing analysis data...")
+            _ProcessAnalysisData(StudiesResultsData, AnalysisData)
+        
+        StudyAndAnalysisIDs = []
+        MWDataURLs = []
+        for StudyID in StudiesResultsData:
+            for AnalysisID in StudiesResultsData[StudyID]:
+                StudyAndAnalysisIDs.append((StudyID, AnalysisID))
+                MWDataURLs.append(MWBaseURL + "/study/analysis_id/" + AnalysisID + "/datatable")
+        
+        for (StudyID, AnalysisID), (MWDataURL, Response) in zip(StudyAndAnalysisIDs, _RetrieveURLs(Session, MWDataURLs, NumOfWorkers, HostSemaphores, MaxRetries, RetryBackoffFactor, Cache, "\nRetrieving datatable for analysis ID, %s, in study ID, %s...", [(AnalysisID, StudyID) for StudyID, AnalysisID in StudyAndAnalysisIDs])):
+            if Response is None or Response.status_code != 200:
+                print("***Error: Request failed: status_code: %s" % (Response.status_code if Response is not None else "NA"))
+                continue
             
+            _SetupStudiesResultsDataForDataTable(StudiesResultsData, StudyID, AnalysisID, Response, MissingValuesMethod, DType)
+    finally:
+        Session.close()
+        MWTrace.SetTraceContext(None)
+    
+    if Cache is not None:
+        Stats = Cache["Stats"]
+        _PrintMessage("\nREST cache usage: Hits: %d; Misses: %d; Revalidated: %d" % (Stats["Hits"], Stats["Misses"], Stats["Revalidated"]))
     
     return StudiesResultsData
 
-def RetrieveUploadedData(UploadedDataInfo, MissingValuesMethod = None):
+def _SetupStudiesResultsDataForDataTable(StudiesResultsData, StudyID, AnalysisID, Response, MissingValuesMethod = None, DType = None):
+    """Setup data frame and class names map for a datatable retrieved for
+    an analysis ID in a study ID."""
+    
+    _PrintMessage("Setting up Pandas dataframe from datatable text...")
+    MWTrace.SetTraceContext("%s/%s" % (StudyID, AnalysisID))
+    Separator = "\t"
+    Encoding = Response.encoding if Response.encoding is not None else Response.apparent_encoding
+    DataFrame, ClassNamesToNumsMap = _SetupDataFrameFromDataTable(Response.content, Sep = Separator, AddClassNum = True, Encoding = Encoding)
+    StudiesResultsData[StudyID][AnalysisID]["class_names_to_nums"] = ClassNamesToNumsMap
+    
+    DataFrame = CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 2, DType = DType)
+    DataFrame = ProcessMissingValues(DataFrame, MissingValuesMethod)
+    
+    StudiesResultsData[StudyID][AnalysisID]["data_frame"] = DataFrame
+
+def _SetupRequestsSession(NumOfWorkers = 1):
+    """Setup a keep-alive requests session with a connection pool large enough
+    for specified number of workers."""
+    
+    PoolSize = max(NumOfWorkers, 1)
+    
+    Session = requests.Session()
+    Adapter = requests.adapters.HTTPAdapter(pool_connections = PoolSize, pool_maxsize = PoolSize)
+    Session.mount("http://", Adapter)
+    Session.mount("https://", Adapter)
+    
+    return Session
+
+def _SetupHostSemaphores(MaxConnectionsPerHost):
+    """Setup a map of host names to semaphores for limiting simultaneous
+    requests to a host."""
+    
+    return {"MaxConnections": max(MaxConnectionsPerHost, 1), "Lock": threading.Lock(), "Semaphores": {}}
+
+def _GetHostSemaphore(HostSemaphores, URL):
+    """Get semaphore for the host in a URL."""
+    
+    Host = urlparse(URL).netloc
+    with HostSemaphores["Lock"]:
+        if Host not in HostSemaphores["Semaphores"]:
+            HostSemaphores["Semaphores"][Host] = threading.BoundedSemaphore(HostSemaphores["MaxConnections"])
+        return HostSemaphores["Semaphores"][Host]
+
+def _RetrieveURLUsingCache(Session, URL, HostSemaphores, MaxRetries = 3, RetryBackoffFactor = 0.5, Cache = None, Timeout = None):
+    """Retrieve a URL using a REST cache, if specified."""
+    
+    TraceStage = MWTrace.BeginStage("HTTPFetch", URL, TrackMemory = False)
+    
+    if Cache is None:
+        Response = _RetrieveURL(Session, URL, HostSemaphores, MaxRetries, RetryBackoffFactor, Timeout = Timeout)
+    else:
+        Response = MWCache.RetrieveURLUsingRESTCache(Cache, URL, lambda Headers: _RetrieveURL(Session, URL, HostSemaphores, MaxRetries, RetryBackoffFactor, Headers, Timeout))
+    
+    if TraceStage is not None:
+        MWTrace.EndStage(TraceStage, Bytes = len(Response.content) if Response is not None else 0)
+    
+    return Response
+
+def _RetrieveURL(Session, URL, HostSemaphores, MaxRetries = 3, RetryBackoffFactor = 0.5, Headers = None, Timeout = None):
+    """Retrieve a URL using a session and retry requests failing with status
+    codes 429 or 5xx, connection errors or timeouts using an exponential
+    backoff. The last response is returned after all retries have failed and
+    None is returned for a connection error or timeout."""
+    
+    Semaphore = _GetHostSemaphore(HostSemaphores, URL)
+    
+    Response = None
+    for RetryNum in range(MaxRetries + 1):
+        Response = None
+        try:
+            with Semaphore:
+                Response = Session.get(URL, headers = Headers, timeout = Timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as ErrMsg:
+            if RetryNum == MaxRetries:
+                print("***Error: Request failed: %s: %s" % (URL, ErrMsg))
+                return None
+        
+        if Response is not None and not _IsRetryableStatusCode(Response.status_code):
+            return Response
+        
+        if RetryNum == MaxRetries:
+            break
+        
+        Delay = RetryBackoffFactor * (2 ** RetryNum)
+        if Response is not None:
+            RetryAfter = Response.headers.get("Retry-After")
+            if RetryAfter is not None and RetryAfter.isdigit():
+                Delay = max(Delay, float(RetryAfter))
+            Response.close()
+        
+        time.sleep(Delay)
+    
+    return Response
+
+def _IsRetryableStatusCode(StatusCode):
+    """Check whether a request failing with a status code may be retried."""
+    
+    return StatusCode == 429 or (500 <= StatusCode <= 599)
+
+def _RetrieveURLs(Session, URLs, NumOfWorkers, HostSemaphores, MaxRetries = 3, RetryBackoffFactor = 0.5, Cache = None, Message = None, MessageArgs = None):
+    """Retrieve URLs sequentially or concurrently and yield (URL, Response)
+    tuples in the order of specified URLs."""
+    
+    if NumOfWorkers <= 1 or len(URLs) <= 1:
+        for Index, URL in enumerate(URLs):
+            if Message is not None:
+                _PrintMessage(Message % MessageArgs[Index])
+            _PrintMessage("Initiating request: %s" % URL)
+            yield (URL, _RetrieveURLUsingCache(Session, URL, HostSemaphores, MaxRetries, RetryBackoffFactor, Cache))
+        return
+    
+    _PrintMessage("Initiating %d requests using %d workers..." % (len(URLs), NumOfWorkers))
+    with concurrent.futures.ThreadPoolExecutor(max_workers = NumOfWorkers) as Executor:
+        Futures = [Executor.submit(_RetrieveURLUsingCache, Session, URL, HostSemaphores, MaxRetries, RetryBackoffFactor, Cache) for URL in URLs]
+        for Index, URL in enumerate(URLs):
+            Response = Futures[Index].result()
+            
+            # Release the completed future to keep memory bounded...
+            Futures[Index] = None
+            
+            if Message is not None:
+                _PrintMessage(Message % MessageArgs[Index])
+            _PrintMessage("Retrieved request: %s" % URL)
+            yield (URL, Response)
+
+def RetrieveUploadedData(UploadedDataInfo, MissingValuesMethod = None, DType = None, ChunkSize = None):
     """Retrieve data from the uploaded data information available
     from the FileUpload ipywidget.
     
@@ -155,9 +325,21 @@ def RetrieveUploadedData(UploadedDataInfo, MissingValuesMethod = None):
     ReplaceByZero - Replace missing values by 0
     LinearInterpolation - Replace missing values by linear interpolation
     
+    A ChunkSize value enables streaming ingestion of large data files. The
+    uploaded bytes are parsed incrementally in chunks of ChunkSize rows and
+    metabolite values are stored directly in a single preallocated block of
+    DType values, which bounds peak memory to about one copy of the final
+    dataframe along with a chunk. Without any DType value, columns containing
+    integer values in all chunks are restored to int64 values and the
+    remaining columns contain float64 values as for parsing without chunks.
+    Throughput and peak memory are reported for each file.
+    
     Arguments:
         UploadedDataInfo: Value of FileUpload ipywidget.
         MissingValuesMethod (str): Method for processing missing values.
+        DType (str): Numeric type, such as float32, for metabolite values.
+            Default: float64 for any coerced values.
+        ChunkSize (int): Number of rows in a chunk for streaming ingestion.
 
     Returns:
         dict : A dictionary containing retrieved data for uploaded data
@@ -181,47 +363,127 @@ def RetrieveUploadedData(UploadedDataInfo, MissingValuesMethod = None):
 
     """
     
-    print("\nProcessing uploaded data file(s)...")
+    _PrintMessage("\nProcessing uploaded data file(s)...")
     
     StudiesResultsData = {}
     
     for FileName, FileDataInfo in UploadedDataInfo.items():
         Name = FileDataInfo["metadata"]["name"]
-        Type = FileDataInfo["metadata"]["type"]
-        Size = FileDataInfo["metadata"]["size"]
-            
-        Content = FileDataInfo["content"].decode()
-            
-        _, FileExt = os.path.splitext(Name)
-        if re.match("^(\.txt)|(\.tsv)$", FileExt):
-            Separator = "\t"
-        else:
-            Separator = ","
+        Content = FileDataInfo["content"]
+        
+        _PrintMessage("\nProcessing uploaded data file %s..." % Name)
+        MWTrace.SetTraceContext(Name)
+        _SetupStudiesResultsDataForDataFile(StudiesResultsData, Name, Content, MissingValuesMethod, DType, ChunkSize)
+    
+    MWTrace.SetTraceContext(None)
 
-        print("\nProcessing uploaded data file %s..." % Name)
+    return StudiesResultsData
 
-        StudyID = Name
-        AnalysisID = "NA"
+def RetrieveDataFiles(DataFiles, MissingValuesMethod = None, DType = None, ChunkSize = None):
+    """Retrieve data from local data files. The data files must be in the
+    same format as the uploaded data files: Col 1: Sample names; Col 2:
+    Class identifiers; Remaining cols: Named metabolites. Tab delimited
+    files must have .txt or .tsv extension. Other files are assumed to be
+    comma delimited.
+    
+    The methods for processing missing values and streaming ingestion of
+    large data files are the same as RetrieveUploadedData.
+    
+    Arguments:
+        DataFiles (str or list): Data file path or a list of file paths.
+        MissingValuesMethod (str): Method for processing missing values.
+        DType (str): Numeric type, such as float32, for metabolite values.
+            Default: float64 for any coerced values.
+        ChunkSize (int): Number of rows in a chunk for streaming ingestion.
 
-        # Intialize data...
-        StudiesResultsData[StudyID] = {}
-        StudiesResultsData[StudyID][AnalysisID] = {}
-        StudiesResultsData[StudyID][AnalysisID]["analysis_summary"] = "NA"
+    Returns:
+        dict : A dictionary containing retrieved data for data file(s).
+
+    Examples:
+
+        StudiesResultsData = MWUtil.RetrieveDataFiles(["LargeStudyData.csv"], ChunkSize = 500, DType = "float32")
+
+    """
+    
+    _PrintMessage("\nProcessing data file(s)...")
+    
+    if not isinstance(DataFiles, (list, tuple)):
+        DataFiles = [DataFiles]
+    
+    StudiesResultsData = {}
+    
+    for DataFile in DataFiles:
+        if not os.path.isfile(DataFile):
+            print("***Error: Data file doesn't exist: %s" % DataFile)
+            continue
         
-        ResultsDataTable, ClassNamesToNumsMap = _ProcessDataTableText(Content, Sep = Separator, NewSampleColName = "Samples", NewClassColName = "Class", AddClassNum = True)
-        StudiesResultsData[StudyID][AnalysisID]["class_names_to_nums"] = ClassNamesToNumsMap
+        _PrintMessage("\nProcessing data file %s..." % DataFile)
+        MWTrace.SetTraceContext(os.path.basename(DataFile))
+        if ChunkSize is None:
+            TraceStage = MWTrace.BeginStage("FileRead", DataFile)
+            with open(DataFile, "rb") as FileHandle:
+                Content = FileHandle.read()
+            MWTrace.EndStage(TraceStage, Bytes = len(Content))
+        else:
+            Content = DataFile
         
-        print("Setting up Pandas dataframe...")
-        RESULTSDATATABLE = StringIO(ResultsDataTable)
-        DataFrame = pd.read_csv(RESULTSDATATABLE, sep = Separator, index_col = "Samples")
+        _SetupStudiesResultsDataForDataFile(StudiesResultsData, os.path.basename(DataFile), Content, MissingValuesMethod, DType, ChunkSize)
+    
+    MWTrace.SetTraceContext(None)
+    
+    return StudiesResultsData
+
+def _SetupStudiesResultsDataForDataFile(StudiesResultsData, Name, Content, MissingValuesMethod = None, DType = None, ChunkSize = None):
+    """Setup studies results data for uploaded or local data file content
+    available as bytes or a file path for streaming ingestion."""
+    
+    _, FileExt = os.path.splitext(Name)
+    if re.match("^(\.txt)|(\.tsv)$", FileExt):
+        Separator = "\t"
+    else:
+        Separator = ","
+    
+    StudyID = Name
+    AnalysisID = "NA"
+
+    # Intialize data...
+    StudiesResultsData[StudyID] = {}
+    StudiesResultsData[StudyID][AnalysisID] = {}
+    StudiesResultsData[StudyID][AnalysisID]["analysis_summary"] = "NA"
+    
+    if ChunkSize is None:
+        _PrintMessage("Setting up Pandas dataframe...")
+        DataFrame, ClassNamesToNumsMap = _SetupDataFrameFromDataTable(Content, Sep = Separator, NewSampleColName = "Samples", NewClassColName = "Class", AddClassNum = True)
+        DataFrame = CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 2, DType = DType)
+    else:
+        _PrintMessage("Setting up Pandas dataframe using chunks of %d rows..." % ChunkSize)
         
-        CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 2)
-        DataFrame = ProcessMissingValues(DataFrame, MissingValuesMethod)
+        StartTime = time.time()
+        DataFrame, ClassNamesToNumsMap = _SetupDataFrameFromDataTableInChunks(Content, Sep = Separator, NewSampleColName = "Samples", NewClassColName = "Class", AddClassNum = True, ChunkSize = ChunkSize, DType = DType)
+        ElapsedTime = max(time.time() - StartTime, 1e-9)
         
-        StudiesResultsData[StudyID][AnalysisID]["data_frame"] = DataFrame
-
-    return StudiesResultsData
+        PeakMemory = _GetPeakMemoryUsage()
+        _PrintMessage("Ingested %d rows and %d columns in %.2f seconds; Rows/sec: %.1f; Dataframe memory: %.1f MB; Peak process memory: %s MB" % (DataFrame.shape[0], DataFrame.shape[1], ElapsedTime, DataFrame.shape[0] / ElapsedTime, DataFrame.memory_usage(index = True, deep = False).sum() / (1024.0 * 1024.0), ("%.1f" % PeakMemory) if PeakMemory is not None else "NA"))
+    
+    StudiesResultsData[StudyID][AnalysisID]["class_names_to_nums"] = ClassNamesToNumsMap
+    
+    DataFrame = ProcessMissingValues(DataFrame, MissingValuesMethod)
+    StudiesResultsData[StudyID][AnalysisID]["data_frame"] = DataFrame
     
+def _GetPeakMemoryUsage():
+    """Get peak resident memory usage for the current process in MB. None is
+    returned for platforms without resource module."""
+    
+    try:
+        import resource
+    except ImportError:
+        return None
+    
+    PeakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    # Linux reports peak memory in KB and macOS in bytes...
+    return PeakMemory / (1024.0 * 1024.0) if sys.platform == "darwin" else PeakMemory / 1024.0
+
 def _ProcessAnalysisData(StudiesResultsData, AnalysisData):
     """Process analysis data retrieved in JSON format for a study or set of studies."""
     
@@ -248,63 +510,231 @@ def _ProcessAnalysisData(StudiesResultsData, AnalysisData):
             
             StudiesResultsData[StudyID][AnalysisID][DataType] = DataValue
 
-def _ProcessDataTableText(DataTableText, Sep = "\t", NewSampleColName = None, NewClassColName = None, AddClassNum = True):
-    """Process datatable retrieved retrieves in text format for a specific analysis ID"""
-
-    DataLines = []
-
-    # Standardize new line char and split lines...
-    DataTableText = re.sub("(\r\n)|(\r)", "\n", DataTableText)
-    TextLines = DataTableText.split("\n")
+def _SetupDataFrameFromDataTable(DataTable, Sep = "\t", NewSampleColName = None, NewClassColName = None, AddClassNum = True, Encoding = "utf-8"):
+    """Setup a dataframe from datatable retrieved in text format for a specific
+    analysis ID or uploaded data file in a single parsing pass.
     
-    # Process data labels...
-    LineWords = TextLines[0].split(Sep)
+    The datatable bytes are parsed directly by Pandas. Lines containing sample
+    ID and class name without any data are skipped during parsing, and class
+    numbers are assigned in the order of first appearance of class names.
+    """
     
-    DataLabels = []
-    ColLabel = NewSampleColName if NewSampleColName is not None else LineWords[0]
-    DataLabels.append(ColLabel)
-
-    ColLabel = NewClassColName if NewClassColName is not None else LineWords[1]
-    DataLabels.append(ColLabel)
+    TraceStage = MWTrace.BeginStage("Normalize")
+    
+    if isinstance(DataTable, str):
+        DataTable = DataTable.encode(Encoding)
+    elif not isinstance(DataTable, bytes):
+        DataTable = bytes(DataTable)
+    
+    SepBytes = Sep.encode(Encoding)
+    LineTerminator = b"\n" if (b"\n" in DataTable or b"\r" not in DataTable) else b"\r"
+    
+    # Identify short lines and class names using lines boundaries without
+    # splitting datatable into lines...
+    ShortLineNums = []
+    ClassNames = []
+    LineNum = 0
+    LineStart = DataTable.find(LineTerminator) + 1
+    DataTableLen = len(DataTable)
+    while 0 < LineStart < DataTableLen:
+        LineNum += 1
+        LineEnd = DataTable.find(LineTerminator, LineStart)
+        if LineEnd < 0:
+            LineEnd = DataTableLen
+        
+        FirstSepPos = DataTable.find(SepBytes, LineStart, LineEnd)
+        SecondSepPos = DataTable.find(SepBytes, FirstSepPos + 1, LineEnd) if FirstSepPos >= 0 else -1
+        if SecondSepPos < 0:
+            ShortLineNums.append(LineNum)
+        else:
+            ClassNames.append(DataTable[FirstSepPos + 1:SecondSepPos])
+        
+        LineStart = LineEnd + 1
+    
+    MWTrace.EndStage(TraceStage, Bytes = DataTableLen, Rows = len(ClassNames))
     
+    TraceStage = MWTrace.BeginStage("Parse")
+    DataFrame = pd.read_csv(BytesIO(DataTable), sep = Sep, index_col = 0, skiprows = ShortLineNums, encoding = Encoding, lineterminator = "\r" if LineTerminator == b"\r" else None)
+    
+    # Setup sample and class column labels...
+    if NewSampleColName is not None:
+        DataFrame.index.name = NewSampleColName
+    if NewClassColName is not None:
+        DataFrame.columns = [NewClassColName] + list(DataFrame.columns[1:])
+    
+    ClassNamesMap = {}
     if AddClassNum:
-        DataLabels.append("ClassNum")
+        ClassNums, UniqueClassNames = pd.factorize(np.array(ClassNames, dtype = object))
+        for ClassNum, ClassName in enumerate(UniqueClassNames):
+            ClassNamesMap[ClassName.decode(Encoding)] = ClassNum + 1
+        with warnings.catch_warnings():
+            # Parsed dataframe is not consolidated...
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            DataFrame.insert(1, "ClassNum", ClassNums + 1)
     
-    for Index in range(2, len(LineWords)):
-        Name = LineWords[Index]
-        DataLabels.append(Name)
+    MWTrace.EndStage(TraceStage, Bytes = DataTableLen, DataFrame = DataFrame)
     
-    DataLines.append(Sep.join(DataLabels))
+    return (DataFrame, ClassNamesMap)
+
+def _SetupDataFrameFromDataTableInChunks(DataTable, Sep = "\t", NewSampleColName = None, NewClassColName = None, AddClassNum = True, Encoding = "utf-8", ChunkSize = 1000, DType = None, BlockSize = 1024 * 1024):
+    """Setup a dataframe from datatable available as bytes or in a file by
+    parsing it in chunks of rows.
+    
+    The datatable lines are scanned once in blocks to identify short lines,
+    count data rows and assign class numbers. The datatable is parsed in chunks
+    during the second pass, and values for each chunk are coerced to numeric
+    values and copied into a preallocated array. Columns parsed as integer
+    values in all chunks are restored to int64 values for a None DType, which
+    matches column types for parsing without chunks.
+    """
+    
+    KeepIntegerCols = DType is None
+    DType = np.float64 if DType is None else DType
+    
+    TraceStage = MWTrace.BeginStage("Normalize")
+    with _OpenDataTable(DataTable) as FileHandle:
+        ShortLineNums, ClassNames, LineTerminator = _ScanDataTableLines(FileHandle, Sep.encode(Encoding), BlockSize)
+        DataTableLen = FileHandle.tell()
+    MWTrace.EndStage(TraceStage, Bytes = DataTableLen, Rows = len(ClassNames))
     
-    # Process data...
     ClassNamesMap = {}
-    ClassNum = 0
-    for Index in range(1, len(TextLines)):
-        LineWords = TextLines[Index].split(Sep)
+    ClassNums = np.empty(len(ClassNames), dtype = np.int64)
+    for Index, ClassName in enumerate(ClassNames):
+        if ClassName not in ClassNamesMap:
+            ClassNamesMap[ClassName] = len(ClassNamesMap) + 1
+        ClassNums[Index] = ClassNamesMap[ClassName]
+    ClassNamesMap = dict([(ClassName.decode(Encoding), ClassNum) for ClassName, ClassNum in ClassNamesMap.items()])
+    
+    NumOfRows = len(ClassNames)
+    del ClassNames
+    
+    Values = None
+    ColLabels = None
+    SampleIDs = []
+    ClassColValues = []
+    CoercedValuesCounts = None
+    IntegerColFlags = None
+    RowNum = 0
+    
+    # Chunks are parsed and coerced together...
+    TraceStage = MWTrace.BeginStage("Parse")
+    with _OpenDataTable(DataTable) as FileHandle:
+        Reader = pd.read_csv(FileHandle, sep = Sep, index_col = 0, skiprows = ShortLineNums, encoding = Encoding, lineterminator = "\r" if LineTerminator == b"\r" else None, chunksize = ChunkSize)
+        for Chunk in Reader:
+            if Values is None:
+                ColLabels = Chunk.columns
+                Values = np.empty((NumOfRows, len(ColLabels) - 1), dtype = DType)
+                CoercedValuesCounts = np.zeros(len(ColLabels) - 1, dtype = np.int64)
+                IntegerColFlags = np.ones(len(ColLabels) - 1, dtype = bool)
+            
+            NumOfChunkRows = Chunk.shape[0]
+            if RowNum + NumOfChunkRows > NumOfRows:
+                raise ValueError("Number of parsed rows exceeds %d rows identified during scanning of datatable lines. Try again without using chunks..." % NumOfRows)
+            
+            SampleIDs.append(Chunk.index)
+            ClassColValues.append(Chunk.pop(ColLabels[0]))
+            IntegerColFlags &= np.array([pd.api.types.is_integer_dtype(ColType) for ColType in Chunk.dtypes], dtype = bool)
+            CoercedValuesCounts += _SetupNumericValues(Chunk, Values[RowNum:RowNum + NumOfChunkRows])
+            
+            RowNum += NumOfChunkRows
+            del Chunk
+    
+    if Values is None:
+        # No data rows...
+        with _OpenDataTable(DataTable) as FileHandle:
+            DataFrame = pd.read_csv(FileHandle, sep = Sep, index_col = 0, nrows = 0, encoding = Encoding)
+        ColLabels = DataFrame.columns
+        Values = np.empty((0, len(ColLabels) - 1), dtype = DType)
+        SampleIDs.append(DataFrame.index)
+        ClassColValues.append(DataFrame.iloc[:, 0])
+        CoercedValuesCounts = np.zeros(len(ColLabels) - 1, dtype = np.int64)
+        IntegerColFlags = np.zeros(len(ColLabels) - 1, dtype = bool)
+    
+    NumOfCoercedValues = CoercedValuesCounts.sum()
+    if NumOfCoercedValues:
+        _PrintMessage("Coerced %d non-numerical values to NaN in %d column(s)..." % (NumOfCoercedValues, np.count_nonzero(CoercedValuesCounts)))
+    
+    SampleIDsIndex = SampleIDs[0].append(SampleIDs[1:]) if len(SampleIDs) > 1 else SampleIDs[0]
+    SampleIDsIndex.name = NewSampleColName if NewSampleColName is not None else SampleIDs[0].name
+    
+    if KeepIntegerCols and IntegerColFlags.any():
+        # Restore integer columns as int64 values...
+        FloatColNums = np.flatnonzero(~IntegerColFlags)
+        IntegerColNums = np.flatnonzero(IntegerColFlags)
+        FloatDataFrame = pd.DataFrame(Values[:RowNum, FloatColNums], index = SampleIDsIndex, columns = ColLabels[1:][FloatColNums], copy = False)
+        IntegerDataFrame = pd.DataFrame(Values[:RowNum, IntegerColNums].astype(np.int64), index = SampleIDsIndex, columns = ColLabels[1:][IntegerColNums], copy = False)
+        del Values
         
-        if len(LineWords) <= 2:
-            continue
+        # Restore column order...
+        DataFrame = pd.concat([FloatDataFrame, IntegerDataFrame], axis = 1).iloc[:, np.argsort(np.concatenate([FloatColNums, IntegerColNums]))]
+    else:
+        DataFrame = pd.DataFrame(Values[:RowNum], index = SampleIDsIndex, columns = ColLabels[1:], copy = False)
+    
+    if AddClassNum:
+        DataFrame.insert(0, "ClassNum", ClassNums[:RowNum])
+    
+    ClassColLabel = NewClassColName if NewClassColName is not None else ColLabels[0]
+    DataFrame.insert(0, ClassColLabel, pd.concat(ClassColValues).values if len(ClassColValues) > 1 else ClassColValues[0].values, allow_duplicates = True)
+    
+    MWTrace.EndStage(TraceStage, Bytes = DataTableLen, DataFrame = DataFrame)
+    
+    return (DataFrame, ClassNamesMap)
+
+def _OpenDataTable(DataTable):
+    """Open datatable available as a file path or bytes for reading."""
+    
+    if isinstance(DataTable, str):
+        return open(DataTable, "rb")
+    
+    return BytesIO(DataTable)
+
+def _ScanDataTableLines(FileHandle, Sep, BlockSize = 1024 * 1024):
+    """Scan datatable lines in blocks to identify line numbers for short lines
+    and class names for data lines."""
+    
+    ShortLineNums = []
+    ClassNames = []
+    LineNum = -1
+    
+    LineTerminator = None
+    BlockParts = []
+    while True:
+        Block = FileHandle.read(BlockSize)
+        if LineTerminator is None:
+            if b"\n" in Block or not len(Block):
+                LineTerminator = b"\n"
+            elif b"\r" in Block:
+                LineTerminator = b"\r"
         
-        # Handle sample ID and class name...
-        DataLine = []
-        DataLine.append(LineWords[0])
-        DataLine.append(LineWords[1])
-        
-        if AddClassNum:
-            ClassName = LineWords[1]
-            if ClassName not in ClassNamesMap:
-                ClassNum += 1
-                ClassNamesMap[ClassName] = ClassNum
-            DataLine.append("%s" % ClassNamesMap[ClassName])
+        if len(Block):
+            BlockParts.append(Block)
+            if LineTerminator is None or LineTerminator not in Block:
+                continue
+            Lines = b"".join(BlockParts).split(LineTerminator)
+            BlockParts = [Lines.pop()]
+        else:
+            # Process last line...
+            Lines = [b"".join(BlockParts)] if len(BlockParts) else []
+            BlockParts = []
+        
+        for Line in Lines:
+            LineNum += 1
+            if LineNum == 0:
+                continue
             
-        for Index in range(2, len(LineWords)):
-            DataLine.append(LineWords[Index])
+            FirstSepPos = Line.find(Sep)
+            SecondSepPos = Line.find(Sep, FirstSepPos + 1) if FirstSepPos >= 0 else -1
+            if SecondSepPos < 0:
+                ShortLineNums.append(LineNum)
+            else:
+                ClassNames.append(Line[FirstSepPos + 1:SecondSepPos])
         
-        DataLines.append(Sep.join(DataLine))
+        if not len(Block):
+            break
     
-    return ("\n".join(DataLines), ClassNamesMap)
+    return (ShortLineNums, ClassNames, LineTerminator)
 
-def ProcessMissingValues(DataFrame, Method = None):
+def ProcessMissingValues(DataFrame, Method = None, ClassColID = "Class", ClassNumColID = "ClassNum", NumOfNeighbors = 5):
     """Process missing values in a dataframe. The following
     methods are supported to process missing values:
     
@@ -312,78 +742,214 @@ def ProcessMissingValues(DataFrame, Method = None):
     DeleteRows - Delete observations containing missing values
     DeleteColumns - Delete variables containing missing values
     ReplaceByColumnMean - Replace missing values by column mean
-    ReplaceColumnMedian - Replace missing values by column median
+    ReplaceByColumnMedian or ReplaceColumnMedian - Replace missing values by
+        column median
     ReplaceByZero - Replace missing values by 0
+    ReplaceByHalfMinimum - Replace missing values by half of column minimum
+    ReplaceByClassMean - Replace missing values by column mean for class
+    ReplaceByClassMedian - Replace missing values by column median for class
+    ReplaceByClassHalfMinimum - Replace missing values by half of column
+        minimum for class
+    ReplaceByKNN - Replace missing values by mean of nearest neighbors
+    ReplaceByClassKNN - Replace missing values by mean of nearest neighbors
+        in class
     LinearInterpolation - Replace missing values by linear interpolation 
     
+    The replacement methods, except for linear interpolation, use
+    ImputeMissingValues and the missing values are identified only once.
+    
     Arguments:
         DataFrame (panda): Panda dataframe.
         Method (str): Method for process missing value.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID or None.
+        NumOfNeighbors (int): Number of nearest neighbors for KNN methods.
     
     Returns:
         panda : Updated data frame.
     
     """
     
-    NumOfMissingValues = GetNumberOfMissingValue(DataFrame)
+    TraceStage = MWTrace.BeginStage("MissingValues", Method)
+    
+    DataFrame = _ProcessMissingValues(DataFrame, Method, ClassColID, ClassNumColID, NumOfNeighbors)
+    
+    if TraceStage is not None:
+        MWTrace.EndStage(TraceStage, Bytes = int(DataFrame.memory_usage(index = False, deep = False).sum()), DataFrame = DataFrame)
+    
+    return DataFrame
+
+def _ProcessMissingValues(DataFrame, Method, ClassColID, ClassNumColID, NumOfNeighbors):
+    """Process missing values in a dataframe."""
+    
+    MissingValuesMask = DataFrame.isnull().to_numpy()
+    NumOfMissingValues = int(MissingValuesMask.sum())
     if (NumOfMissingValues == 0):
-        print("Dataframe contains no missing values...")
+        _PrintMessage("Dataframe contains no missing values...")
         return DataFrame
     else:
-        print("Dataframe contains %s missing values..." % NumOfMissingValues)
+        _PrintMessage("Dataframe contains %s missing values..." % NumOfMissingValues)
 
     if (Method is None or re.match("^(NoAction|None)$", Method, re.I)):
-        print("Skipping processing of missing values...")
+        _PrintMessage("Skipping processing of missing values...")
         return DataFrame
-        
-    if re.match("^DeleteRows$", Method, re.I):
-        print("Deleting rows containing missing values...")
-        DataFrame = DataFrame.dropna(axis = 0)
-    elif re.match("^DeleteColumns$", Method, re.I):
-        print("Deleting columns containing missing values...")
-        DataFrame = DataFrame.dropna(axis = 1)
-    elif (re.match("^ReplaceByColumnMean$", Method, re.I)):
-        print("Replaceing missing values by column mean...")
-        DataFrame = DataFrame.fillna(DataFrame.mean())
-    elif (re.match("^ReplaceByColumnMedian$", Method, re.I)):
-        print("Replaceing missing values by column median...")
-        DataFrame = DataFrame.fillna(DataFrame.median())
-    elif (re.match("^ReplaceByZero$", Method, re.I)):
-        print("Replaceing missing values by zero...")
-        DataFrame = DataFrame.fillna(0)
-    elif (re.match("^LinearInterpolation$", Method, re.I)):
-        print("Replaceing missing values by linera interpolation...")
+    
+    MethodID = Method.lower()
+    if MethodID == "deleterows":
+        _PrintMessage("Deleting rows containing missing values...")
+        return DataFrame.loc[~MissingValuesMask.any(axis = 1)]
+    elif MethodID == "deletecolumns":
+        _PrintMessage("Deleting columns containing missing values...")
+        return DataFrame.loc[:, ~MissingValuesMask.any(axis = 0)]
+    elif MethodID in _ProcessMissingValuesImputationMethods:
+        ImputationMethod, Message = _ProcessMissingValuesImputationMethods[MethodID]
+        _PrintMessage("Replaceing missing values by %s..." % Message)
+        TrackColIDs = _GetNormalizationTrackColIDs(DataFrame, ClassColID, ClassNumColID)
+        FeatureColNums = np.where(~DataFrame.columns.isin(TrackColIDs))[0]
+        DataFrame, NumOfMissingValues = _ImputeMissingValues(DataFrame, ImputationMethod, ClassColID, ClassNumColID, NumOfNeighbors, MissingValuesMask = MissingValuesMask[:, FeatureColNums])
+    elif MethodID == "linearinterpolation":
+        _PrintMessage("Replaceing missing values by linera interpolation...")
         DataFrame = DataFrame.interpolate(method = 'linear', axis = 0)
+        NumOfMissingValues = GetNumberOfMissingValue(DataFrame)
     else:
         print("***Error: ProcessMissingValues: Unknown Method: %s" % Method)
         return DataFrame
     
     # Drop any leftover NaN values...
-    NumOfMissingValues = GetNumberOfMissingValue(DataFrame)
     if (NumOfMissingValues):
         print("***Warning: Dropping rows containing %s leftover missing values after procesing missing values using method %s..." % (NumOfMissingValues, Method))
         DataFrame = DataFrame.dropna(axis = 0)
     
     return DataFrame
 
-def CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 0):
-    """Coerce dataframe column values to numeric values.
+# Methods for ProcessMissingValues mapped to methods for ImputeMissingValues...
+_ProcessMissingValuesImputationMethods = {
+    "replacebycolumnmean": ("ColumnMean", "column mean"),
+    "replacebycolumnmedian": ("ColumnMedian", "column median"),
+    "replacecolumnmedian": ("ColumnMedian", "column median"),
+    "replacebyzero": ("Zero", "zero"),
+    "replacebyhalfminimum": ("HalfMinimum", "half of column minimum"),
+    "replacebyclassmean": ("ClassMean", "column mean for class"),
+    "replacebyclassmedian": ("ClassMedian", "column median for class"),
+    "replacebyclasshalfminimum": ("ClassHalfMinimum", "half of column minimum for class"),
+    "replacebyknn": ("KNN", "mean of nearest neighbors"),
+    "replacebyclassknn": ("ClassKNN", "mean of nearest neighbors in class"),
+}
+
+def CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 0, DType = None, ReturnCoercedValuesCounts = False):
+    """Coerce dataframe column values to numeric values. Values which can't
+    be converted into numeric values are set to NaN.
+    
+    All non-numeric columns are coerced together using a single conversion.
+    By default, numeric columns are left unchanged and coerced columns
+    contain float64 values. A DType value, such as float64 or float32, converts
+    all columns starting at StartColNum into a single contiguous block of the
+    specified type. The float32 values require half the memory of float64
+    values.
     
     Arguments:
         DataFrame (panda): Panda dataframe.
         StartColNum (int): Start column number.
+        DType (str): Numeric type for all columns starting at StartColNum.
+        ReturnCoercedValuesCounts (bool): Return number of values coerced to
+            NaN for each column along with the dataframe.
 
     Returns:
-        panda : Updtaed data frame.
+        panda : Updated data frame.
+        panda : Number of values coerced to NaN for each column starting at
+            StartColNum. It's only returned for ReturnCoercedValuesCounts.
 
     """
 
-    print("Coercing dataframe column values to numerical values starting at column %d..." % StartColNum)
-    for ColNum in  DataFrame.columns[StartColNum:]:
-        DataFrame[ColNum] = pd.to_numeric(DataFrame[ColNum], errors='coerce')
+    _PrintMessage("Coercing dataframe column values to numerical values starting at column %d..." % StartColNum)
+    
+    TraceStage = MWTrace.BeginStage("Coerce")
+    
+    FeaturesDataFrame = DataFrame.iloc[:, StartColNum:]
+    NumericColNums, NonNumericColNums = _GetNumericAndNonNumericColNums(FeaturesDataFrame)
+    
+    UpdatedDataFrame = None
+    if DType is not None:
+        # Setup a contiguous block for all columns...
+        Values = np.empty(FeaturesDataFrame.shape, dtype = DType)
+        CoercedValuesCounts = _SetupNumericValues(FeaturesDataFrame, Values, NumericColNums, NonNumericColNums)
+        
+        UpdatedDataFrame = pd.DataFrame(Values, index = DataFrame.index, columns = FeaturesDataFrame.columns, copy = False)
+    else:
+        CoercedValues, CoercedValuesCounts = _CoerceNonNumericValues(FeaturesDataFrame, NonNumericColNums, np.float64)
+        if CoercedValues is not None:
+            CoercedDataFrame = pd.DataFrame(CoercedValues, index = DataFrame.index, columns = FeaturesDataFrame.columns[NonNumericColNums], copy = False)
+            NumericDataFrame = FeaturesDataFrame.iloc[:, NumericColNums]
+            
+            # Restore column order...
+            UpdatedDataFrame = pd.concat([NumericDataFrame, CoercedDataFrame], axis = 1).iloc[:, np.argsort(NumericColNums + NonNumericColNums)]
+    
+    NumOfCoercedValues = CoercedValuesCounts.sum()
+    if NumOfCoercedValues:
+        _PrintMessage("Coerced %d non-numerical values to NaN in %d column(s)..." % (NumOfCoercedValues, np.count_nonzero(CoercedValuesCounts)))
+    
+    if UpdatedDataFrame is not None:
+        # Add leading columns...
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            for ColNum in range(StartColNum - 1, -1, -1):
+                UpdatedDataFrame.insert(0, DataFrame.columns[ColNum], DataFrame.iloc[:, ColNum].values, allow_duplicates = True)
+        DataFrame = UpdatedDataFrame
+    
+    if TraceStage is not None:
+        MWTrace.EndStage(TraceStage, Bytes = int(DataFrame.memory_usage(index = False, deep = False).sum()), DataFrame = DataFrame)
+    
+    if ReturnCoercedValuesCounts:
+        return (DataFrame, pd.Series(CoercedValuesCounts, index = FeaturesDataFrame.columns))
     
     return DataFrame
 
+def _GetNumericAndNonNumericColNums(DataFrame):
+    """Get column numbers for numeric and non-numeric columns."""
+    
+    NumericColNums = []
+    NonNumericColNums = []
+    for ColNum, ColType in enumerate(DataFrame.dtypes):
+        if pd.api.types.is_numeric_dtype(ColType):
+            NumericColNums.append(ColNum)
+        else:
+            NonNumericColNums.append(ColNum)
+    
+    return (NumericColNums, NonNumericColNums)
+
+def _CoerceNonNumericValues(DataFrame, NonNumericColNums, DType):
+    """Coerce values in all non-numeric columns together and count values
+    coerced to NaN for all columns."""
+    
+    CoercedValues = None
+    CoercedValuesCounts = np.zeros(DataFrame.shape[1], dtype = np.int64)
+    if len(NonNumericColNums):
+        NonNumericValues = DataFrame.iloc[:, NonNumericColNums].to_numpy(dtype = object)
+        CoercedValues = pd.to_numeric(NonNumericValues.ravel(), errors = 'coerce')
+        CoercedValues = np.asarray(CoercedValues, dtype = DType).reshape(NonNumericValues.shape)
+        
+        CoercedValuesCounts[NonNumericColNums] = (np.isnan(CoercedValues) & ~pd.isnull(NonNumericValues)).sum(axis = 0)
+    
+    return (CoercedValues, CoercedValuesCounts)
+
+def _SetupNumericValues(DataFrame, Values, NumericColNums = None, NonNumericColNums = None):
+    """Setup numeric values for all columns in a preallocated array and
+    return number of values coerced to NaN for all columns."""
+    
+    if NumericColNums is None or NonNumericColNums is None:
+        NumericColNums, NonNumericColNums = _GetNumericAndNonNumericColNums(DataFrame)
+    
+    if len(NumericColNums) == DataFrame.shape[1]:
+        Values[:] = DataFrame.to_numpy(dtype = Values.dtype)
+    elif len(NumericColNums):
+        Values[:, NumericColNums] = DataFrame.iloc[:, NumericColNums].to_numpy(dtype = Values.dtype)
+    
+    CoercedValues, CoercedValuesCounts = _CoerceNonNumericValues(DataFrame, NonNumericColNums, Values.dtype)
+    if CoercedValues is not None:
+        Values[:, NonNumericColNums] = CoercedValues
+    
+    return CoercedValuesCounts
+
 def GetNumberOfMissingValue(DataFrame):
     """Count number of missing values in a dataframe. The missing
     values correspond to NaN in the dataframe.
@@ -397,6 +963,435 @@ def GetNumberOfMissingValue(DataFrame):
     """
     return DataFrame.isnull().sum().sum()
 
+def ImputeMissingValues(DataFrame, Method = "ClassMean", ClassColID = "Class", ClassNumColID = "ClassNum", NumOfNeighbors = 5, ReturnMissingValuesInfo = False, BlockSize = 4 * 1024 * 1024):
+    """Impute missing values for features in a dataframe. The following
+    methods are supported to impute missing values:
+
+    ColumnMean - Column mean
+    ColumnMedian - Column median
+    Zero - Zero
+    HalfMinimum - Half of column minimum for values below detection limit
+    ClassMean - Column mean for class
+    ClassMedian - Column median for class
+    ClassHalfMinimum - Half of column minimum for class
+    KNN - Mean of column values for nearest neighbors
+    ClassKNN - Mean of column values for nearest neighbors in class
+
+    The missing values are identified once and their positions are reused
+    for imputation and reporting. The class statistics are calculated using
+    the class number column and the column statistics for all samples are
+    used for any column without values in a class.
+
+    The nearest neighbors of a sample are identified using euclidean
+    distances calculated from values present in both samples and scaled by
+    the fraction of present values. The distances for blocks of samples are
+    calculated using matrix products. A missing value is imputed using the
+    nearest neighbors containing a value for the column. The column mean is
+    used when no such neighbor is available.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        Method (str): Method for imputing missing values.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID or None.
+        NumOfNeighbors (int): Number of nearest neighbors for KNN methods.
+        ReturnMissingValuesInfo (bool): Return missing values information.
+        BlockSize (int): Number of values in a block of distances for KNN
+            methods.
+
+    Returns:
+        panda : Imputed data frame.
+        panda : A data frame containing the following columns along with
+            number of missing values in each class: Metabolite, Missing
+            Values and Missing Fraction. It's only returned for
+            ReturnMissingValuesInfo.
+
+    Examples:
+
+        ImputedDataFrame = MWUtil.ImputeMissingValues(DataFrame, Method = "KNN", NumOfNeighbors = 5)
+
+        ImputedDataFrame, MissingValuesInfoDataFrame = MWUtil.ImputeMissingValues(DataFrame,
+                                                           Method = "ClassHalfMinimum",
+                                                           ReturnMissingValuesInfo = True)
+
+    """
+
+    MissingValuesInfo = [] if ReturnMissingValuesInfo else None
+    ImputedDataFrame, NumOfMissingValues = _ImputeMissingValues(DataFrame, Method, ClassColID, ClassNumColID, NumOfNeighbors, BlockSize, MissingValuesInfo = MissingValuesInfo)
+
+    if ReturnMissingValuesInfo:
+        return (ImputedDataFrame, MissingValuesInfo[0])
+
+    return ImputedDataFrame
+
+def GetMissingValuesInfo(DataFrame, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Get number of missing values for each feature in a dataframe along
+    with number of missing values in each class.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID or None.
+
+    Returns:
+        panda : A data frame containing the following columns along with
+            number of missing values in each class: Metabolite, Missing
+            Values and Missing Fraction.
+
+    """
+
+    TrackColIDs = _GetNormalizationTrackColIDs(DataFrame, ClassColID, ClassNumColID)
+    FeaturesDataFrame = DataFrame.drop(TrackColIDs, axis = 1) if len(TrackColIDs) else DataFrame
+    ClassNums = DataFrame[ClassNumColID].to_numpy() if ClassNumColID in TrackColIDs else None
+
+    return _SetupMissingValuesInfo(FeaturesDataFrame.columns, FeaturesDataFrame.isnull().to_numpy(), ClassNums)
+
+def _ImputeMissingValues(DataFrame, Method, ClassColID, ClassNumColID, NumOfNeighbors = 5, BlockSize = 4 * 1024 * 1024, MissingValuesMask = None, MissingValuesInfo = None):
+    """Impute missing values using a mask for features data and return
+    imputed dataframe along with number of values left missing."""
+
+    if not re.match("^(ColumnMean|ColumnMedian|Zero|HalfMinimum|ClassMean|ClassMedian|ClassHalfMinimum|KNN|ClassKNN)$", Method, re.I):
+        print("***Error: ImputeMissingValues: Unknown Method: %s" % Method)
+        return (DataFrame, 0)
+
+    TrackColIDs = _GetNormalizationTrackColIDs(DataFrame, ClassColID, ClassNumColID)
+    FeatureColIDs = DataFrame.columns.drop(TrackColIDs) if len(TrackColIDs) else DataFrame.columns
+    ClassNums = DataFrame[ClassNumColID].to_numpy() if ClassNumColID in TrackColIDs else None
+
+    Values = _SetupNormalizationValues(DataFrame, TrackColIDs)
+    if MissingValuesMask is None:
+        MissingValuesMask = np.isnan(Values)
+
+    if MissingValuesInfo is not None:
+        MissingValuesInfo.append(_SetupMissingValuesInfo(FeatureColIDs, MissingValuesMask, ClassNums))
+
+    RowNums, ColNums = np.nonzero(MissingValuesMask)
+    if len(RowNums) == 0:
+        return (DataFrame, 0)
+
+    Method = Method.lower()
+    ClassCodes = None
+    if Method.startswith("class"):
+        if ClassNums is None:
+            print("***Error: ImputeMissingValues: Class number column, %s, not available for method %s..." % (ClassNumColID, Method))
+            return (DataFrame, int(len(RowNums)))
+        ClassCodes, Classes = pd.factorize(ClassNums)
+
+    if Method == "zero":
+        Values[RowNums, ColNums] = 0
+    elif Method in ["knn", "classknn"]:
+        Values[RowNums, ColNums] = _CalculateKNNImputedValues(Values, MissingValuesMask, RowNums, ClassCodes, NumOfNeighbors, BlockSize)
+    else:
+        StatFuncRef = {"mean": _CalculateColumnMeans, "median": _CalculateColumnMedians, "halfminimum": _CalculateColumnHalfMinimums}[re.sub("^(column|class)", "", Method)]
+        ColumnStats = StatFuncRef(Values)
+        if ClassCodes is None:
+            Values[RowNums, ColNums] = ColumnStats[ColNums]
+        else:
+            ClassStats = np.vstack([StatFuncRef(Values[ClassCodes == ClassCode]) for ClassCode in range(len(Classes))])
+            ClassStats = np.where(np.isnan(ClassStats), ColumnStats[np.newaxis, :], ClassStats)
+            Values[RowNums, ColNums] = ClassStats[ClassCodes[RowNums], ColNums]
+
+    NumOfMissingValues = int(np.isnan(Values[RowNums, ColNums]).sum())
+
+    return (_SetupNormalizedDataFrame(DataFrame, Values, FeatureColIDs, TrackColIDs), NumOfMissingValues)
+
+def _CalculateColumnMeans(Values):
+    """Calculate nan-aware column means."""
+
+    return _CalculateColumnStats(Values, np.nanmean)
+
+def _CalculateColumnMedians(Values):
+    """Calculate nan-aware column medians."""
+
+    return _CalculateColumnStats(Values, np.nanmedian)
+
+def _CalculateColumnHalfMinimums(Values):
+    """Calculate half of nan-aware column minimums."""
+
+    return _CalculateColumnStats(Values, np.nanmin) / 2.0
+
+def _CalculateKNNImputedValues(Values, MissingValuesMask, RowNums, ClassCodes, NumOfNeighbors, BlockSize):
+    """Calculate imputed values for missing values at specified positions
+    using nearest neighbors in blocks of samples."""
+
+    NumOfRows, NumOfCols = Values.shape
+
+    PresentMask = ~MissingValuesMask
+    PresentValues = PresentMask.astype(Values.dtype)
+    ZeroFilledValues = np.where(MissingValuesMask, 0, Values)
+    SquaredValues = ZeroFilledValues * ZeroFilledValues
+    ColumnMeans = _CalculateColumnMeans(Values)
+
+    ImputedValuesList = []
+    QueryRowNums = np.unique(RowNums)
+    NumOfBlockRows = max(1, BlockSize // max(NumOfRows, NumOfCols))
+
+    for StartRowNum in range(0, len(QueryRowNums), NumOfBlockRows):
+        BlockRowNums = QueryRowNums[StartRowNum:StartRowNum + NumOfBlockRows]
+        BlockIndices = np.arange(len(BlockRowNums))
+
+        # Calculate squared distances using values present in both samples...
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            NumOfPresentValues = np.dot(PresentValues[BlockRowNums], PresentValues.T)
+            SquaredDistances = np.dot(SquaredValues[BlockRowNums], PresentValues.T) + np.dot(PresentValues[BlockRowNums], SquaredValues.T) - 2.0 * np.dot(ZeroFilledValues[BlockRowNums], ZeroFilledValues.T)
+            SquaredDistances = np.maximum(SquaredDistances, 0) * (NumOfCols / NumOfPresentValues)
+        SquaredDistances[NumOfPresentValues == 0] = np.inf
+        SquaredDistances[BlockIndices, BlockRowNums] = np.inf
+        if ClassCodes is not None:
+            SquaredDistances[ClassCodes[BlockRowNums][:, np.newaxis] != ClassCodes[np.newaxis, :]] = np.inf
+
+        NeighborRowNums = np.argsort(SquaredDistances, axis = 1, kind = "mergesort")
+
+        # Add values from neighbors in the order of distances till each missing
+        # value has enough neighbors or neighbors are exhausted...
+        EntryBlockRowNums, EntryColNums = np.nonzero(MissingValuesMask[BlockRowNums])
+        Sums = np.zeros(len(EntryColNums), dtype = np.float64)
+        Counts = np.zeros(len(EntryColNums), dtype = np.int64)
+        ActiveEntryNums = np.arange(len(EntryColNums))
+
+        for Rank in range(NumOfRows):
+            ActiveBlockRowNums = EntryBlockRowNums[ActiveEntryNums]
+            ActiveColNums = EntryColNums[ActiveEntryNums]
+            RankRowNums = NeighborRowNums[ActiveBlockRowNums, Rank]
+
+            ValidNeighbors = np.isfinite(SquaredDistances[ActiveBlockRowNums, RankRowNums])
+            UseNeighbors = ValidNeighbors & PresentMask[RankRowNums, ActiveColNums]
+
+            UseEntryNums = ActiveEntryNums[UseNeighbors]
+            Sums[UseEntryNums] += ZeroFilledValues[RankRowNums[UseNeighbors], ActiveColNums[UseNeighbors]]
+            Counts[UseEntryNums] += 1
+
+            ActiveEntryNums = ActiveEntryNums[ValidNeighbors & (Counts[ActiveEntryNums] < NumOfNeighbors)]
+            if len(ActiveEntryNums) == 0:
+                break
+
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            ImputedValuesList.append(np.where(Counts > 0, Sums / Counts, ColumnMeans[EntryColNums]))
+
+    return np.concatenate(ImputedValuesList)
+
+def _SetupMissingValuesInfo(FeatureColIDs, MissingValuesMask, ClassNums = None):
+    """Setup missing values information from a mask for features data."""
+
+    NumOfMissingValues = MissingValuesMask.sum(axis = 0)
+    MissingValuesInfoDataFrame = pd.DataFrame({"Metabolite": FeatureColIDs,
+                                               "Missing Values": NumOfMissingValues,
+                                               "Missing Fraction": NumOfMissingValues / float(max(1, MissingValuesMask.shape[0]))})
+
+    if ClassNums is not None:
+        for ClassNum in pd.unique(ClassNums):
+            MissingValuesInfoDataFrame["ClassNum %s Missing Values" % ClassNum] = MissingValuesMask[ClassNums == ClassNum].sum(axis = 0)
+
+    return MissingValuesInfoDataFrame
+
+def NormalizeData(DataFrame, Method = "Auto", LogTransform = None, ClassColID = "Class", ClassNumColID = "ClassNum", NormalizationParams = None, Decimals = None):
+    """Normalize data for features in a dataframe. The data is optionally log
+    transformed and centered by mean before scaling by a value calculated
+    for each feature from the centered data. The following methods are
+    supported to normalize data:
+
+    None - Don't center and scale data
+    Median - Scale by median
+    Auto or ZScore - Scale by standard deviation
+    Pareto - Scale by square root of standard deviation
+    Range - Scale by range of values
+
+    The supported values for log transform are: None, Log2, Log10 or Log. Any
+    zero or negative values are treated as missing values after the log
+    transform. Missing values are ignored during calculation of the
+    normalization parameters and stay missing after the normalization.
+
+    The features data is copied once into a contiguous array, which is
+    transformed in place. The class columns are added back at the start of
+    the normalized dataframe. The normalization parameters calculated by
+    FitNormalizationParams for one dataframe may be specified to normalize
+    data in other dataframes or batches of data.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        Method (str): Method for normalizing data.
+        LogTransform (str): Log transform to apply before normalization.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID or None.
+        NormalizationParams (dict): Normalization parameters calculated by
+            FitNormalizationParams. Method and LogTransform are ignored.
+        Decimals (int): Number of decimal places to round normalized values.
+
+    Returns:
+        panda : Normalized data frame.
+
+    Examples:
+
+        NormalizedDataFrame = MWUtil.NormalizeData(DataFrame, Method = "Pareto", LogTransform = "Log2")
+
+        NormalizationParams = MWUtil.FitNormalizationParams(DataFrame, Method = "Auto")
+        for BatchDataFrame in BatchDataFrames:
+            NormalizedBatchDataFrame = MWUtil.NormalizeData(BatchDataFrame, NormalizationParams = NormalizationParams)
+
+    """
+
+    if NormalizationParams is not None:
+        Method = NormalizationParams["Method"]
+        LogTransform = NormalizationParams["LogTransform"]
+
+    if not _ValidateNormalizationMethod(Method, LogTransform):
+        return DataFrame
+
+    if _IsNoneNormalizationMethod(Method) and LogTransform is None:
+        return DataFrame
+
+    TrackColIDs = _GetNormalizationTrackColIDs(DataFrame, ClassColID, ClassNumColID)
+    Values = _SetupNormalizationValues(DataFrame, TrackColIDs)
+    FeatureColIDs = DataFrame.columns.drop(TrackColIDs) if len(TrackColIDs) else DataFrame.columns
+
+    if NormalizationParams is not None:
+        if len(NormalizationParams["ColIDs"]) != len(FeatureColIDs) or not np.all(NormalizationParams["ColIDs"] == FeatureColIDs.to_numpy()):
+            print("***Error: NormalizeData: Feature columns in dataframe don't match columns in normalization parameters...")
+            return DataFrame
+        Centers, Scales = NormalizationParams["Centers"], NormalizationParams["Scales"]
+    else:
+        Centers, Scales = None, None
+
+    _NormalizeValues(Values, Method, LogTransform, Centers, Scales)
+    if Decimals is not None:
+        np.round(Values, Decimals, out = Values)
+
+    return _SetupNormalizedDataFrame(DataFrame, Values, FeatureColIDs, TrackColIDs)
+
+def FitNormalizationParams(DataFrame, Method = "Auto", LogTransform = None, ClassColID = "Class", ClassNumColID = "ClassNum"):
+    """Calculate parameters for normalizing data for features in a dataframe.
+    The parameters consist of the mean and the scaling value for each feature
+    calculated after any log transform. The supported values for methods and
+    log transform are described in NormalizeData.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        Method (str): Method for normalizing data.
+        LogTransform (str): Log transform to apply before normalization.
+        ClassColID (str): Class column ID or None.
+        ClassNumColID (str): Class number column ID or None.
+
+    Returns:
+        dict : A dictionary containing normalization parameters or None.
+
+    """
+
+    if not _ValidateNormalizationMethod(Method, LogTransform):
+        return None
+
+    TrackColIDs = _GetNormalizationTrackColIDs(DataFrame, ClassColID, ClassNumColID)
+    Values = _SetupNormalizationValues(DataFrame, TrackColIDs)
+    FeatureColIDs = DataFrame.columns.drop(TrackColIDs) if len(TrackColIDs) else DataFrame.columns
+
+    Centers, Scales = _NormalizeValues(Values, Method, LogTransform, FitOnly = True)
+
+    NormalizationParams = {}
+    NormalizationParams["Method"] = Method
+    NormalizationParams["LogTransform"] = LogTransform
+    NormalizationParams["ColIDs"] = FeatureColIDs.to_numpy()
+    NormalizationParams["Centers"] = Centers
+    NormalizationParams["Scales"] = Scales
+
+    return NormalizationParams
+
+def _ValidateNormalizationMethod(Method, LogTransform):
+    """Validate normalization method and log transform."""
+
+    if not (_IsNoneNormalizationMethod(Method) or re.match("^(Median|Auto|ZScore|Pareto|Range)$", Method, re.I)):
+        print("***Warning: Failed to normalize data: Unknown method %s..." % Method)
+        return False
+
+    if LogTransform is not None and not re.match("^(Log2|Log10|Log)$", LogTransform, re.I):
+        print("***Warning: Failed to normalize data: Unknown log transform %s..." % LogTransform)
+        return False
+
+    return True
+
+def _IsNoneNormalizationMethod(Method):
+    """Check for no normalization method."""
+
+    return True if (Method is None or re.match("^None$", Method, re.I)) else False
+
+def _GetNormalizationTrackColIDs(DataFrame, ClassColID, ClassNumColID):
+    """Get IDs of class columns present in a dataframe."""
+
+    return [ColID for ColID in [ClassColID, ClassNumColID] if ColID is not None and ColID in DataFrame.columns]
+
+def _SetupNormalizationValues(DataFrame, TrackColIDs):
+    """Copy features data into a contiguous float array."""
+
+    FeaturesDataFrame = DataFrame.drop(TrackColIDs, axis = 1) if len(TrackColIDs) else DataFrame
+
+    # Retain float32 values...
+    DType = np.float32 if all([ColDType == np.float32 for ColDType in FeaturesDataFrame.dtypes]) else np.float64
+
+    return FeaturesDataFrame.to_numpy(dtype = DType, copy = True)
+
+def _NormalizeValues(Values, Method, LogTransform, Centers = None, Scales = None, FitOnly = False):
+    """Normalize values in place using specified parameters or parameters
+    calculated from the values."""
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        if LogTransform is not None:
+            LogFuncRef = {"log2": np.log2, "log10": np.log10, "log": np.log}[LogTransform.lower()]
+            LogFuncRef(Values, out = Values)
+            Values[np.isinf(Values)] = np.nan
+
+        if _IsNoneNormalizationMethod(Method):
+            return (None, None)
+
+        if Centers is None:
+            Centers = _CalculateColumnStats(Values, np.nanmean)
+
+        Values -= Centers
+
+        if Scales is None:
+            if re.match("^Median$", Method, re.I):
+                Scales = _CalculateColumnStats(Values, np.nanmedian)
+            elif re.match("^(Auto|ZScore)$", Method, re.I):
+                Scales = _CalculateColumnStats(Values, np.nanstd, ddof = 1)
+            elif re.match("^Pareto$", Method, re.I):
+                Scales = np.sqrt(_CalculateColumnStats(Values, np.nanstd, ddof = 1))
+            elif re.match("^Range$", Method, re.I):
+                Scales = _CalculateColumnStats(Values, np.nanmax) - _CalculateColumnStats(Values, np.nanmin)
+
+        if FitOnly:
+            return (Centers, Scales)
+
+        Values /= Scales
+
+    return (Centers, Scales)
+
+def _CalculateColumnStats(Values, StatFuncRef, BlockSize = 1024 * 1024, **StatFuncKwargs):
+    """Calculate nan-aware statistics for columns in blocks to limit memory
+    used by any temporary arrays."""
+
+    NumOfRows, NumOfCols = Values.shape
+    NumOfBlockCols = max(1, BlockSize // max(1, NumOfRows))
+
+    Stats = np.empty(NumOfCols, dtype = Values.dtype)
+    with warnings.catch_warnings():
+        # All NaN columns...
+        warnings.simplefilter("ignore", category = RuntimeWarning)
+        for StartColNum in range(0, NumOfCols, NumOfBlockCols):
+            EndColNum = min(StartColNum + NumOfBlockCols, NumOfCols)
+            Stats[StartColNum:EndColNum] = StatFuncRef(Values[:, StartColNum:EndColNum], axis = 0, **StatFuncKwargs)
+
+    return Stats
+
+def _SetupNormalizedDataFrame(DataFrame, Values, FeatureColIDs, TrackColIDs):
+    """Setup a normalized dataframe without copying normalized values and add
+    any class columns at the start."""
+
+    NormalizedDataFrame = pd.DataFrame(Values, index = DataFrame.index, columns = FeatureColIDs, copy = False)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category = pd.errors.PerformanceWarning)
+        for ColNum, ColID in enumerate(TrackColIDs):
+            NormalizedDataFrame.insert(ColNum, ColID, DataFrame[ColID])
+
+    return NormalizedDataFrame
+
 def SetupUIFDataForStudiesAnalysisAndResults(StudiesResultsData, MinClassCount = None):
     """Setup data for creating  UIF from analysis and results data for a single
     or multiple studies.
@@ -411,6 +1406,8 @@ def SetupUIFDataForStudiesAnalysisAndResults(StudiesResultsData, MinClassCount =
 
     """
     
+    TraceStage = MWTrace.BeginStage("UIFSetup")
+    
     StudiesUIFData = {}
     StudiesUIFData["StudyIDs"] = []
     StudiesUIFData["AnalysisIDs"] = {}
@@ -453,15 +1450,47 @@ def SetupUIFDataForStudiesAnalysisAndResults(StudiesResultsData, MinClassCount =
     
     if len(StudiesUIFData["StudyIDs"]) == 0:
         print("***Warning: No studies available for further analysis...")
+    
+    if TraceStage is not None:
+        MWTrace.EndStage(TraceStage, Rows = sum([len(AnalysisIDs) for AnalysisIDs in StudiesUIFData["AnalysisIDs"].values()]))
 
     return StudiesUIFData
 
+def GetStudyAndAnalysisIDs(StudiesResultsData, StudiesUIFData = None):
+    """Get study and analysis IDs for data sets available in UIF data or in
+    studies results data.
+
+    Arguments:
+        StudiesResultsData (dict): A dictionary containing analysis and results
+            data for a single or multiple studies.
+        StudiesUIFData (dict): A dictionary containing UIF data from
+            SetupUIFDataForStudiesAnalysisAndResults or None.
+
+    Returns:
+        list : A list of (StudyID, AnalysisID) tuples.
+
+    """
+
+    StudyAndAnalysisIDs = []
+    if StudiesUIFData is not None:
+        for StudyID in StudiesUIFData["StudyIDs"]:
+            for AnalysisID in StudiesUIFData["AnalysisIDs"][StudyID]:
+                StudyAndAnalysisIDs.append((StudyID, AnalysisID))
+    else:
+        for StudyID in StudiesResultsData:
+            for AnalysisID in StudiesResultsData[StudyID]:
+                StudyAndAnalysisIDs.append((StudyID, AnalysisID))
+
+    return StudyAndAnalysisIDs
+
 #
 # Reference:
 # https://stackoverflow.com/questions/31893930/download-csv-from-an-ipython-notebook
 #
 def SetupCSVDownloadLink(DataFrame, Title = "Download CSV file", CSVFilename = "DataFrameDownload.csv"):  
-    """Setup a HTML link for downloading a dataframe as a CSV file.
+    """Setup a HTML link for downloading a dataframe as a CSV file. The CSV
+    data is embedded in the link and saved in the notebook. Use
+    SetupDataFrameDownloadLink for large dataframes.
 
     Arguments:
         DataFrame (panda): Panda dataframe.
@@ -479,6 +1508,427 @@ def SetupCSVDownloadLink(DataFrame, Title = "Download CSV file", CSVFilename = "
     
     return HTMLText
 
+# Data keys and status of files exported by SetupDataFrameDownloadLink...
+_ExportedFiles = {}
+
+def SetupDataFrameDownloadLink(DataFrame, Title = "Download data", FileName = "DataFrameDownload.csv", OutputDir = "MWExports", Format = "CSV", Compression = "gzip", ChunkSize = 10000):
+    """Export a dataframe to a file in an output directory and setup a HTML
+    link for downloading the file. The dataframe is written in chunks of
+    rows using ExportDataFrame and the link refers to the file instead of
+    embedding its data. Consequently, the size of the notebook doesn't
+    depend on the size of the dataframe.
+    
+    The output directory is relative to the current working directory, which
+    must be the notebook directory or its subdirectory to download the file
+    using the link in Jupyter. An extension for compressed or Parquet files
+    is added to the file name.
+    
+    The dataframe is only exported when its data, identified by
+    MWPipeline.GetDataFrameKey, differs from the data previously exported to
+    the file or the file has changed since its export. Consequently, widget
+    changes which only affect plots don't export any data again. As for
+    MWPipeline.GetDataFrameKey, the dataframe must not be modified in place
+    after its export.
+    
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        Title (str): Title for URL.
+        FileName (str): Name of a file to download.
+        OutputDir (str): Output directory.
+        Format (str): CSV or Parquet.
+        Compression (str): None, gzip or zstd for CSV files and a Parquet
+            compression codec for Parquet files.
+        ChunkSize (int): Number of rows in a chunk.
+
+    Returns:
+        str : A HTML string for downloading the file.
+
+    Examples:
+
+        HTMLText = MWUtil.SetupDataFrameDownloadLink(ResultsDataFrame, Title = "Download data", FileName = "ResultsData.csv")
+        display(HTML(HTMLText))
+
+    """
+    
+    FilePath = os.path.join(OutputDir, _SetupExportFileName(FileName, Format, Compression))
+    
+    ExportKey = (os.path.abspath(FilePath), MWPipeline.GetDataFrameKey(DataFrame))
+    if _ExportedFiles.get(ExportKey[0]) != (ExportKey[1], _GetFileStatus(FilePath)):
+        _ExportedFiles.pop(ExportKey[0], None)
+        if not ExportDataFrame(DataFrame, FilePath, Format, Compression, ChunkSize):
+            return ""
+        _ExportedFiles[ExportKey[0]] = (ExportKey[1], _GetFileStatus(FilePath))
+    
+    return SetupFileDownloadLink(FilePath, Title)
+
+def _GetFileStatus(FilePath):
+    """Get size and modification time of a file or None for a missing file."""
+    
+    if not os.path.isfile(FilePath):
+        return None
+    
+    FileStat = os.stat(FilePath)
+    return (FileStat.st_size, FileStat.st_mtime_ns)
+
+def SetupFileDownloadLink(FilePath, Title = None):
+    """Setup a HTML link for downloading a file. The file path must be relative
+    to the notebook directory.
+
+    Arguments:
+        FilePath (str): File path relative to notebook directory.
+        Title (str): Title for URL. Default: Base name of file path.
+
+    Returns:
+        str : A HTML string for downloading the file.
+
+    """
+    
+    if Title is None:
+        Title = os.path.basename(FilePath)
+    
+    URL = quote(FilePath.replace(os.sep, "/"))
+    HTMLText = '<a download="%s" href="%s" target="_blank">%s</a> (%s)' % (html.escape(os.path.basename(FilePath)), URL, html.escape(Title), _FormatFileSize(os.path.getsize(FilePath)))
+    
+    return HTMLText
+
+def ExportDataFrame(DataFrame, FilePath, Format = "CSV", Compression = None, ChunkSize = 10000, Index = True):
+    """Export a dataframe to a CSV or Parquet file in chunks of rows. The
+    CSV files may be compressed using gzip or zstd. The chunks are
+    serialized and compressed one at a time, which bounds the additional
+    memory to the serialized text for a chunk. Each chunk is written as a
+    row group to a Parquet file.
+    
+    The file is written to a temporary file in the same directory and moved
+    in place after all chunks are written. The file path is used as is
+    without adding any extension. Files with .tsv or .txt extension before
+    any compression extension are tab delimited.
+    
+    The zstd compression requires zstandard module and Parquet files require
+    pyarrow module.
+    
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        FilePath (str): Output file path.
+        Format (str): CSV or Parquet.
+        Compression (str): None, gzip or zstd for CSV files and a Parquet
+            compression codec, such as snappy or zstd, for Parquet files.
+        ChunkSize (int): Number of rows in a chunk.
+        Index (bool): Write row index.
+
+    Returns:
+        bool : True on success; Otherwise, False.
+
+    Examples:
+
+        MWUtil.ExportDataFrame(ResultsDataFrame, "ResultsData.csv.gz", Compression = "gzip")
+        MWUtil.ExportDataFrame(ResultsDataFrame, "ResultsData.parquet", Format = "Parquet", Compression = "zstd")
+
+    """
+    
+    if not _ValidateExportFormat(Format, Compression):
+        return False
+    
+    OutputDir = os.path.dirname(FilePath)
+    if len(OutputDir) and not os.path.isdir(OutputDir):
+        os.makedirs(OutputDir)
+    
+    ChunkSize = max(1, ChunkSize)
+    TempFilePath = "%s.tmp%d" % (FilePath, os.getpid())
+    try:
+        if re.match("^Parquet$", Format, re.I):
+            _ExportDataFrameToParquet(DataFrame, TempFilePath, Compression, ChunkSize, Index)
+        else:
+            Sep = "\t" if re.search("\\.(tsv|txt)(\\.(gz|zst))?$", FilePath, re.I) else ","
+            _ExportDataFrameToCSV(DataFrame, TempFilePath, Sep, Compression, ChunkSize, Index)
+        os.replace(TempFilePath, FilePath)
+    finally:
+        if os.path.exists(TempFilePath):
+            os.remove(TempFilePath)
+    
+    return True
+
+def ExportStudiesResultsData(StudiesResultsData, OutputDir, Format = "CSV", Compression = "gzip", ChunkSize = 10000):
+    """Export data frames for all studies and analyses to files in an output
+    directory. Each data frame is exported in chunks of rows using
+    ExportDataFrame to a file named <StudyID>_<AnalysisID>_Data or
+    <FileRoot>_Data for data files along with an extension for the format and
+    compression. The data frames are exported
+    one at a time and the additional memory is bounded by the serialized
+    data for a chunk.
+    
+    Arguments:
+        StudiesResultsData (dict): A dictionary containing retrieved data for 
+            analysis and results in specified study ID(s).
+        OutputDir (str): Output directory.
+        Format (str): CSV or Parquet.
+        Compression (str): None, gzip or zstd for CSV files and a Parquet
+            compression codec for Parquet files.
+        ChunkSize (int): Number of rows in a chunk.
+
+    Returns:
+        panda : A data frame containing the following columns for each
+            exported file: StudyID, AnalysisID, File, Rows, Columns and Size.
+
+    Examples:
+
+        ExportedFilesDataFrame = MWUtil.ExportStudiesResultsData(StudiesResultsData, "MWExports", Compression = "zstd")
+        for FilePath in ExportedFilesDataFrame["File"]:
+            display(HTML(MWUtil.SetupFileDownloadLink(FilePath)))
+
+    """
+    
+    if not _ValidateExportFormat(Format, Compression):
+        return None
+    
+    _PrintMessage("Exporting studies results data to directory %s..." % OutputDir)
+    
+    ExportedFiles = []
+    for StudyID in StudiesResultsData:
+        for AnalysisID in StudiesResultsData[StudyID]:
+            if "data_frame" not in StudiesResultsData[StudyID][AnalysisID]:
+                continue
+            
+            DataFrame = StudiesResultsData[StudyID][AnalysisID]["data_frame"]
+            if AnalysisID == "NA":
+                # Uploaded or local data file...
+                FileName = "%s_Data.csv" % os.path.splitext(StudyID)[0]
+            else:
+                FileName = "%s_%s_Data.csv" % (StudyID, AnalysisID)
+            FileName = _SetupExportFileName(re.sub("[^A-Za-z0-9_.\\-]", "_", FileName), Format, Compression)
+            FilePath = os.path.join(OutputDir, FileName)
+            
+            _PrintMessage("Exporting data for study ID, %s, analysis ID, %s, to %s..." % (StudyID, AnalysisID, FileName))
+            ExportDataFrame(DataFrame, FilePath, Format, Compression, ChunkSize)
+            ExportedFiles.append([StudyID, AnalysisID, FilePath, DataFrame.shape[0], DataFrame.shape[1], os.path.getsize(FilePath)])
+    
+    return pd.DataFrame(ExportedFiles, columns = ["StudyID", "AnalysisID", "File", "Rows", "Columns", "Size"])
+
+def _ValidateExportFormat(Format, Compression):
+    """Validate export format and compression along with required modules."""
+    
+    if re.match("^Parquet$", Format, re.I):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            print("***Error: Exporting Parquet files requires pyarrow module...")
+            return False
+        return True
+    
+    if not re.match("^CSV$", Format, re.I):
+        print("***Error: Unknown export format: %s; Supported values: CSV or Parquet" % Format)
+        return False
+    
+    if Compression is None or re.match("^gzip$", Compression, re.I):
+        return True
+    
+    if re.match("^zstd$", Compression, re.I):
+        try:
+            import zstandard
+        except ImportError:
+            print("***Error: Exporting zstd compressed CSV files requires zstandard module...")
+            return False
+        return True
+    
+    print("***Error: Unknown compression for CSV files: %s; Supported values: None, gzip or zstd" % Compression)
+    return False
+
+def _SetupExportFileName(FileName, Format, Compression):
+    """Setup file name with an extension for export format and compression."""
+    
+    if re.match("^Parquet$", Format, re.I):
+        return "%s.parquet" % os.path.splitext(FileName)[0]
+    
+    if Compression is None:
+        return FileName
+    
+    return "%s%s" % (FileName, ".gz" if re.match("^gzip$", Compression, re.I) else ".zst")
+
+def _ExportDataFrameToCSV(DataFrame, FilePath, Sep, Compression, ChunkSize, Index):
+    """Export a dataframe to a CSV file in chunks of rows."""
+    
+    with open(FilePath, "wb") as FileHandle:
+        if Compression is None:
+            OutputHandle = FileHandle
+        elif re.match("^gzip$", Compression, re.I):
+            # Level 3 is about three times faster than the default level 9 and
+            # the files are only about 5% larger...
+            OutputHandle = gzip.GzipFile(fileobj = FileHandle, mode = "wb", compresslevel = 3)
+        else:
+            import zstandard
+            OutputHandle = zstandard.ZstdCompressor(level = 3).stream_writer(FileHandle, closefd = False)
+        
+        for StartRowNum in range(0, max(DataFrame.shape[0], 1), ChunkSize):
+            ChunkText = DataFrame.iloc[StartRowNum:StartRowNum + ChunkSize].to_csv(sep = Sep, index = Index, header = StartRowNum == 0)
+            OutputHandle.write(ChunkText.encode("utf-8"))
+        
+        if OutputHandle is not FileHandle:
+            OutputHandle.close()
+
+def _ExportDataFrameToParquet(DataFrame, FilePath, Compression, ChunkSize, Index):
+    """Export a dataframe to a Parquet file with a row group for each chunk
+    of rows."""
+    
+    import pyarrow as pa
+    import pyarrow.parquet
+    
+    Writer = None
+    try:
+        for StartRowNum in range(0, max(DataFrame.shape[0], 1), ChunkSize):
+            Chunk = DataFrame.iloc[StartRowNum:StartRowNum + ChunkSize]
+            if Writer is None:
+                ChunkTable = pa.Table.from_pandas(Chunk, preserve_index = Index)
+                Writer = pyarrow.parquet.ParquetWriter(FilePath, ChunkTable.schema, compression = Compression if Compression is not None else "snappy")
+            else:
+                ChunkTable = pa.Table.from_pandas(Chunk, schema = Writer.schema, preserve_index = Index)
+            Writer.write_table(ChunkTable)
+    finally:
+        if Writer is not None:
+            Writer.close()
+
+def _FormatFileSize(Size):
+    """Format file size using units."""
+    
+    for Units in ["bytes", "KB", "MB"]:
+        if Size < 1024.0:
+            return "%d %s" % (Size, Units) if Units == "bytes" else "%.1f %s" % (Size, Units)
+        Size /= 1024.0
+    
+    return "%.1f GB" % Size
+
+
+def SaveStudiesResultsData(StudiesResultsData, OutputDir, Format = "Feather", Compression = None):
+    """Save analysis and results data for studies to a directory of columnar
+    files. Each data frame is written to its own Arrow IPC (Feather) or
+    Parquet file. The class names to numbers map along with any other data
+    for studies and analysis are written to a sidecar JSON file,
+    StudiesResultsData.json.
+    
+    The uncompressed Feather files are memory-mapped by LoadStudiesResultsData
+    to reload data frames without copying or parsing their values. This
+    functionality requires pyarrow module.
+    
+    Arguments:
+        StudiesResultsData (dict): A dictionary containing retrieved data for 
+            analysis and results in specified study ID(s).
+        OutputDir (str): Output directory.
+        Format (str): Feather or Parquet.
+        Compression (str): Compression for columnar files, such as lz4 or
+            zstd. Default: uncompressed for Feather and snappy for Parquet.
+
+    Returns:
+        bool : True on success; Otherwise, False.
+
+    Examples:
+
+        MWUtil.SaveStudiesResultsData(StudiesResultsData, "StudiesResultsDataSnapshot")
+        StudiesResultsData = MWUtil.LoadStudiesResultsData("StudiesResultsDataSnapshot")
+
+    """
+    
+    if re.match("^Feather$", Format, re.I):
+        Format, FileExt = "Feather", ".arrow"
+    elif re.match("^Parquet$", Format, re.I):
+        Format, FileExt = "Parquet", ".parquet"
+    else:
+        print("***Error: SaveStudiesResultsData: Unknown format: %s" % Format)
+        return False
+    
+    try:
+        import pyarrow as pa
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        print("***Error: SaveStudiesResultsData: Saving data frames requires pyarrow module...")
+        return False
+    
+    if not os.path.isdir(OutputDir):
+        os.makedirs(OutputDir)
+    
+    _PrintMessage("Saving studies results data to directory %s..." % OutputDir)
+    
+    SidecarData = {"Format": Format, "StudiesResultsData": []}
+    for StudyID in StudiesResultsData:
+        for AnalysisID in StudiesResultsData[StudyID]:
+            AnalysisData = {}
+            DataFile = None
+            for DataType, DataValue in StudiesResultsData[StudyID][AnalysisID].items():
+                if re.match("^(data_frame)$", DataType, re.I):
+                    DataFile = "DataFrame%d%s" % (len(SidecarData["StudiesResultsData"]) + 1, FileExt)
+                    DataTable = pa.Table.from_pandas(DataValue, preserve_index = True)
+                    if Format == "Feather":
+                        pyarrow.feather.write_feather(DataTable, os.path.join(OutputDir, DataFile), compression = Compression if Compression is not None else "uncompressed")
+                    else:
+                        pyarrow.parquet.write_table(DataTable, os.path.join(OutputDir, DataFile), compression = Compression if Compression is not None else "snappy")
+                else:
+                    AnalysisData[DataType] = DataValue
+            
+            SidecarData["StudiesResultsData"].append({"study_id": StudyID, "analysis_id": AnalysisID, "data_file": DataFile, "analysis_data": AnalysisData})
+    
+    with open(os.path.join(OutputDir, "StudiesResultsData.json"), "w") as FileHandle:
+        json.dump(SidecarData, FileHandle, indent = 1)
+    
+    return True
+
+def LoadStudiesResultsData(InputDir, MemoryMap = True):
+    """Load analysis and results data for studies saved using
+    SaveStudiesResultsData.
+    
+    The data frames saved as uncompressed Feather files are memory-mapped
+    and their values aren't copied into memory during loading. The values in
+    memory-mapped data frames are read only; use copy method of a data
+    frame to update its values in place. This functionality requires pyarrow
+    module.
+    
+    Arguments:
+        InputDir (str): Input directory.
+        MemoryMap (bool): Memory-map data files.
+
+    Returns:
+        dict : A dictionary containing data for analysis and results in
+            study ID(s) or None on failure.
+
+    """
+    
+    SidecarFile = os.path.join(InputDir, "StudiesResultsData.json")
+    if not os.path.isfile(SidecarFile):
+        print("***Error: LoadStudiesResultsData: Studies results data file doesn't exist: %s" % SidecarFile)
+        return None
+    
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet
+    except ImportError:
+        print("***Error: LoadStudiesResultsData: Loading data frames requires pyarrow module...")
+        return None
+    
+    _PrintMessage("Loading studies results data from directory %s..." % InputDir)
+    
+    with open(SidecarFile, "r") as FileHandle:
+        SidecarData = json.load(FileHandle)
+    
+    StudiesResultsData = {}
+    for AnalysisInfo in SidecarData["StudiesResultsData"]:
+        StudyID = AnalysisInfo["study_id"]
+        AnalysisID = AnalysisInfo["analysis_id"]
+        
+        if StudyID not in StudiesResultsData:
+            StudiesResultsData[StudyID] = {}
+        StudiesResultsData[StudyID][AnalysisID] = AnalysisInfo["analysis_data"]
+        
+        if AnalysisInfo["data_file"] is None:
+            continue
+        
+        DataFile = os.path.join(InputDir, AnalysisInfo["data_file"])
+        if SidecarData["Format"] == "Feather":
+            Source = pa.memory_map(DataFile, "r") if MemoryMap else pa.OSFile(DataFile, "rb")
+            DataTable = pa.ipc.open_file(Source).read_all()
+        else:
+            DataTable = pyarrow.parquet.read_table(DataFile, memory_map = MemoryMap)
+        
+        # Setup a data frame using data buffers in data table...
+        StudiesResultsData[StudyID][AnalysisID]["data_frame"] = DataTable.to_pandas(split_blocks = True)
+    
+    return StudiesResultsData
 
 def CheckAndWarnEmptyStudiesData(StudiesResultsData, RetrievedMWData = True, SpecifiedStudyIDs = None):
     """Check and warn about empty results data.
@@ -561,3 +2011,33 @@ def ListClassInformation(StudiesResultsData, StudyID, AnalysisID, RetrievedMWDat
             print("ClassNum: %s; ClassNumColor: %s\nClassName: %s" % (ClassNum, ClassNumColor, ClassName))
         else:
             print("ClassNum: %s; ClassName: %s" % (ClassNum, ClassName))
+
+def SetQuietMode(Quiet = True):
+    """Turn quiet mode on or off. Progress messages printed by functions in
+    MWUtil, MWRefMetUtil and MWAsyncClient modules during retrieval and
+    processing of data are suppressed in quiet mode. Errors, warnings and
+    output of listing functions are always printed.
+
+    Arguments:
+        Quiet (bool): Turn quiet mode on or off.
+
+    Examples:
+
+        MWUtil.SetQuietMode(True)
+        MWTrace.StartTrace()
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, MWBaseURL)
+        display(MWTrace.GetTraceSummary(MWTrace.StopTrace()))
+
+    """
+    
+    global _QuietMode
+    
+    _QuietMode = Quiet
+
+def _PrintMessage(*Args, **Kwargs):
+    """Print a progress message unless quiet mode is on."""
+    
+    if _QuietMode:
+        return
+    
+    print(*Args, **Kwargs)
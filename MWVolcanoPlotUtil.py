@@ -0,0 +1,295 @@
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import itertools
+
+import MWLazyImport
+
+pd = MWLazyImport.LazyImport("pandas")
+np = MWLazyImport.LazyImport("numpy")
+
+scipy = MWLazyImport.LazyImport("scipy", SubModules = ["special"])
+
+import MWUtil
+
+__all__ = ["AdjustPValuesByBenjaminiHochberg", "GenerateVolcanoPlotDataForClassPair", "GenerateVolcanoPlotDataForAllClassPairs", "GenerateVolcanoPlotDataForClassPairs", "GetVolcanoPlotDataFrameForClassPair"]
+
+VolcanoPlotColIDs = ["log2(FoldChange)", "P-value", "-log10(P-value)", "AdjustedP-value", "t-Statistic"]
+
+
+def GenerateVolcanoPlotDataForAllClassPairs(StudiesResultsData, StudiesUIFData = None, ClassNumColID = "ClassNum", ContainsClassCol = True):
+    """Generate volcano plot data for all pairs of classes in all analysis
+    available in studies results data.
+
+    The data for each analysis is log2 transformed once, and the number of
+    values, mean and variance of each metabolite are calculated once for each
+    class. The Welch's t-statistic, P-value, log2 fold change and
+    Benjamini-Hochberg adjusted P-value for all metabolites in all pairs of
+    classes are calculated from these class statistics using vectorized
+    operations. Consequently, the work for each pair of classes is
+    proportional to the number of metabolites.
+
+    Any missing values along with log2 values of zero and negative values
+    are ignored during the calculation of statistics.
+
+    Arguments:
+        StudiesResultsData (dict): A dictionary containing retrieved data for
+            analysis and results in specified study ID(s).
+        StudiesUIFData (dict): A dictionary containing studies and analysis
+            data for creating UIF. It's used to limit the analysis.
+        ClassNumColID (str): Class number column ID.
+        ContainsClassCol (bool): Data frames contain Class column.
+
+    Returns:
+        panda : A long form data frame containing volcano plot data for all
+            pairs of classes with the following columns: StudyID, AnalysisID,
+            FirstClassNum, SecondClassNum, FirstClassName, SecondClassName,
+            Metabolite, log2(FoldChange), P-value, -log10(P-value),
+            AdjustedP-value and t-Statistic.
+
+    Examples:
+
+        StudiesUIFData = MWUtil.SetupUIFDataForStudiesAnalysisAndResults(StudiesResultsData, MinClassCount = 2)
+        VolcanoPlotResults = MWVolcanoPlotUtil.GenerateVolcanoPlotDataForAllClassPairs(StudiesResultsData, StudiesUIFData)
+        VolcanoPlotDataFrame = MWVolcanoPlotUtil.GetVolcanoPlotDataFrameForClassPair(VolcanoPlotResults, StudyID, AnalysisID, 1, 2)
+
+    """
+
+    ResultsDataFrames = []
+    for StudyID, AnalysisID in MWUtil.GetStudyAndAnalysisIDs(StudiesResultsData, StudiesUIFData):
+        AnalysisResultsData = StudiesResultsData[StudyID][AnalysisID]
+        if "data_frame" not in AnalysisResultsData:
+            continue
+
+        ClassNumsToNamesMap = {}
+        if "class_names_to_nums" in AnalysisResultsData:
+            for ClassName, ClassNum in AnalysisResultsData["class_names_to_nums"].items():
+                ClassNumsToNamesMap[ClassNum] = ClassName
+
+        print("Generating volcano plot data for all class pairs in study ID, %s, analysis ID, %s..." % (StudyID, AnalysisID))
+        ResultsDataFrame = GenerateVolcanoPlotDataForClassPairs(AnalysisResultsData["data_frame"], ClassPairs = None, ClassNumColID = ClassNumColID, ContainsClassCol = ContainsClassCol)
+        if ResultsDataFrame.shape[0] == 0:
+            continue
+
+        ResultsDataFrame.insert(0, "AnalysisID", AnalysisID)
+        ResultsDataFrame.insert(0, "StudyID", StudyID)
+        ResultsDataFrame.insert(4, "FirstClassName", ResultsDataFrame["FirstClassNum"].map(ClassNumsToNamesMap))
+        ResultsDataFrame.insert(5, "SecondClassName", ResultsDataFrame["SecondClassNum"].map(ClassNumsToNamesMap))
+
+        ResultsDataFrames.append(ResultsDataFrame)
+
+    if len(ResultsDataFrames) == 0:
+        return pd.DataFrame(columns = ["StudyID", "AnalysisID", "FirstClassNum", "SecondClassNum", "FirstClassName", "SecondClassName", "Metabolite"] + VolcanoPlotColIDs)
+
+    return pd.concat(ResultsDataFrames, axis = 0, ignore_index = True)
+
+def GenerateVolcanoPlotDataForClassPairs(DataFrame, ClassPairs = None, ClassNumColID = "ClassNum", ContainsClassCol = True):
+    """Generate volcano plot data for pairs of classes in a data frame. The
+    statistics for each class are calculated once and reused for all pairs
+    of classes.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        ClassPairs (list): A list of (FirstClassNum, SecondClassNum) tuples.
+            Default: All pairs of classes in ascending order of class numbers.
+        ClassNumColID (str): Class number column ID.
+        ContainsClassCol (bool): Data frame contains Class column.
+
+    Returns:
+        panda : A long form data frame containing volcano plot data for pairs
+            of classes with the following columns: FirstClassNum,
+            SecondClassNum, Metabolite, log2(FoldChange), P-value,
+            -log10(P-value), AdjustedP-value and t-Statistic.
+
+    """
+
+    ClassNums = DataFrame[ClassNumColID].to_numpy()
+
+    DropColIDs = [ClassNumColID]
+    if ContainsClassCol:
+        DropColIDs.append("Class")
+    FeaturesDataFrame = DataFrame.drop(DropColIDs, axis = 1)
+    MetaboliteIDs = FeaturesDataFrame.columns
+
+    # Transform data once...
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        Values = np.log2(FeaturesDataFrame.to_numpy(dtype = np.float64))
+    Values[~np.isfinite(Values)] = np.nan
+
+    # Calculate statistics once for each class...
+    UniqueClassNums = np.unique(ClassNums)
+    ClassCounts, ClassMeans, ClassVariances = _CalculateClassStatistics(Values, ClassNums, UniqueClassNums)
+    del Values
+
+    if ClassPairs is None:
+        ClassPairs = list(itertools.combinations(UniqueClassNums.tolist(), 2))
+
+    if len(ClassPairs) == 0:
+        return pd.DataFrame(columns = ["FirstClassNum", "SecondClassNum", "Metabolite"] + VolcanoPlotColIDs)
+
+    ClassIndicesMap = dict([(ClassNum, Index) for Index, ClassNum in enumerate(UniqueClassNums.tolist())])
+    FirstIndices = np.array([ClassIndicesMap[FirstClassNum] for FirstClassNum, _ in ClassPairs])
+    SecondIndices = np.array([ClassIndicesMap[SecondClassNum] for _, SecondClassNum in ClassPairs])
+
+    # Calculate Welch's t-statistics and P-values for all pairs...
+    NA, NB = ClassCounts[FirstIndices], ClassCounts[SecondIndices]
+    MeanA, MeanB = ClassMeans[FirstIndices], ClassMeans[SecondIndices]
+    VarA, VarB = ClassVariances[FirstIndices], ClassVariances[SecondIndices]
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        SEA = VarA / NA
+        SEB = VarB / NB
+        TStatistics = (MeanA - MeanB) / np.sqrt(SEA + SEB)
+        DegreesOfFreedom = (SEA + SEB) ** 2 / (SEA ** 2 / (NA - 1) + SEB ** 2 / (NB - 1))
+        PValues = 2.0 * scipy.special.stdtr(DegreesOfFreedom, -np.abs(TStatistics))
+        Log10PValues = -np.log10(PValues)
+
+    Log2FoldChanges = MeanB - MeanA
+    AdjustedPValues = AdjustPValuesByBenjaminiHochberg(PValues)
+
+    NumOfPairs, NumOfMetabolites = PValues.shape
+    ResultsDataFrame = pd.DataFrame({
+        "FirstClassNum": np.repeat([FirstClassNum for FirstClassNum, _ in ClassPairs], NumOfMetabolites),
+        "SecondClassNum": np.repeat([SecondClassNum for _, SecondClassNum in ClassPairs], NumOfMetabolites),
+        "Metabolite": np.tile(MetaboliteIDs.to_numpy(dtype = object), NumOfPairs),
+        "log2(FoldChange)": Log2FoldChanges.ravel(),
+        "P-value": PValues.ravel(),
+        "-log10(P-value)": Log10PValues.ravel(),
+        "AdjustedP-value": AdjustedPValues.ravel(),
+        "t-Statistic": TStatistics.ravel()})
+
+    return ResultsDataFrame
+
+def GenerateVolcanoPlotDataForClassPair(DataFrame, FirstClassNum, SecondClassNum, ClassNumColID = "ClassNum", ContainsClassCol = True):
+    """Generate volcano plot data for a pair of classes in a data frame. The
+    data frame contains metabolites as index and the following columns:
+    log2(FoldChange), P-value, -log10(P-value), AdjustedP-value and
+    t-Statistic.
+
+    Arguments:
+        DataFrame (panda): Panda dataframe.
+        FirstClassNum (int): First class number.
+        SecondClassNum (int): Second class number.
+        ClassNumColID (str): Class number column ID.
+        ContainsClassCol (bool): Data frame contains Class column.
+
+    Returns:
+        panda : Volcano plot data frame.
+
+    Examples:
+
+        VolcanoPlotDataFrame = MWVolcanoPlotUtil.GenerateVolcanoPlotDataForClassPair(DataFrame, 1, 2)
+
+    """
+
+    ResultsDataFrame = GenerateVolcanoPlotDataForClassPairs(DataFrame, [(FirstClassNum, SecondClassNum)], ClassNumColID, ContainsClassCol)
+
+    VolcanoPlotDataFrame = ResultsDataFrame[["Metabolite"] + VolcanoPlotColIDs].set_index("Metabolite")
+    VolcanoPlotDataFrame.index.name = None
+
+    return VolcanoPlotDataFrame
+
+def GetVolcanoPlotDataFrameForClassPair(VolcanoPlotResults, StudyID, AnalysisID, FirstClassNum, SecondClassNum):
+    """Get volcano plot data frame for a pair of classes from long form volcano
+    plot data for all class pairs. The data frame contains metabolites as
+    index and the following columns: log2(FoldChange), P-value,
+    -log10(P-value), AdjustedP-value and t-Statistic. The results for a
+    reversed pair of classes are derived by negating the log2 fold changes
+    and t-statistics.
+
+    Arguments:
+        VolcanoPlotResults (panda): Volcano plot data for all class pairs.
+        StudyID (str): StudyID or uploaded file name.
+        AnalysisID (str): AnalysisID or NA for uploaded file.
+        FirstClassNum (int): First class number.
+        SecondClassNum (int): Second class number.
+
+    Returns:
+        panda : Volcano plot data frame or None.
+
+    """
+
+    Reversed = False
+    Mask = (VolcanoPlotResults["StudyID"] == StudyID) & (VolcanoPlotResults["AnalysisID"] == AnalysisID)
+    PairMask = Mask & (VolcanoPlotResults["FirstClassNum"] == FirstClassNum) & (VolcanoPlotResults["SecondClassNum"] == SecondClassNum)
+    if not PairMask.any():
+        Reversed = True
+        PairMask = Mask & (VolcanoPlotResults["FirstClassNum"] == SecondClassNum) & (VolcanoPlotResults["SecondClassNum"] == FirstClassNum)
+        if not PairMask.any():
+            return None
+
+    VolcanoPlotDataFrame = VolcanoPlotResults.loc[PairMask, ["Metabolite"] + VolcanoPlotColIDs].set_index("Metabolite")
+    VolcanoPlotDataFrame.index.name = None
+    if Reversed:
+        VolcanoPlotDataFrame["log2(FoldChange)"] = -VolcanoPlotDataFrame["log2(FoldChange)"]
+        VolcanoPlotDataFrame["t-Statistic"] = -VolcanoPlotDataFrame["t-Statistic"]
+
+    return VolcanoPlotDataFrame
+
+def AdjustPValuesByBenjaminiHochberg(PValues):
+    """Adjust P-values using Benjamini-Hochberg procedure for controlling false
+    discovery rate. The P-values in each row of a two dimensional array are
+    adjusted independently. Any NaN values are ignored.
+
+    Arguments:
+        PValues (array): One or two dimensional array containing P-values.
+
+    Returns:
+        array : Adjusted P-values.
+
+    """
+
+    PValues = np.asarray(PValues, dtype = np.float64)
+    OneDimensional = PValues.ndim == 1
+    if OneDimensional:
+        PValues = PValues[np.newaxis, :]
+
+    # NaN values are sorted at the end of each row...
+    SortedIndices = np.argsort(PValues, axis = 1, kind = "mergesort")
+    SortedPValues = np.take_along_axis(PValues, SortedIndices, axis = 1)
+
+    NumOfPValues = np.sum(~np.isnan(PValues), axis = 1, keepdims = True)
+    Ranks = np.arange(1, PValues.shape[1] + 1)[np.newaxis, :]
+    with np.errstate(invalid = "ignore"):
+        AdjustedSortedPValues = SortedPValues * NumOfPValues / Ranks
+
+    # Enforce monotonicity starting from the largest P-value...
+    AdjustedSortedPValues = np.where(np.isnan(AdjustedSortedPValues), np.inf, AdjustedSortedPValues)
+    AdjustedSortedPValues = np.minimum.accumulate(AdjustedSortedPValues[:, ::-1], axis = 1)[:, ::-1]
+    AdjustedSortedPValues = np.minimum(AdjustedSortedPValues, 1.0)
+    AdjustedSortedPValues[np.isnan(SortedPValues)] = np.nan
+
+    AdjustedPValues = np.empty_like(AdjustedSortedPValues)
+    np.put_along_axis(AdjustedPValues, SortedIndices, AdjustedSortedPValues, axis = 1)
+
+    return AdjustedPValues[0] if OneDimensional else AdjustedPValues
+
+def _CalculateClassStatistics(Values, ClassNums, UniqueClassNums):
+    """Calculate number of values, mean and variance for each column in each
+    class ignoring NaN values."""
+
+    NumOfClasses = len(UniqueClassNums)
+    NumOfCols = Values.shape[1]
+
+    ClassCounts = np.empty((NumOfClasses, NumOfCols), dtype = np.float64)
+    ClassMeans = np.empty((NumOfClasses, NumOfCols), dtype = np.float64)
+    ClassVariances = np.empty((NumOfClasses, NumOfCols), dtype = np.float64)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        for Index, ClassNum in enumerate(UniqueClassNums):
+            ClassValues = Values[ClassNums == ClassNum]
+            IsValid = ~np.isnan(ClassValues)
+
+            Counts = IsValid.sum(axis = 0).astype(np.float64)
+            Sums = np.where(IsValid, ClassValues, 0.0).sum(axis = 0)
+            Means = Sums / Counts
+            Deviations = np.where(IsValid, ClassValues - Means, 0.0)
+
+            ClassCounts[Index] = Counts
+            ClassMeans[Index] = Means
+            ClassVariances[Index] = (Deviations ** 2).sum(axis = 0) / (Counts - 1)
+
+    return (ClassCounts, ClassMeans, ClassVariances)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+# Benchmark setting up dataframes from MW datatable text using the
+# single-pass parser in MWUtil against the previous text rewrite path.
+#
+# Usage:
+#
+#     python benchmarks/BenchmarkDataTableParsing.py [--samples 200] [--features 1000,5000,10000]
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import argparse
+from io import StringIO
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import MWUtil
+
+
+def ProcessDataTableTextUsingTextRewrite(DataTableText, Sep = "\t", NewSampleColName = None, NewClassColName = None, AddClassNum = True):
+    """Previous implementation rewriting datatable text before setting up a
+    dataframe. It's retained here as a reference for output and timings."""
+
+    DataLines = []
+
+    DataTableText = re.sub("(\r\n)|(\r)", "\n", DataTableText)
+    TextLines = DataTableText.split("\n")
+
+    LineWords = TextLines[0].split(Sep)
+
+    DataLabels = []
+    DataLabels.append(NewSampleColName if NewSampleColName is not None else LineWords[0])
+    DataLabels.append(NewClassColName if NewClassColName is not None else LineWords[1])
+    if AddClassNum:
+        DataLabels.append("ClassNum")
+    DataLabels.extend(LineWords[2:])
+
+    DataLines.append(Sep.join(DataLabels))
+
+    ClassNamesMap = {}
+    ClassNum = 0
+    for Index in range(1, len(TextLines)):
+        LineWords = TextLines[Index].split(Sep)
+        if len(LineWords) <= 2:
+            continue
+
+        DataLine = [LineWords[0], LineWords[1]]
+        if AddClassNum:
+            ClassName = LineWords[1]
+            if ClassName not in ClassNamesMap:
+                ClassNum += 1
+                ClassNamesMap[ClassName] = ClassNum
+            DataLine.append("%s" % ClassNamesMap[ClassName])
+        DataLine.extend(LineWords[2:])
+
+        DataLines.append(Sep.join(DataLine))
+
+    ResultsDataTable = "\n".join(DataLines)
+    DataFrame = pd.read_csv(StringIO(ResultsDataTable), sep = Sep, index_col = 0)
+
+    return (DataFrame, ClassNamesMap)
+
+def GenerateDataTable(NumOfSamples, NumOfFeatures, NumOfClasses = 4, Seed = 0):
+    """Generate datatable text in MW layout."""
+
+    RandomState = np.random.RandomState(Seed)
+
+    Values = RandomState.lognormal(mean = 8.0, sigma = 1.5, size = (NumOfSamples, NumOfFeatures)).round(2)
+    DataFrame = pd.DataFrame(Values, columns = ["Metabolite_%d" % Index for Index in range(NumOfFeatures)])
+    DataFrame.insert(0, "Class", ["Treatment:Group %d" % (Index % NumOfClasses) for Index in range(NumOfSamples)])
+    DataFrame.insert(0, "Samples", ["Sample_%d" % Index for Index in range(NumOfSamples)])
+
+    DataTableText = DataFrame.to_csv(sep = "\t", index = False)
+
+    # Add a trailing short line as found in MW datatables...
+    DataTableText += "Sample_NA\tNA\n"
+
+    return DataTableText.encode("utf-8")
+
+def TimeFunction(FuncRef, NumOfRepeats):
+    """Return minimum wall time in seconds for calling a function."""
+
+    Times = []
+    for Index in range(NumOfRepeats):
+        StartTime = time.perf_counter()
+        FuncRef()
+        Times.append(time.perf_counter() - StartTime)
+
+    return min(Times)
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Benchmark MW datatable parsing.")
+    Parser.add_argument("--samples", type = int, default = 200, help = "Number of samples")
+    Parser.add_argument("--features", default = "1000,5000,10000", help = "Comma delimited number of features")
+    Parser.add_argument("--repeats", type = int, default = 3, help = "Number of repeats")
+    Options = Parser.parse_args()
+
+    print("%10s %10s %12s %12s %8s %10s" % ("Samples", "Features", "Rewrite (s)", "Direct (s)", "Speedup", "Identical"))
+    for NumOfFeatures in [int(Value) for Value in Options.features.split(",")]:
+        DataTable = GenerateDataTable(Options.samples, NumOfFeatures)
+
+        RewriteDataFrame, RewriteClassNamesMap = ProcessDataTableTextUsingTextRewrite(DataTable.decode("utf-8"))
+        DirectDataFrame, DirectClassNamesMap = MWUtil._SetupDataFrameFromDataTable(DataTable)
+        Identical = RewriteDataFrame.equals(DirectDataFrame) and list(RewriteDataFrame.columns) == list(DirectDataFrame.columns) and RewriteClassNamesMap == DirectClassNamesMap
+
+        RewriteTime = TimeFunction(lambda: ProcessDataTableTextUsingTextRewrite(DataTable.decode("utf-8")), Options.repeats)
+        DirectTime = TimeFunction(lambda: MWUtil._SetupDataFrameFromDataTable(DataTable), Options.repeats)
+
+        print("%10d %10d %12.3f %12.3f %7.2fx %10s" % (Options.samples, NumOfFeatures, RewriteTime, DirectTime, RewriteTime / DirectTime, Identical))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#
+# Benchmark cold import times for MW modules and notebook imports with lazy
+# loading of heavy dependencies against eager loading enabled by setting
+# MW_EAGER_IMPORTS environment variable. Each import is timed in a new
+# Python process.
+#
+# Usage:
+#
+#     python benchmarks/BenchmarkImportTime.py [--modules All] [--repeats 5]
+#     python benchmarks/BenchmarkImportTime.py --modules MWUtil,Notebook
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BenchmarksDir = os.path.dirname(os.path.abspath(__file__))
+PackageDir = os.path.abspath(os.path.join(BenchmarksDir, ".."))
+
+# Modules imported by MW modules and notebooks, which are loaded lazily...
+HeavyModules = ["pandas", "numpy", "requests", "scipy", "sklearn", "pyarrow", "matplotlib", "seaborn", "statsmodels", "ipywidgets", "aiohttp"]
+
+# Module imports for targets...
+Targets = [
+    ("MWUtil", ["MWUtil"]),
+    ("MWCache", ["MWCache"]),
+    ("MWPipeline", ["MWPipeline"]),
+    ("MWAlignmentUtil", ["MWAlignmentUtil"]),
+    ("MWAsyncClient", ["MWAsyncClient"]),
+    ("MWHeatmapUtil", ["MWHeatmapUtil"]),
+    ("MWRLAUtil", ["MWRLAUtil"]),
+    ("MWVolcanoPlotUtil", ["MWVolcanoPlotUtil"]),
+    ("MWRandomForestUtil", ["MWRandomForestUtil"]),
+    ("MWModelValidationUtil", ["MWModelValidationUtil"]),
+    ("MWMultivariateUtil", ["MWMultivariateUtil"]),
+    ("MWBatchRunner", ["MWBatchRunner"]),
+    ("MWNotebookUtil", ["MWNotebookUtil"]),
+    ("Notebook", ["MWUtil", "MWCache", "MWPipeline", "MWNotebookUtil", "MWMultivariateUtil", "MWModelValidationUtil"]),
+]
+
+# Code for timing imports in a new process...
+ImportTimeCode = """
+import sys
+import time
+import json
+
+sys.path.insert(0, %r)
+
+StartTime = time.perf_counter()
+for ModuleName in %r:
+    __import__(ModuleName)
+ImportTime = time.perf_counter() - StartTime
+
+print(json.dumps({"Time": ImportTime, "Loaded": [ModuleName for ModuleName in %r if ModuleName in sys.modules]}))
+"""
+
+
+def TimeImport(ModuleNames, EagerImports):
+    """Time import of modules in a new Python process and return import time
+    along with heavy modules loaded during the import or None for failed
+    import."""
+
+    Env = dict(os.environ)
+    Env["MW_EAGER_IMPORTS"] = "1" if EagerImports else "0"
+
+    Code = ImportTimeCode % (PackageDir, ModuleNames, HeavyModules)
+    try:
+        Output = subprocess.check_output([sys.executable, "-c", Code], env = Env, cwd = PackageDir, stderr = subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        return None
+
+    return json.loads(Output.decode("utf-8").strip().splitlines()[-1])
+
+def RunTarget(ModuleNames, NumOfRepeats):
+    """Run eager and lazy imports for a target and return minimum times or
+    None for failed imports."""
+
+    Result = {}
+    for Mode, EagerImports in [("Eager", True), ("Lazy", False)]:
+        Times = []
+        for Index in range(NumOfRepeats):
+            ImportResult = TimeImport(ModuleNames, EagerImports)
+            if ImportResult is None:
+                return None
+            Times.append(ImportResult["Time"])
+
+        Result[Mode] = min(Times)
+        Result["%sLoaded" % Mode] = ImportResult["Loaded"]
+
+    return Result
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Benchmark cold import times for MW modules with lazy and eager loading of heavy dependencies.")
+    Parser.add_argument("--modules", default = "All", help = "Comma delimited targets or All. Supported values: %s" % ", ".join([Name for Name, ModuleNames in Targets]))
+    Parser.add_argument("--repeats", type = int, default = 5, help = "Number of timed imports for each target and mode")
+    Options = Parser.parse_args()
+
+    SelectedTargets = Targets
+    if Options.modules.lower() != "all":
+        TargetNames = [Name.strip().lower() for Name in Options.modules.split(",")]
+        SelectedTargets = [Target for Target in Targets if Target[0].lower() in TargetNames]
+        if len(SelectedTargets) != len(TargetNames):
+            Parser.error("Unknown target(s) in %s; Supported values: %s" % (Options.modules, ", ".join([Target[0] for Target in Targets])))
+
+    print("Python: %s; Repeats: %d\n" % (sys.version.split()[0], Options.repeats))
+    print("%-24s %10s %10s %8s  %s" % ("Target", "Eager (s)", "Lazy (s)", "Speedup", "Heavy modules loaded by lazy import"))
+
+    TotalEagerTime, TotalLazyTime = 0.0, 0.0
+    for Name, ModuleNames in SelectedTargets:
+        Result = RunTarget(ModuleNames, Options.repeats)
+        if Result is None:
+            print("%-24s ***Warning: Failed to import %s; Skipped target with missing dependencies..." % (Name, ", ".join(ModuleNames)))
+            continue
+
+        TotalEagerTime += Result["Eager"]
+        TotalLazyTime += Result["Lazy"]
+
+        Loaded = ", ".join(Result["LazyLoaded"]) if len(Result["LazyLoaded"]) else "None"
+        print("%-24s %10.3f %10.3f %7.1fx  %s" % (Name, Result["Eager"], Result["Lazy"], Result["Eager"] / Result["Lazy"], Loaded))
+        sys.stdout.flush()
+
+    if TotalLazyTime > 0:
+        print("\n%-24s %10.3f %10.3f %7.1fx" % ("Total", TotalEagerTime, TotalLazyTime, TotalEagerTime / TotalLazyTime))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+#
+# Benchmark permutation tests for PLSDA and LDA models using
+# MWModelValidationUtil across different numbers of worker processes.
+#
+# Usage:
+#
+#     python benchmarks/BenchmarkModelValidation.py [--samples 60] [--features 300] [--permutations 200]
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import MWModelValidationUtil
+
+
+def GenerateDataFrame(NumOfSamples, NumOfFeatures, NumOfClasses = 3, Seed = 0):
+    """Generate a data frame in MW layout."""
+
+    RandomState = np.random.RandomState(Seed)
+
+    ClassNums = np.array([(Index % NumOfClasses) + 1 for Index in range(NumOfSamples)])
+    Values = RandomState.lognormal(mean = 8.0, sigma = 1.5, size = (NumOfSamples, NumOfFeatures))
+
+    # Shift a few features for each class...
+    for ClassNum in range(1, NumOfClasses + 1):
+        Values[ClassNums == ClassNum, (ClassNum * 10):(ClassNum * 10 + 5)] *= 2.0
+
+    DataFrame = pd.DataFrame(Values, columns = ["Metabolite_%d" % Index for Index in range(NumOfFeatures)],
+                             index = ["Sample_%d" % Index for Index in range(NumOfSamples)])
+    DataFrame.insert(0, "ClassNum", ClassNums)
+    DataFrame.insert(0, "Class", ["Treatment:Group %d" % ClassNum for ClassNum in ClassNums])
+
+    return DataFrame
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Benchmark permutation tests for model validation.")
+    Parser.add_argument("--samples", type = int, default = 60, help = "Number of samples")
+    Parser.add_argument("--features", type = int, default = 300, help = "Number of features")
+    Parser.add_argument("--classes", type = int, default = 3, help = "Number of classes")
+    Parser.add_argument("--method", default = "PLSDA", help = "PLSDA or LDA")
+    Parser.add_argument("--components", type = int, default = 2, help = "Number of components")
+    Parser.add_argument("--folds", type = int, default = 5, help = "Number of folds")
+    Parser.add_argument("--permutations", type = int, default = 200, help = "Number of permutations")
+    Parser.add_argument("--workers", default = None, help = "Comma delimited number of worker processes. Default: 1, 2, 4... up to core count")
+    Options = Parser.parse_args()
+
+    NumOfCores = os.cpu_count() or 1
+    if Options.workers is None:
+        WorkersList = [1]
+        while WorkersList[-1] * 2 <= NumOfCores:
+            WorkersList.append(WorkersList[-1] * 2)
+        if WorkersList[-1] != NumOfCores:
+            WorkersList.append(NumOfCores)
+    else:
+        WorkersList = [int(Value) for Value in Options.workers.split(",")]
+
+    DataFrame = GenerateDataFrame(Options.samples, Options.features, Options.classes)
+    NumOfModels = Options.permutations * Options.folds
+
+    print("Cores: %d; Samples: %d; Features: %d; Method: %s; Permutations: %d; Folds: %d; Models: %d\n" % (NumOfCores, Options.samples, Options.features, Options.method, Options.permutations, Options.folds, NumOfModels))
+
+    Results = []
+    ReferenceDataFrame = None
+    for NumOfWorkers in WorkersList:
+        StartTime = time.perf_counter()
+        PermutationsDataFrame, SummaryDataFrame = MWModelValidationUtil.GeneratePermutationTestData(DataFrame, Method = Options.method,
+                                                      NumComponents = Options.components, NumOfPermutations = Options.permutations,
+                                                      NumOfFolds = Options.folds, RandomSeed = 0, NumOfWorkers = NumOfWorkers)
+        ElapsedTime = time.perf_counter() - StartTime
+
+        if ReferenceDataFrame is None:
+            ReferenceDataFrame = PermutationsDataFrame
+        Identical = ReferenceDataFrame.equals(PermutationsDataFrame)
+
+        Results.append((NumOfWorkers, ElapsedTime, NumOfModels / ElapsedTime, Identical))
+
+    print("\n%8s %10s %12s %8s %10s" % ("Workers", "Time (s)", "Models/sec", "Speedup", "Identical"))
+    for NumOfWorkers, ElapsedTime, ModelsPerSec, Identical in Results:
+        print("%8d %10.2f %12.2f %7.2fx %10s" % (NumOfWorkers, ElapsedTime, ModelsPerSec, ModelsPerSec / Results[0][2], Identical))
+
+if __name__ == "__main__":
+    main()
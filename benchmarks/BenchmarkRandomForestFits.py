@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+# Benchmark training random forests for repeated random splits of data using
+# MWRandomForestUtil across different numbers of worker processes and jobs.
+#
+# Usage:
+#
+#     python benchmarks/BenchmarkRandomForestFits.py [--samples 120] [--features 500] [--splits 8]
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import MWRandomForestUtil
+
+
+def GenerateStudiesResultsData(NumOfSamples, NumOfFeatures, NumOfClasses = 3, Seed = 0):
+    """Generate studies results data containing a data frame in MW layout."""
+
+    RandomState = np.random.RandomState(Seed)
+
+    ClassNums = np.array([(Index % NumOfClasses) + 1 for Index in range(NumOfSamples)])
+    Values = RandomState.lognormal(mean = 8.0, sigma = 1.5, size = (NumOfSamples, NumOfFeatures))
+
+    # Shift a few features for each class...
+    for ClassNum in range(1, NumOfClasses + 1):
+        Values[ClassNums == ClassNum, (ClassNum * 10):(ClassNum * 10 + 5)] *= 2.0
+
+    DataFrame = pd.DataFrame(Values, columns = ["Metabolite_%d" % Index for Index in range(NumOfFeatures)],
+                             index = ["Sample_%d" % Index for Index in range(NumOfSamples)])
+    DataFrame.insert(0, "ClassNum", ClassNums)
+    DataFrame.insert(0, "Class", ["Treatment:Group %d" % ClassNum for ClassNum in ClassNums])
+
+    return {"Synthetic": {"NA": {"data_frame": DataFrame}}}
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Benchmark random forest fits.")
+    Parser.add_argument("--samples", type = int, default = 120, help = "Number of samples")
+    Parser.add_argument("--features", type = int, default = 500, help = "Number of features")
+    Parser.add_argument("--classes", type = int, default = 3, help = "Number of classes")
+    Parser.add_argument("--splits", type = int, default = 8, help = "Number of random splits for each class pair")
+    Parser.add_argument("--estimators", type = int, default = 250, help = "Number of trees in a forest")
+    Parser.add_argument("--workers", default = None, help = "Comma delimited number of worker processes. Default: 1, 2, 4... up to core count")
+    Options = Parser.parse_args()
+
+    NumOfCores = os.cpu_count() or 1
+    if Options.workers is None:
+        WorkersList = [1]
+        while WorkersList[-1] * 2 <= NumOfCores:
+            WorkersList.append(WorkersList[-1] * 2)
+        if WorkersList[-1] != NumOfCores:
+            WorkersList.append(NumOfCores)
+    else:
+        WorkersList = [int(Value) for Value in Options.workers.split(",")]
+
+    StudiesResultsData = GenerateStudiesResultsData(Options.samples, Options.features, Options.classes)
+    NumOfPairs = Options.classes * (Options.classes - 1) // 2
+    NumOfFits = NumOfPairs * Options.splits
+
+    print("Cores: %d; Samples: %d; Features: %d; Class pairs: %d; Splits: %d; Fits: %d\n" % (NumOfCores, Options.samples, Options.features, NumOfPairs, Options.splits, NumOfFits))
+
+    # Compare a few combinations of worker processes and jobs in each forest...
+    Configs = []
+    for NumOfWorkers in WorkersList:
+        Configs.append((NumOfWorkers, 1))
+        NumOfJobs = NumOfCores // NumOfWorkers
+        if NumOfJobs > 1:
+            Configs.append((NumOfWorkers, NumOfJobs))
+
+    Results = []
+    ReferenceDataFrame = None
+    for NumOfWorkers, NumOfJobs in Configs:
+        StartTime = time.perf_counter()
+        StabilityDataFrame = MWRandomForestUtil.GenerateVIPStabilityData(StudiesResultsData, NumOfSplits = Options.splits,
+                                                                         NumOfEstimators = Options.estimators,
+                                                                         NumOfWorkers = NumOfWorkers, NumOfJobs = NumOfJobs)
+        ElapsedTime = time.perf_counter() - StartTime
+
+        if ReferenceDataFrame is None:
+            ReferenceDataFrame = StabilityDataFrame
+        Identical = np.allclose(ReferenceDataFrame["Mean Variable Importance"].to_numpy(), StabilityDataFrame["Mean Variable Importance"].to_numpy())
+
+        Results.append((NumOfWorkers, NumOfJobs, ElapsedTime, NumOfFits / ElapsedTime, Identical))
+
+    print("\n%8s %6s %10s %10s %8s %10s" % ("Workers", "Jobs", "Time (s)", "Fits/sec", "Speedup", "Identical"))
+    for NumOfWorkers, NumOfJobs, ElapsedTime, FitsPerSec, Identical in Results:
+        print("%8d %6d %10.2f %10.2f %7.2fx %10s" % (NumOfWorkers, NumOfJobs, ElapsedTime, FitsPerSec, FitsPerSec / Results[0][3], Identical))
+
+if __name__ == "__main__":
+    main()
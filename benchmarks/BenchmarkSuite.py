@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+#
+# Run timed benchmark scenarios for retrieval, missing values processing and
+# analysis computations using synthetic datasets in MW layout along with a
+# local MW REST API stand-in. The results are saved to a JSON file and may be
+# compared against results saved for an earlier version to identify
+# regressions.
+#
+# Usage:
+#
+#     python benchmarks/BenchmarkSuite.py [--scale small|medium|large] [--scenarios All] [--repeats 3]
+#     python benchmarks/BenchmarkSuite.py --scale medium --compare benchmarks/results/BenchmarkResults-20240101-120000-abc1234.json
+#     python benchmarks/BenchmarkSuite.py --list
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import json
+import platform
+import argparse
+import subprocess
+import contextlib
+
+import pandas as pd
+import numpy as np
+
+BenchmarksDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BenchmarksDir, ".."))
+sys.path.insert(0, BenchmarksDir)
+
+import MWUtil
+import MWVolcanoPlotUtil
+import MWRandomForestUtil
+import MWHeatmapUtil
+import MWSyntheticData
+import MWRESTStandIn
+
+# Dataset sizes for scales...
+Scales = {
+    "small": {"Studies": 4, "Analyses": 2, "Samples": 60, "Features": 500, "Classes": 3},
+    "medium": {"Studies": 8, "Analyses": 2, "Samples": 200, "Features": 2000, "Classes": 4},
+    "large": {"Studies": 16, "Analyses": 2, "Samples": 500, "Features": 10000, "Classes": 4},
+}
+
+
+def SetupRetrieveStudies(Config, NumOfWorkers):
+    """Setup retrieval of synthetic studies from the local REST stand-in."""
+
+    StudiesData = MWSyntheticData.GenerateStudiesData(Config["Studies"], Config["Analyses"], Config["Samples"], Config["Features"], Config["Classes"], Config["MissingValuesFraction"])
+    RESTStandIn = MWRESTStandIn.StartRESTStandIn(StudiesData, Latency = Config["Latency"])
+    StudyIDs = " ".join(StudiesData["StudyIDs"])
+
+    def Run():
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(StudyIDs, RESTStandIn["MWBaseURL"], NumOfWorkers = NumOfWorkers)
+        if len(StudiesResultsData) != Config["Studies"]:
+            raise ValueError("Retrieved %d of %d studies" % (len(StudiesResultsData), Config["Studies"]))
+
+    return (Run, lambda: MWRESTStandIn.StopRESTStandIn(RESTStandIn))
+
+def SetupRetrieveUploadedData(Config, ChunkSize = None):
+    """Setup processing of synthetic uploaded data files."""
+
+    UploadedDataInfo = MWSyntheticData.GenerateUploadedDataInfo(Config["Analyses"], Config["Samples"], Config["Features"], Config["Classes"], Config["MissingValuesFraction"])
+
+    def Run():
+        MWUtil.RetrieveUploadedData(UploadedDataInfo, ChunkSize = ChunkSize)
+
+    return (Run, None)
+
+def SetupProcessMissingValues(Config, Method):
+    """Setup processing of missing values in a synthetic data frame."""
+
+    DataFrame = _SetupDataFrame(Config, Config["MissingValuesFraction"])
+
+    def Run():
+        MWUtil.ProcessMissingValues(DataFrame, Method)
+
+    return (Run, None)
+
+def SetupVolcanoPlot(Config):
+    """Setup generation of volcano plot data for all class pairs."""
+
+    DataFrame = _SetupDataFrame(Config)
+
+    def Run():
+        MWVolcanoPlotUtil.GenerateVolcanoPlotDataForClassPairs(DataFrame)
+
+    return (Run, None)
+
+def SetupRandomForest(Config):
+    """Setup generation of variable importance stability data."""
+
+    StudiesResultsData = {"Synthetic": {"NA": {"data_frame": _SetupDataFrame(Config)}}}
+
+    def Run():
+        MWRandomForestUtil.GenerateVIPStabilityData(StudiesResultsData, NumOfSplits = 2, NumOfEstimators = 50)
+
+    return (Run, None)
+
+def SetupHeatmap(Config):
+    """Setup generation of clustered heatmap data for normalized data."""
+
+    DataFrame = _SetupDataFrame(Config)
+    FeaturesDataFrame = MWUtil.NormalizeData(DataFrame.drop(["Class", "ClassNum"], axis = 1), Method = "ZScore", ClassColID = None, ClassNumColID = None)
+
+    def Run():
+        MWHeatmapUtil.GenerateClusteredHeatmapData(FeaturesDataFrame, MaxFeatures = 1000)
+
+    return (Run, None)
+
+# Scenarios along with descriptions, setup functions and their arguments...
+Scenarios = [
+    ("RetrieveStudies", "Retrieve studies from REST stand-in using 1 worker", SetupRetrieveStudies, (1,)),
+    ("RetrieveStudiesConcurrent", "Retrieve studies from REST stand-in using 4 workers", SetupRetrieveStudies, (4,)),
+    ("RetrieveUploadedData", "Process uploaded data files", SetupRetrieveUploadedData, ()),
+    ("RetrieveUploadedDataInChunks", "Process uploaded data files in chunks of 100 rows", SetupRetrieveUploadedData, (100,)),
+    ("ProcessMissingValuesColumnMean", "Replace missing values by column mean", SetupProcessMissingValues, ("ReplaceByColumnMean",)),
+    ("ProcessMissingValuesClassMean", "Replace missing values by column mean for class", SetupProcessMissingValues, ("ReplaceByClassMean",)),
+    ("ProcessMissingValuesKNN", "Replace missing values by mean of nearest neighbors", SetupProcessMissingValues, ("ReplaceByKNN",)),
+    ("VolcanoPlot", "Generate volcano plot data for all class pairs", SetupVolcanoPlot, ()),
+    ("RandomForest", "Generate variable importance stability data using 2 splits and 50 trees", SetupRandomForest, ()),
+    ("Heatmap", "Generate clustered heatmap data for up to 1000 features", SetupHeatmap, ()),
+]
+
+def _SetupDataFrame(Config, MissingValuesFraction = 0.0):
+    """Setup a synthetic data frame in the layout of retrieved data."""
+
+    DataTable = MWSyntheticData.GenerateDataTable(Config["Samples"], Config["Features"], Config["Classes"], MissingValuesFraction)
+    with open(os.devnull, "w") as NullHandle, contextlib.redirect_stdout(NullHandle):
+        DataFrame, ClassNamesMap = MWUtil._SetupDataFrameFromDataTable(DataTable, NewSampleColName = "Samples", NewClassColName = "Class")
+        DataFrame = MWUtil.CoerceDataFramColumnValuesToNumeric(DataFrame, StartColNum = 2)
+
+    return DataFrame
+
+def RunScenario(Name, SetupFuncRef, SetupFuncArgs, Config, NumOfRepeats):
+    """Run a scenario and return its timings. The output of scenario is
+    suppressed."""
+
+    RunFuncRef, CleanupFuncRef = SetupFuncRef(Config, *SetupFuncArgs)
+
+    Times = []
+    try:
+        with open(os.devnull, "w") as NullHandle, contextlib.redirect_stdout(NullHandle):
+            # Warm up...
+            RunFuncRef()
+            for Index in range(NumOfRepeats):
+                StartTime = time.perf_counter()
+                RunFuncRef()
+                Times.append(time.perf_counter() - StartTime)
+    finally:
+        if CleanupFuncRef is not None:
+            CleanupFuncRef()
+
+    return {"Scenario": Name, "Min Time": min(Times), "Median Time": float(np.median(Times)), "Times": Times}
+
+def GetGitRevision():
+    """Get git revision for the repository or NA."""
+
+    try:
+        Revision = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd = BenchmarksDir, stderr = subprocess.DEVNULL)
+        return Revision.decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "NA"
+
+def CompareResults(Results, BaselineResultsFile, Threshold):
+    """Compare minimum times for scenarios against baseline results and list
+    regressions."""
+
+    with open(BaselineResultsFile, "r") as FileHandle:
+        BaselineResults = json.load(FileHandle)
+
+    if BaselineResults["Scale"] != Results["Scale"]:
+        print("***Warning: Comparing results for scale %s against baseline results for scale %s..." % (Results["Scale"], BaselineResults["Scale"]))
+
+    BaselineTimes = dict([(Result["Scenario"], Result["Min Time"]) for Result in BaselineResults["Results"]])
+
+    print("\nComparison against baseline %s (revision: %s; %s)..." % (BaselineResultsFile, BaselineResults["GitRevision"], BaselineResults["Timestamp"]))
+    print("%-32s %12s %12s %8s %12s" % ("Scenario", "Baseline (s)", "Current (s)", "Ratio", "Status"))
+
+    NumOfRegressions = 0
+    for Result in Results["Results"]:
+        if Result["Scenario"] not in BaselineTimes:
+            print("%-32s %12s %12.3f %8s %12s" % (Result["Scenario"], "NA", Result["Min Time"], "NA", "New"))
+            continue
+
+        Ratio = Result["Min Time"] / BaselineTimes[Result["Scenario"]]
+        Status = "OK"
+        if Ratio > 1.0 + Threshold:
+            Status = "Regression"
+            NumOfRegressions += 1
+        elif Ratio < 1.0 / (1.0 + Threshold):
+            Status = "Improvement"
+
+        print("%-32s %12.3f %12.3f %7.2fx %12s" % (Result["Scenario"], BaselineTimes[Result["Scenario"]], Result["Min Time"], Ratio, Status))
+
+    return NumOfRegressions
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Run MW benchmark scenarios using synthetic datasets.")
+    Parser.add_argument("--scale", default = "small", choices = sorted(Scales), help = "Dataset scale")
+    Parser.add_argument("--scenarios", default = "All", help = "Comma delimited scenarios or All. Use --list to list available scenarios")
+    Parser.add_argument("--repeats", type = int, default = 3, help = "Number of timed repeats for each scenario")
+    Parser.add_argument("--missing", type = float, default = 0.05, help = "Fraction of missing values in retrieved and uploaded data")
+    Parser.add_argument("--latency", type = float, default = 0.01, help = "Latency for each REST response in seconds")
+    Parser.add_argument("--output", default = None, help = "Results file. Default: benchmarks/results/BenchmarkResults-<Timestamp>-<GitRevision>.json")
+    Parser.add_argument("--compare", default = None, help = "Baseline results file for comparison")
+    Parser.add_argument("--threshold", type = float, default = 0.1, help = "Fractional increase in time over baseline reported as a regression")
+    Parser.add_argument("--list", action = "store_true", help = "List available scenarios")
+    Options = Parser.parse_args()
+
+    if Options.list:
+        for Name, Description, SetupFuncRef, SetupFuncArgs in Scenarios:
+            print("%s: %s" % (Name, Description))
+        return 0
+
+    SelectedScenarios = Scenarios
+    if not re.match("^All$", Options.scenarios, re.I):
+        ScenarioNames = [Name.strip().lower() for Name in Options.scenarios.split(",")]
+        SelectedScenarios = [Scenario for Scenario in Scenarios if Scenario[0].lower() in ScenarioNames]
+        if len(SelectedScenarios) != len(ScenarioNames):
+            Parser.error("Unknown scenario(s) in %s; Supported values: %s" % (Options.scenarios, ", ".join([Scenario[0] for Scenario in Scenarios])))
+
+    Config = dict(Scales[Options.scale])
+    Config["MissingValuesFraction"] = Options.missing
+    Config["Latency"] = Options.latency
+
+    Results = {"Timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "GitRevision": GetGitRevision(), "Scale": Options.scale, "Config": Config, "Repeats": Options.repeats,
+               "Platform": platform.platform(), "Python": platform.python_version(), "Pandas": pd.__version__, "NumPy": np.__version__, "CPUCount": os.cpu_count(),
+               "Results": []}
+
+    print("Revision: %s; Scale: %s; Studies: %d; Analyses: %d; Samples: %d; Features: %d; Classes: %d; Missing: %.2f; Latency: %.3f sec\n" % (Results["GitRevision"], Options.scale, Config["Studies"], Config["Analyses"], Config["Samples"], Config["Features"], Config["Classes"], Config["MissingValuesFraction"], Config["Latency"]))
+    print("%-32s %12s %12s" % ("Scenario", "Min (s)", "Median (s)"))
+
+    for Name, Description, SetupFuncRef, SetupFuncArgs in SelectedScenarios:
+        Result = RunScenario(Name, SetupFuncRef, SetupFuncArgs, Config, Options.repeats)
+        Results["Results"].append(Result)
+        print("%-32s %12.3f %12.3f" % (Name, Result["Min Time"], Result["Median Time"]))
+        sys.stdout.flush()
+
+    OutputFile = Options.output
+    if OutputFile is None:
+        OutputDir = os.path.join(BenchmarksDir, "results")
+        if not os.path.isdir(OutputDir):
+            os.makedirs(OutputDir)
+        OutputFile = os.path.join(OutputDir, "BenchmarkResults-%s-%s.json" % (time.strftime("%Y%m%d-%H%M%S"), Results["GitRevision"]))
+
+    with open(OutputFile, "w") as FileHandle:
+        json.dump(Results, FileHandle, indent = 1)
+    print("\nSaved results to %s..." % OutputFile)
+
+    if Options.compare is not None:
+        NumOfRegressions = CompareResults(Results, Options.compare, Options.threshold)
+        return 1 if NumOfRegressions else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
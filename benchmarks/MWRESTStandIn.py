@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+#
+# Local HTTP server mimicking MW REST API endpoints for study analysis data
+# and datatables using synthetic studies.
+#
+# Usage:
+#
+#     python benchmarks/MWRESTStandIn.py --port 8765 --studies 10 --analyses 2 --samples 200 --features 2000
+#     python -c "import MWUtil; MWUtil.RetrieveStudiesAnalysisAndResultsData('ST900001', 'http://127.0.0.1:8765/rest')"
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import json
+import argparse
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer as ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import MWSyntheticData
+
+__all__ = ["StartRESTStandIn", "StopRESTStandIn"]
+
+
+def StartRESTStandIn(StudiesData, Port = 0, Latency = 0.0, Host = "127.0.0.1", FailureStatusCodes = None):
+    """Start a local HTTP server in a background thread, which serves the
+    following MW REST API endpoints for synthetic studies:
+
+    /rest/study/study_id/<StudyID>/analysis/ - Analysis data in JSON format
+    /rest/study/analysis_id/<AnalysisID>/datatable - Datatable text
+
+    Study ID substrings are matched as done by MW REST API unless a study ID
+    matches exactly. A latency may be added to each response to mimic network
+    round trips. Failed responses, such as 429 or 503, may be served for
+    specific paths before serving their data to mimic transient failures.
+    The number of requests and bytes served are tracked.
+
+    Arguments:
+        StudiesData (dict): Studies data from
+            MWSyntheticData.GenerateStudiesData.
+        Port (int): Port number. Default: Any available port.
+        Latency (float): Latency for each response in seconds.
+        Host (str): Host name.
+        FailureStatusCodes (dict): Status codes for failed responses to
+            serve for paths, such as /rest/study/study_id/ST900001/analysis/,
+            in the order of requests before serving data.
+
+    Returns:
+        dict : A dictionary containing server information along with MW
+            base URL for the server.
+
+    Examples:
+
+        StudiesData = MWSyntheticData.GenerateStudiesData(10, 2, 200, 2000)
+        RESTStandIn = MWRESTStandIn.StartRESTStandIn(StudiesData, Latency = 0.05)
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(" ".join(StudiesData["StudyIDs"]),
+                                 RESTStandIn["MWBaseURL"], NumOfWorkers = 4)
+        MWRESTStandIn.StopRESTStandIn(RESTStandIn)
+
+    """
+
+    Server = ThreadingHTTPServer((Host, Port), _RESTStandInRequestHandler)
+    Server.daemon_threads = True
+    Server.StudiesData = StudiesData
+    Server.Latency = Latency
+    Server.FailureStatusCodes = dict([(Path, list(StatusCodes)) for Path, StatusCodes in FailureStatusCodes.items()]) if FailureStatusCodes is not None else {}
+    Server.Stats = {"Requests": 0, "Bytes": 0}
+    Server.StatsLock = threading.Lock()
+
+    Thread = threading.Thread(target = Server.serve_forever, name = "MWRESTStandIn")
+    Thread.daemon = True
+    Thread.start()
+
+    RESTStandIn = {}
+    RESTStandIn["Server"] = Server
+    RESTStandIn["Thread"] = Thread
+    RESTStandIn["MWBaseURL"] = "http://%s:%d/rest" % (Host, Server.server_address[1])
+    RESTStandIn["Stats"] = Server.Stats
+
+    return RESTStandIn
+
+def StopRESTStandIn(RESTStandIn):
+    """Stop a local HTTP server started by StartRESTStandIn.
+
+    Arguments:
+        RESTStandIn (dict): Server information from StartRESTStandIn.
+
+    """
+
+    RESTStandIn["Server"].shutdown()
+    RESTStandIn["Server"].server_close()
+    RESTStandIn["Thread"].join()
+
+class _RESTStandInRequestHandler(BaseHTTPRequestHandler):
+    """Handle requests for MW REST API endpoints."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        StudiesData = self.server.StudiesData
+
+        FailureStatusCode = None
+        with self.server.StatsLock:
+            if len(self.server.FailureStatusCodes.get(self.path, [])):
+                FailureStatusCode = self.server.FailureStatusCodes[self.path].pop(0)
+                self.server.Stats["Requests"] += 1
+
+        if FailureStatusCode is not None:
+            self.send_error(FailureStatusCode)
+            return
+
+        Content = None
+        ContentType = "text/plain; charset=utf-8"
+
+        Match = re.match("^/rest/study/study_id/([^/]+)/analysis/?$", self.path)
+        if Match:
+            if Match.group(1) in StudiesData["AnalysisData"]:
+                StudyIDs = [Match.group(1)]
+            else:
+                StudyIDs = [StudyID for StudyID in StudiesData["StudyIDs"] if Match.group(1) in StudyID]
+            if len(StudyIDs) == 1:
+                AnalysisData = StudiesData["AnalysisData"][StudyIDs[0]]
+            else:
+                # Renumber analysis data across matched studies...
+                AnalysesData = []
+                for StudyID in StudyIDs:
+                    StudyAnalysisData = StudiesData["AnalysisData"][StudyID]
+                    AnalysesData.extend([StudyAnalysisData] if "study_id" in StudyAnalysisData else [StudyAnalysisData[Key] for Key in sorted(StudyAnalysisData, key = int)])
+                AnalysisData = dict([("%d" % (Index + 1), Data) for Index, Data in enumerate(AnalysesData)])
+
+            Content = json.dumps(AnalysisData if len(StudyIDs) else []).encode("utf-8")
+            ContentType = "application/json"
+
+        Match = re.match("^/rest/study/analysis_id/([^/]+)/datatable/?$", self.path)
+        if Match and Match.group(1) in StudiesData["DataTables"]:
+            Content = StudiesData["DataTables"][Match.group(1)]
+
+        if self.server.Latency > 0:
+            time.sleep(self.server.Latency)
+
+        if Content is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", ContentType)
+        self.send_header("Content-Length", "%d" % len(Content))
+        self.end_headers()
+        self.wfile.write(Content)
+
+        with self.server.StatsLock:
+            self.server.Stats["Requests"] += 1
+            self.server.Stats["Bytes"] += len(Content)
+
+    def log_message(self, Format, *Args):
+        """Suppress logging of requests."""
+
+        pass
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Serve synthetic studies using local MW REST API stand-in.")
+    Parser.add_argument("--port", type = int, default = 8765, help = "Port number")
+    Parser.add_argument("--studies", type = int, default = 10, help = "Number of studies")
+    Parser.add_argument("--analyses", type = int, default = 2, help = "Number of analyses in each study")
+    Parser.add_argument("--samples", type = int, default = 100, help = "Number of samples")
+    Parser.add_argument("--features", type = int, default = 1000, help = "Number of metabolites")
+    Parser.add_argument("--classes", type = int, default = 4, help = "Number of classes")
+    Parser.add_argument("--missing", type = float, default = 0.0, help = "Fraction of missing values")
+    Parser.add_argument("--latency", type = float, default = 0.0, help = "Latency for each response in seconds")
+    Options = Parser.parse_args()
+
+    StudiesData = MWSyntheticData.GenerateStudiesData(Options.studies, Options.analyses, Options.samples, Options.features, Options.classes, Options.missing)
+    RESTStandIn = StartRESTStandIn(StudiesData, Options.port, Options.latency)
+
+    print("Serving %d studies at %s; Study IDs: %s-%s..." % (Options.studies, RESTStandIn["MWBaseURL"], StudiesData["StudyIDs"][0], StudiesData["StudyIDs"][-1]))
+    print("Press Ctrl-C to stop...")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+    StopRESTStandIn(RESTStandIn)
+    print("Served %d requests and %.1f MB..." % (RESTStandIn["Stats"]["Requests"], RESTStandIn["Stats"]["Bytes"] / (1024.0 * 1024.0)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+#
+# Generate synthetic datatables in MW layout for benchmarks.
+#
+# Usage:
+#
+#     python benchmarks/MWSyntheticData.py --samples 200 --features 5000 --classes 4 --missing 0.05 --output SyntheticData.txt
+#
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import re
+import argparse
+
+import pandas as pd
+import numpy as np
+
+__all__ = ["GenerateAnalysisData", "GenerateDataFrame", "GenerateDataTable", "GenerateStudiesData", "GenerateUploadedDataInfo"]
+
+
+def GenerateDataFrame(NumOfSamples, NumOfFeatures, NumOfClasses = 4, MissingValuesFraction = 0.0, NumOfDifferentialFeatures = 5, Seed = 0):
+    """Generate a data frame containing synthetic metabolite values in MW
+    layout with Samples as index and Class followed by metabolite columns.
+
+    The metabolite values follow a log-normal distribution and a few features
+    are shifted for each class. The class names contain factors in MW style,
+    and samples are assigned to classes in a round-robin order. Missing
+    values are assigned uniformly at random.
+
+    Arguments:
+        NumOfSamples (int): Number of samples.
+        NumOfFeatures (int): Number of metabolites.
+        NumOfClasses (int): Number of classes.
+        MissingValuesFraction (float): Fraction of missing values.
+        NumOfDifferentialFeatures (int): Number of shifted features for
+            each class.
+        Seed (int): Random seed.
+
+    Returns:
+        panda : A data frame in MW layout.
+
+    """
+
+    RandomState = np.random.RandomState(Seed)
+
+    ClassNums = np.arange(NumOfSamples) % NumOfClasses
+    Values = RandomState.lognormal(mean = 8.0, sigma = 1.5, size = (NumOfSamples, NumOfFeatures))
+
+    # Shift a few features for each class...
+    for ClassNum in range(1, NumOfClasses):
+        StartColNum = (ClassNum * NumOfDifferentialFeatures) % max(NumOfFeatures, 1)
+        Values[ClassNums == ClassNum, StartColNum:StartColNum + NumOfDifferentialFeatures] *= 1.0 + 0.5 * ClassNum
+
+    Values = Values.round(2)
+    if MissingValuesFraction > 0:
+        Values[RandomState.random_sample(Values.shape) < MissingValuesFraction] = np.nan
+
+    DataFrame = pd.DataFrame(Values, columns = ["Metabolite %d" % (Index + 1) for Index in range(NumOfFeatures)],
+                             index = pd.Index(["Sample_%d" % (Index + 1) for Index in range(NumOfSamples)], name = "Samples"))
+    DataFrame.insert(0, "Class", ["Treatment:Group %d | Time:%dh" % (ClassNum + 1, 2 * ClassNum) for ClassNum in ClassNums])
+
+    return DataFrame
+
+def GenerateDataTable(NumOfSamples, NumOfFeatures, NumOfClasses = 4, MissingValuesFraction = 0.0, Seed = 0, Sep = "\t"):
+    """Generate datatable bytes in MW layout: Col 1: Samples; Col 2: Class;
+    Remaining cols: Metabolites. Missing values are written as empty fields
+    and a trailing short line is added as found in MW datatables.
+
+    Arguments:
+        NumOfSamples (int): Number of samples.
+        NumOfFeatures (int): Number of metabolites.
+        NumOfClasses (int): Number of classes.
+        MissingValuesFraction (float): Fraction of missing values.
+        Seed (int): Random seed.
+        Sep (str): Delimiter.
+
+    Returns:
+        bytes : Datatable text encoded as UTF-8.
+
+    Examples:
+
+        DataTable = MWSyntheticData.GenerateDataTable(200, 5000, MissingValuesFraction = 0.05)
+        DataFrame, ClassNamesMap = MWUtil._SetupDataFrameFromDataTable(DataTable)
+
+    """
+
+    DataFrame = GenerateDataFrame(NumOfSamples, NumOfFeatures, NumOfClasses, MissingValuesFraction, Seed = Seed)
+
+    DataTableText = DataFrame.to_csv(sep = Sep)
+    DataTableText += "Sample_NA%sNA\n" % Sep
+
+    return DataTableText.encode("utf-8")
+
+def GenerateAnalysisData(StudyID, AnalysisIDs):
+    """Generate analysis data returned by MW REST API for a study.
+
+    Arguments:
+        StudyID (str): Study ID.
+        AnalysisIDs (list): Analysis IDs.
+
+    Returns:
+        dict : Analysis data for a single analysis or a dictionary of
+            numbered analysis data for multiple analyses.
+
+    """
+
+    AnalysesData = []
+    for AnalysisID in AnalysisIDs:
+        AnalysesData.append({"study_id": StudyID, "analysis_id": AnalysisID,
+                             "analysis_summary": "Synthetic analysis %s for study %s" % (AnalysisID, StudyID),
+                             "analysis_type": "MS", "instrument_type": "Synthetic", "ms_type": "ESI", "ion_mode": "POSITIVE",
+                             "units": "Peak area"})
+
+    if len(AnalysesData) == 1:
+        return AnalysesData[0]
+
+    return dict([("%d" % (Index + 1), AnalysisData) for Index, AnalysisData in enumerate(AnalysesData)])
+
+def GenerateStudiesData(NumOfStudies, NumOfAnalyses, NumOfSamples, NumOfFeatures, NumOfClasses = 4, MissingValuesFraction = 0.0, Seed = 0):
+    """Generate analysis data and datatables for synthetic studies. The
+    study IDs start at ST900001 and analysis IDs start at AN900001.
+
+    Arguments:
+        NumOfStudies (int): Number of studies.
+        NumOfAnalyses (int): Number of analyses in each study.
+        NumOfSamples (int): Number of samples.
+        NumOfFeatures (int): Number of metabolites.
+        NumOfClasses (int): Number of classes.
+        MissingValuesFraction (float): Fraction of missing values.
+        Seed (int): Random seed.
+
+    Returns:
+        dict : A dictionary containing study IDs, analysis data and
+            datatables for analysis IDs.
+
+    """
+
+    StudiesData = {"StudyIDs": [], "AnalysisData": {}, "DataTables": {}}
+
+    AnalysisNum = 900000
+    for StudyNum in range(NumOfStudies):
+        StudyID = "ST%06d" % (900001 + StudyNum)
+        AnalysisIDs = []
+        for Index in range(NumOfAnalyses):
+            AnalysisNum += 1
+            AnalysisID = "AN%06d" % AnalysisNum
+            AnalysisIDs.append(AnalysisID)
+            StudiesData["DataTables"][AnalysisID] = GenerateDataTable(NumOfSamples, NumOfFeatures, NumOfClasses, MissingValuesFraction, Seed = Seed + AnalysisNum)
+
+        StudiesData["StudyIDs"].append(StudyID)
+        StudiesData["AnalysisData"][StudyID] = GenerateAnalysisData(StudyID, AnalysisIDs)
+
+    return StudiesData
+
+def GenerateUploadedDataInfo(NumOfFiles, NumOfSamples, NumOfFeatures, NumOfClasses = 4, MissingValuesFraction = 0.0, Seed = 0):
+    """Generate uploaded data information in the format of the value of
+    FileUpload ipywidget containing comma delimited data files.
+
+    Arguments:
+        NumOfFiles (int): Number of data files.
+        NumOfSamples (int): Number of samples.
+        NumOfFeatures (int): Number of metabolites.
+        NumOfClasses (int): Number of classes.
+        MissingValuesFraction (float): Fraction of missing values.
+        Seed (int): Random seed.
+
+    Returns:
+        dict : Uploaded data information.
+
+    """
+
+    UploadedDataInfo = {}
+    for FileNum in range(NumOfFiles):
+        Name = "SyntheticData%d.csv" % (FileNum + 1)
+        Content = GenerateDataTable(NumOfSamples, NumOfFeatures, NumOfClasses, MissingValuesFraction, Seed = Seed + FileNum, Sep = ",")
+        UploadedDataInfo[Name] = {"metadata": {"name": Name, "type": "text/csv", "size": len(Content)}, "content": Content}
+
+    return UploadedDataInfo
+
+def main():
+    Parser = argparse.ArgumentParser(description = "Generate a synthetic datatable in MW layout.")
+    Parser.add_argument("--samples", type = int, default = 100, help = "Number of samples")
+    Parser.add_argument("--features", type = int, default = 1000, help = "Number of metabolites")
+    Parser.add_argument("--classes", type = int, default = 4, help = "Number of classes")
+    Parser.add_argument("--missing", type = float, default = 0.0, help = "Fraction of missing values")
+    Parser.add_argument("--seed", type = int, default = 0, help = "Random seed")
+    Parser.add_argument("--output", required = True, help = "Output file. Files with .txt or .tsv extension are tab delimited")
+    Options = Parser.parse_args()
+
+    Sep = "\t" if re.search("\\.(txt|tsv)$", Options.output, re.I) else ","
+    DataTable = GenerateDataTable(Options.samples, Options.features, Options.classes, Options.missing, Options.seed, Sep)
+    with open(Options.output, "wb") as FileHandle:
+        FileHandle.write(DataTable)
+
+    print("Wrote %d samples and %d metabolites to %s (%.1f MB)..." % (Options.samples, Options.features, Options.output, len(DataTable) / (1024.0 * 1024.0)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import subprocess
+
+TestsDir = os.path.dirname(os.path.abspath(__file__))
+PackageDir = os.path.abspath(os.path.join(TestsDir, ".."))
+sys.path.insert(0, os.path.join(PackageDir, "benchmarks"))
+sys.path.insert(0, PackageDir)
+
+import pytest
+
+import MWRESTStandIn
+import MWSyntheticData
+
+# Code for retrieving studies data using requests backend in a new process,
+# which is killed instead of hanging the tests on a deadlock...
+RetrieveStudiesDataCode = """
+import sys
+import json
+
+sys.path.insert(0, %r)
+
+import pandas as pd
+
+import MWAsyncClient
+import MWCache
+
+MWBaseURL, StudyIDs, CacheDir, MaxConcurrency = %r, %r, %r, %r
+
+async def RetrieveData(Cache):
+    Client = MWAsyncClient.SetupAsyncClient(MWBaseURL, MaxConcurrency = MaxConcurrency, Cache = Cache, Backend = "requests")
+    try:
+        return await MWAsyncClient.RetrieveStudiesAnalysisAndResultsDataAsync(StudyIDs, Client)
+    finally:
+        await MWAsyncClient.CloseAsyncClient(Client)
+
+def SetupDataFrameHashes(StudiesResultsData):
+    return dict([("%%s/%%s" %% (StudyID, AnalysisID), int(pd.util.hash_pandas_object(StudiesResultsData[StudyID][AnalysisID]["data_frame"]).sum())) for StudyID in StudiesResultsData for AnalysisID in StudiesResultsData[StudyID]])
+
+Results = {"Runs": []}
+Cache = MWCache.SetupRESTCache(CacheDir = CacheDir, TimeToLive = 3600) if CacheDir is not None else None
+for RunNum in range(2 if Cache is not None else 1):
+    StudiesResultsData = MWAsyncClient.RunAsync(RetrieveData(Cache))
+    Results["Runs"].append({"DataFrames": SetupDataFrameHashes(StudiesResultsData), "Stats": dict(Cache["Stats"]) if Cache is not None else None})
+
+print(json.dumps(Results))
+"""
+
+
+@pytest.fixture(scope = "module")
+def RESTStandIn():
+    StudiesData = MWSyntheticData.GenerateStudiesData(4, 2, 20, 10, NumOfClasses = 2, MissingValuesFraction = 0.05)
+    RESTStandIn = MWRESTStandIn.StartRESTStandIn(StudiesData, Latency = 0.01)
+    RESTStandIn["StudyIDs"] = " ".join(StudiesData["StudyIDs"])
+    yield RESTStandIn
+    MWRESTStandIn.StopRESTStandIn(RESTStandIn)
+
+
+def RetrieveStudiesData(RESTStandIn, CacheDir = None, MaxConcurrency = 2, TimeLimit = 60):
+    Code = RetrieveStudiesDataCode % (PackageDir, RESTStandIn["MWBaseURL"], RESTStandIn["StudyIDs"], CacheDir, MaxConcurrency)
+    try:
+        Output = subprocess.check_output([sys.executable, "-c", Code], cwd = PackageDir, timeout = TimeLimit)
+    except subprocess.TimeoutExpired:
+        pytest.fail("Retrieval didn't complete in %d seconds" % TimeLimit)
+
+    return json.loads(Output.decode("utf-8").strip().splitlines()[-1])["Runs"]
+
+
+def test_RetrieveStudiesDataWithCacheAndRequestsBackend(RESTStandIn, tmp_path):
+    ExpectedRun, = RetrieveStudiesData(RESTStandIn)
+    assert len(ExpectedRun["DataFrames"]) == 8
+
+    FirstRun, SecondRun = RetrieveStudiesData(RESTStandIn, str(tmp_path))
+    assert FirstRun["DataFrames"] == ExpectedRun["DataFrames"]
+    assert FirstRun["Stats"]["Misses"] == 12 and FirstRun["Stats"]["Hits"] == 0
+
+    # Retrieve data again from the cache...
+    assert SecondRun["DataFrames"] == ExpectedRun["DataFrames"]
+    assert SecondRun["Stats"]["Hits"] == 12
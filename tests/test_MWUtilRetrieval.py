@@ -0,0 +1,68 @@
+import os
+import sys
+
+TestsDir = os.path.dirname(os.path.abspath(__file__))
+PackageDir = os.path.abspath(os.path.join(TestsDir, ".."))
+sys.path.insert(0, os.path.join(PackageDir, "benchmarks"))
+sys.path.insert(0, PackageDir)
+
+import pytest
+
+import MWUtil
+import MWRESTStandIn
+import MWSyntheticData
+
+
+@pytest.fixture(scope = "module")
+def StudiesData():
+    return MWSyntheticData.GenerateStudiesData(4, 2, 20, 10, NumOfClasses = 2, MissingValuesFraction = 0.05)
+
+
+def RetrieveStudiesData(StudiesData, NumOfWorkers, FailureStatusCodes = None, MaxRetries = 3):
+    RESTStandIn = MWRESTStandIn.StartRESTStandIn(StudiesData, Latency = 0.01, FailureStatusCodes = FailureStatusCodes)
+    try:
+        StudiesResultsData = MWUtil.RetrieveStudiesAnalysisAndResultsData(" ".join(StudiesData["StudyIDs"]), RESTStandIn["MWBaseURL"], NumOfWorkers = NumOfWorkers, MaxRetries = MaxRetries, RetryBackoffFactor = 0.01)
+    finally:
+        MWRESTStandIn.StopRESTStandIn(RESTStandIn)
+
+    return StudiesResultsData, RESTStandIn["Stats"]["Requests"]
+
+
+def AssertStudiesResultsDataEqual(StudiesResultsData, ExpectedStudiesResultsData):
+    assert list(StudiesResultsData) == list(ExpectedStudiesResultsData)
+    for StudyID in ExpectedStudiesResultsData:
+        assert list(StudiesResultsData[StudyID]) == list(ExpectedStudiesResultsData[StudyID])
+        for AnalysisID in ExpectedStudiesResultsData[StudyID]:
+            assert StudiesResultsData[StudyID][AnalysisID]["data_frame"].equals(ExpectedStudiesResultsData[StudyID][AnalysisID]["data_frame"])
+
+
+def test_RetrieveStudiesDataInOrder(StudiesData):
+    ExpectedStudiesResultsData, NumOfRequests = RetrieveStudiesData(StudiesData, 1)
+    assert list(ExpectedStudiesResultsData) == StudiesData["StudyIDs"]
+    assert NumOfRequests == 12
+
+    # Delay the first study and analysis using failed responses to complete
+    # their requests after other requests...
+    FailureStatusCodes = {"/rest/study/study_id/ST900001/analysis/": [503, 503], "/rest/study/analysis_id/AN900001/datatable": [503, 503]}
+    StudiesResultsData, NumOfRequests = RetrieveStudiesData(StudiesData, 4, FailureStatusCodes)
+    AssertStudiesResultsDataEqual(StudiesResultsData, ExpectedStudiesResultsData)
+    assert NumOfRequests == 16
+
+
+@pytest.mark.parametrize("StatusCode", [429, 503])
+def test_RetrieveStudiesDataWithRetries(StudiesData, StatusCode):
+    ExpectedStudiesResultsData, NumOfRequests = RetrieveStudiesData(StudiesData, 1)
+
+    FailureStatusCodes = {"/rest/study/study_id/ST900002/analysis/": [StatusCode] * 3, "/rest/study/analysis_id/AN900003/datatable": [StatusCode]}
+    for NumOfWorkers in [1, 4]:
+        StudiesResultsData, NumOfRequests = RetrieveStudiesData(StudiesData, NumOfWorkers, FailureStatusCodes)
+        AssertStudiesResultsDataEqual(StudiesResultsData, ExpectedStudiesResultsData)
+        assert NumOfRequests == 16
+
+
+def test_RetrieveStudiesDataWithFailedRetries(StudiesData):
+    FailureStatusCodes = {"/rest/study/study_id/ST900002/analysis/": [503] * 3}
+    StudiesResultsData, NumOfRequests = RetrieveStudiesData(StudiesData, 4, FailureStatusCodes, MaxRetries = 2)
+
+    assert list(StudiesResultsData) == ["ST900001", "ST900003", "ST900004"]
+    assert NumOfRequests == 12